@@ -15,8 +15,203 @@ os obtidos através do software fechado CATT2 (Van Wilen & Sonntag (1996)).
 
 from math import e,log,exp
 import math
-from robustNR_args import robustNewton
-from numpy import array,around
+import hashlib
+from contextlib import contextmanager
+from robustNR_args import robustNewton,robustNewton_lote,robustNewton_intervalo,SemTrocaDeSinal
+import robustNR_args
+from numpy import array,around,asarray,atleast_1d,newaxis
+from numpy import arange,broadcast_arrays,concatenate,maximum,ndim,where
+from numpy import exp as nexp, log as nlog
+from numpy import dtype,empty
+
+
+#**********************************************************************************
+
+u"""Tabelas de coeficientes, montadas uma unica vez na importacao do modulo e
+somente para leitura (writeable = False): as instancias de Lee_Kesler e de
+WuStiel apenas as referenciam, sem copiar nada.
+
+_COEF_LK: constantes de Lee-Kesler num array (2,12); a linha e o fluido
+    (id = 0, fluido simples; id = 1, fluido de referencia, octano) e as
+    colunas seguem a ordem b1..b4, c1..c4, d1, d2, beta, gama.
+_A_KEENAN, _TA_KEENAN, _RA_KEENAN: constantes A (10x7), Ta e Ra da equacao
+    de estado de Keenan para a agua."""
+
+def _somente_leitura(a):
+    a = array(a, dtype=float)
+    a.flags.writeable = False
+    return a
+
+_COEF_LK = _somente_leitura((
+    #  b1          b2         b3        b4        c1          c2          c3        c4        d1           d2            beta     gama
+    (0.1181193, 0.265728, 0.154790, 0.030323, 0.0236744, 0.0186984, 0.0,      0.042724, 0.155488e-4, 0.623689e-4,  0.65392, 0.060167),
+    (0.2026579, 0.331511, 0.027655, 0.203488, 0.0313385, 0.0503618, 0.016901, 0.041577, 0.48736e-4,  0.0740336e-4, 1.226,   0.03754)))
+
+_A_KEENAN = _somente_leitura((
+    [29.492937,     -5.198586,  6.833535,   -0.1564104, -6.397241,  -3.966140,  -0.6904855],
+    [-132.13917,    7.777918,   -26.149751, -0.7254611, 26.409282,  15.453061,  2.7407416],
+    [274.64632,     -33.301902, 65.326396,  -9.2734289, -47.740374, -29.14247,  -5.1028070],
+    [-360.93828,    -16.254622, -26.181978, 4.3125840,  56.323130,  29.568796,  3.9636085],
+    [342.18431,     -177.31074, 0.,         0.,         0.,         0.,         0.],
+    [-244.50042,    127.48742,  0.,         0.,         0.,         0.,         0.],
+    [155.18535,     137.46153,  0.,         0.,         0.,         0.,         0.],
+    [5.972849,      155.97836,  0.,         0.,         0.,         0.,         0.],
+    [-410.30848,    337.31180,  -137.46618, 6.7874983,  136.87317,  79.847970,  13.041253],
+    [-416.05860,    -209.88866, -733.96848, 10.401717,  645.81880,  399.17570,  71.531353]
+                    ))
+
+_TA_KEENAN = _somente_leitura([1.544912,    2.5,    2.5,    2.5,    2.5,    2.5,    2.5])
+
+_RA_KEENAN = _somente_leitura([0.634, 1., 1., 1., 1., 1., 1.])
+
+
+#**********************************************************************************
+
+class Continuacao(object):
+    u"""
+    Histórico das últimas soluções convergidas de cada tipo de solução
+    (chave), para começar a próxima solução de uma varredura (isobara ou
+    isoterma) perto da anterior, em vez do chute fixo. A chave inclui a
+    fase indicada pelo chute fixo, de modo que líquido e vapor têm
+    históricos separados. Com extrapola=True e duas
+    soluções na mesma isobara (ou isoterma), o chute é a extrapolação
+    linear delas em Tr (ou Pr); se Tr e Pr variam juntos, como ao longo da
+    linha de saturação, a extrapolação é feita pela projeção do passo novo
+    sobre o anterior, no plano (Tr, Pr); senão, o chute é a última solução.
+    Uma solução que parte do histórico é recusada (e refeita a partir do
+    chute fixo) se não convergir ou se cair longe da anterior (fator maior
+    que 'salto'), o que indica a raiz da outra fase.
+    """
+
+    def __init__(self, extrapola=True, salto=2.):
+        self.extrapola = extrapola
+        self.salto = salto
+        self.historico = {}
+        self.aceitas = 0
+        self.recusadas = 0
+
+    def semente(self, chave, tr, pr):
+        h = self.historico.get(chave)
+        if not h:
+            return None
+        tr1, pr1, x1 = h[-1]
+        if self.extrapola and len(h) == 2:
+            tr0, pr0, x0 = h[0]
+            if pr0 == pr1 and tr0 != tr1:
+                dx = (x1 - x0)*(tr - tr1)/(tr1 - tr0)
+            elif tr0 == tr1 and pr0 != pr1:
+                dx = (x1 - x0)*(pr - pr1)/(pr1 - pr0)
+            elif tr0 != tr1 and pr0 != pr1:
+                # Tr e Pr variam juntos (linha de saturação): extrapola
+                # pela projeção do passo novo sobre o anterior...
+                dtr, dpr = tr1 - tr0, pr1 - pr0
+                dx = (x1 - x0)*((tr - tr1)*dtr + (pr - pr1)*dpr)/(dtr*dtr + dpr*dpr)
+            else:
+                dx = 0.
+            if x1 + dx > 0:
+                return x1 + dx
+        return x1
+
+    def aceita(self, chave, x):
+        x1 = self.historico[chave][-1][2]
+        return x1/self.salto < x < x1*self.salto
+
+    def guarda(self, chave, tr, pr, x):
+        self.historico[chave] = (self.historico.get(chave, ())[-1:] +
+                                 ((tr, pr, x),))
+
+_continuacao = [None]
+
+@contextmanager
+def continuacao(extrapola=True):
+    u"""Dentro do bloco with, as soluções escalares de newton_2 e WuStiel
+    partem das soluções anteriores do mesmo bloco (ver Continuacao)."""
+    anterior = _continuacao[0]
+    _continuacao[0] = Continuacao(extrapola)
+    try:
+        yield _continuacao[0]
+    finally:
+        _continuacao[0] = anterior
+
+class Orcamento(object):
+    u"""
+    Limite de iterações de cada solução escalar de newton_2 e WuStiel
+    dentro de um bloco orcamento(): cada uma faz no máximo nitermax
+    iterações (e, na continuação, no máximo duas tentativas), sem os avisos
+    de não convergência de robustNR_args. São contadas as soluções e as que
+    não convergiram dentro do limite, para que quem chama decida o que fazer.
+    """
+
+    def __init__(self, nitermax):
+        self.nitermax = nitermax
+        self.solucoes = 0
+        self.nao_convergiu = 0
+
+_orcamento = [None]
+
+@contextmanager
+def orcamento(nitermax=30):
+    u"""Dentro do bloco with, as soluções escalares de newton_2 e WuStiel
+    têm no máximo nitermax iterações (ver Orcamento)."""
+    anterior, avisos = _orcamento[0], robustNR_args.avisos[0]
+    _orcamento[0] = Orcamento(nitermax)
+    robustNR_args.avisos[0] = False
+    try:
+        yield _orcamento[0]
+    finally:
+        _orcamento[0] = anterior
+        robustNR_args.avisos[0] = avisos
+
+def _resolve_continuo(chave, tr, pr, resolve, x_frio, nitermax=200):
+    u"""resolve(x0, n) -> (x, ite, F), com n o limite de iterações (None
+    para o padrão do solver); usa o histórico da continuação ativa, se
+    houver, e o chute fixo x_frio quando não há ou quando é recusado.
+    Dentro de um bloco orcamento(), o limite é o do orçamento."""
+    o = _orcamento[0]
+    if o is None:
+        return _resolve_semeado(chave, tr, pr, lambda x0: resolve(x0, None),
+                                x_frio, nitermax)
+    nitermax = min(nitermax, o.nitermax)
+    r = _resolve_semeado(chave, tr, pr, lambda x0: resolve(x0, nitermax),
+                         x_frio, nitermax)
+    o.solucoes += 1
+    if r[1] >= nitermax:
+        o.nao_convergiu += 1
+    return r
+
+def _resolve_semeado(chave, tr, pr, resolve, x_frio, nitermax):
+    c = _continuacao[0]
+    if c is None:
+        return resolve(x_frio)
+    x0 = c.semente(chave, tr, pr)
+    if x0 is not None:
+        r = resolve(x0)
+        if r[1] < nitermax and c.aceita(chave, r[0]):
+            c.aceitas += 1
+            c.guarda(chave, tr, pr, r[0])
+            return r
+        c.recusadas += 1
+    r = resolve(x_frio)
+    c.guarda(chave, tr, pr, r[0])
+    return r
+
+
+def _newton_escalar(fun, x0, jacob, intervalo, nitermax=None, xtol=None):
+    u"""robustNewton, ou, com intervalo=True, robustNewton_intervalo (que
+    mantém um intervalo com troca de sinal em torno da raiz); se não houver
+    troca de sinal perto de x0 (SemTrocaDeSinal; outros erros, como os da
+    própria fun, não são capturados), volta a robustNewton. nitermax = None e
+    xtol = None usam os padrões de cada um (os do perfil de precisão)."""
+    if intervalo:
+        try:
+            return robustNewton_intervalo(fun, x0, jacob=jacob, nitermax=nitermax, xtol=xtol)
+        except SemTrocaDeSinal:
+            pass
+    return robustNewton(fun, x0, jacob=jacob, nitermax=nitermax, xtol=xtol)
+
+def _limite(intervalo):
+    u"Limite de iterações do perfil de precisão para _newton_escalar."
+    return robustNR_args.perfil()['nitermax_intervalo' if intervalo else 'nitermax']
 
 
 #**********************************************************************************
@@ -24,32 +219,111 @@ from numpy import array,around
 class Lee_Kesler(object):
     u"""
     Classe com a equacao de estado de Lee and Kesler (Lee-Kesler, 1975)
-    em funcao de Tr e vr'. As constantres da equacao de estado sao armazenadas
-    no construtor em forma de listas onde o endereço e representado por id,
+    em funcao de Tr e vr'. As constantres da equacao de estado (tabela _COEF_LK,
+    comum a todas as instancias) estao em tuplas onde o endereço e representado por id,
     assim [id=0] sao as constantes para o fluido simples e [id=1] sao as constantes
     do fluido de referencia (octano). Os coeficientes viriais B, C e D estao
     dispostos em metodos. A equacao de estado completa e calculada no metodo Z
     em funcao de Tr, vr' e id (endereco das listas com as constants do fluido
+    Os metodos BCD_lote e Z_lote avaliam a equacao para arrays de Tr e vr e
+    para os dois fluidos de uma so vez; B, C, D, Z, dZdvr e dZdTr sao as
+    mesmas formulas em floats puros, para um unico estado (o caminho das
+    solucoes escalares, onde o custo dos arrays numpy dominaria).
     """
-    def __init__(self):
-        
-        u""" As constantes abaixo dispostas na forma de lista são para fluido simples
-            e de referencia respectivamente usadas no calculo de propriedades
-            generalizadas atraves da equacao de estado de Lee and Kesler."""
-         
-        self.b1   = [0.1181193,    0.2026579]
-        self.b2   = [0.265728,    0.331511]
-        self.b3   = [0.154790,    0.027655]
-        self.b4   = [0.030323,    0.203488]
-        self.c1   = [0.0236744,   0.0313385]
-        self.c2   = [0.0186984,   0.0503618]
-        self.c3   = [0.0,         0.016901]
-        self.c4   = [0.042724,    0.041577]
-        self.d1   = [0.155488e-4, 0.48736e-4]
-        self.d2   = [0.623689e-4, 0.0740336e-4]
-        self.beta = [0.65392,     1.226]
-        self.gama = [0.060167,    0.03754]
-      
+    # As constantes sao as da tabela _COEF_LK, comuns a todas as instancias;
+    # cada uma e uma tupla (fluido simples, fluido de referencia)...
+    b1, b2, b3, b4, c1, c2, c3, c4, d1, d2, beta, gama = map(tuple, _COEF_LK.T.tolist())
+    coef = _COEF_LK
+
+    def _colunas(self, id):
+        u"""Colunas de self.coef com forma (nf,1), prontas para o broadcast
+        contra arrays de N estados. nf = 2 se id is None, ou 1 se id = 0 ou 1."""
+        if id is None:
+            coef = self.coef
+        else:
+            coef = self.coef[id:id+1]
+        return coef.T[:, :, newaxis]
+
+    def BCD_lote(self, Tr, id=None):
+        u"""Coeficientes viriais B, C e D para um array de N temperaturas
+        reduzidas, para os dois fluidos de uma so vez (id=None) ou apenas
+        para o fluido id. Cada um tem forma (2,N) (ou (1,N)); as potencias
+        de 1/Tr sao calculadas uma unica vez para os dois fluidos."""
+        b1,b2,b3,b4,c1,c2,c3,c4,d1,d2,beta,gama = self._colunas(id)
+        t1 = 1./atleast_1d(asarray(Tr, dtype=float))
+        t2 = t1*t1
+        t3 = t2*t1
+
+        B = b1 - b2*t1 - b3*t2 - b4*t3
+        C = c1 - c2*t1 + c3*t3
+        D = d1 + d2*t1
+        return B, C, D
+
+    def Z_lote(self, Tr, vr, id=None):
+        u"""Fator de compressibilidade Z para arrays de N estados.
+        Z_lote(self, Tr, vr, id=None) > Z com forma (2,N) (ou (1,N) se id for dado)
+        Tr = Temperatura reduzida, escalar ou forma (N,)
+        vr = volume reduzido, escalar, forma (N,) (mesmo vr para os dois
+             fluidos) ou (2,N) (um vr por fluido)"""
+        b1,b2,b3,b4,c1,c2,c3,c4,d1,d2,beta,gama = self._colunas(id)
+        B, C, D = self.BCD_lote(Tr, id)
+
+        t3 = 1./atleast_1d(asarray(Tr, dtype=float))**3
+        iv = 1./atleast_1d(asarray(vr, dtype=float))
+        iv2 = iv*iv
+        iv5 = iv2*iv2*iv
+        gv2 = gama*iv2
+
+        return (1 + B*iv + C*iv2 + D*iv5 +
+                c4*t3*iv2*(beta + gv2)*nexp(-gv2))
+
+    def dBCD_lote(self, Tr, id=None):
+        u"""Derivadas dB/dTr, dC/dTr e dD/dTr, com as mesmas formas de BCD_lote."""
+        b1,b2,b3,b4,c1,c2,c3,c4,d1,d2,beta,gama = self._colunas(id)
+        t1 = 1./atleast_1d(asarray(Tr, dtype=float))
+        t2 = t1*t1
+
+        dB = t2*(b2 + t1*(2*b3 + 3*b4*t1))
+        dC = t2*(c2 - 3*c3*t2)
+        dD = -d2*t2
+        return dB, dC, dD
+
+    def dZ_lote(self, Tr, vr, id=None):
+        u"""Derivadas analiticas da equacao de estado, com as mesmas formas de
+        Z_lote. dZ_lote(self, Tr, vr, id=None) > dZ/dvr, dZ/dTr"""
+        b1,b2,b3,b4,c1,c2,c3,c4,d1,d2,beta,gama = self._colunas(id)
+        B, C, D = self.BCD_lote(Tr, id)
+        dB, dC, dD = self.dBCD_lote(Tr, id)
+
+        t1 = 1./atleast_1d(asarray(Tr, dtype=float))
+        t3 = t1*t1*t1
+        iv = 1./atleast_1d(asarray(vr, dtype=float))
+        iv2 = iv*iv
+        iv3 = iv2*iv
+        iv5 = iv3*iv2
+        gv2 = gama*iv2
+        ex = nexp(-gv2)
+        termo = iv2*(beta + gv2)*ex   # parte exponencial de Z, sem c4/Tr**3
+
+        dZdvr = (-B*iv2 - 2*C*iv3 - 5*D*iv5*iv +
+                 c4*t3*ex*iv3*(2*gv2*(beta + gv2) - 2*beta - 4*gv2))
+        dZdTr = dB*iv + dC*iv2 + dD*iv5 - 3*c4*t3*t1*termo
+        return dZdvr, dZdTr
+
+    def cv_lote(self, Tr, vr, id=None):
+        u"""Desvio do calor especifico a volume constante, (cv - cv*)/R, com
+        as mesmas formas de Z_lote (Lee-Kesler, 1975):
+        2(b3 + 3b4/Tr)/(Tr**2 vr) - 3c3/(Tr**3 vr**2) - 6E, com
+        E = c4/(2 Tr**3 gama)*(beta + 1 - (beta + 1 + gama/vr**2)*e**(-gama/vr**2))"""
+        b1,b2,b3,b4,c1,c2,c3,c4,d1,d2,beta,gama = self._colunas(id)
+        t1 = 1./atleast_1d(asarray(Tr, dtype=float))
+        t2 = t1*t1
+        t3 = t2*t1
+        iv = 1./atleast_1d(asarray(vr, dtype=float))
+        gv2 = gama*iv*iv
+
+        E = c4*t3/(2*gama)*(beta + 1 - (beta + 1 + gv2)*nexp(-gv2))
+        return 2*(b3 + 3*b4*t1)*t2*iv - 3*c3*t3*iv*iv - 6*E
 
     def B(self,Tr,id):
         u"""Coeficiente virial B
@@ -58,7 +332,8 @@ class Lee_Kesler(object):
         id = Endereco da constante.
              Se id = 0 > Fluido Simples
              Se id = 1 > Fluido de Referencia (Octano)"""
-        return self.b1[id]-(self.b2[id]/Tr)-(self.b3[id]/pow(Tr,2))-(self.b4[id]/pow(Tr,3))
+        t1 = 1./Tr
+        return self.b1[id] - t1*(self.b2[id] + t1*(self.b3[id] + t1*self.b4[id]))
     
     def C(self,Tr,id):
         u"""Coeficiente virial C
@@ -67,8 +342,8 @@ class Lee_Kesler(object):
         id = Endereco da constante.
              Se id = 0 > Fluido Simples
              Se id = 1 > Fluido de Referencia (Octano)"""
-        C=(self.c1[id])-(self.c2[id]/Tr)+(self.c3[id]/pow(Tr,3))
-        return C
+        t1 = 1./Tr
+        return self.c1[id] - self.c2[id]*t1 + self.c3[id]*t1*t1*t1
     
     def D(self,Tr,id):
         u"""Coeficiente virial D
@@ -77,8 +352,7 @@ class Lee_Kesler(object):
         id = Endereco da constante.
              Se id = 0 > Fluido Simples
              Se id = 1 > Fluido de Referencia (Octano)"""
-        D=(self.d1[id])+(self.d2[id]/Tr)
-        return D
+        return self.d1[id] + self.d2[id]/Tr
     
     def Z(self, Tr, vr,id):
         u""" funcao que calcula o fator de compressibilidade Z em funcao de Tr,vr,id
@@ -88,12 +362,33 @@ class Lee_Kesler(object):
         id = Endereco da constante.
              Se id = 0 > Fluido Simples
              Se id = 1 > Fluido de Referencia (Octano)"""
-        
-        B,C,D=self.B(Tr, id),self.C(Tr, id),self.D(Tr, id)
+        iv = 1./vr
+        iv2 = iv*iv
+        gv2 = self.gama[id]*iv2
+        return (1 + self.B(Tr, id)*iv + self.C(Tr, id)*iv2 + self.D(Tr, id)*iv2*iv2*iv +
+                self.c4[id]/(Tr*Tr*Tr)*iv2*(self.beta[id] + gv2)*exp(-gv2))
 
-        Z=1+(B/vr)+(C/pow(vr,2))+(D/pow(vr,5))+(self.c4[id]/(pow(Tr,3)*pow(vr,2)
-        ))*(self.beta[id]+(self.gama[id]/pow(vr,2)))*math.exp(-self.gama[id]/pow(vr,2))
-        return Z
+    def dZdvr(self, Tr, vr, id):
+        u"""Derivada analitica dZ/dvr em (Tr, vr) para o fluido id."""
+        iv = 1./vr
+        iv2 = iv*iv
+        iv3 = iv2*iv
+        beta, gv2 = self.beta[id], self.gama[id]*iv2
+        return (-self.B(Tr, id)*iv2 - 2*self.C(Tr, id)*iv3 - 5*self.D(Tr, id)*iv3*iv3 +
+                self.c4[id]/(Tr*Tr*Tr)*exp(-gv2)*iv3*(2*gv2*(beta + gv2) - 2*beta - 4*gv2))
+
+    def dZdTr(self, Tr, vr, id):
+        u"""Derivada analitica dZ/dTr em (Tr, vr) para o fluido id."""
+        t1 = 1./Tr
+        t2 = t1*t1
+        iv = 1./vr
+        iv2 = iv*iv
+        gv2 = self.gama[id]*iv2
+        dB = t2*(self.b2[id] + t1*(2*self.b3[id] + 3*self.b4[id]*t1))
+        dC = t2*(self.c2[id] - 3*self.c3[id]*t2)
+        dD = -self.d2[id]*t2
+        return (dB*iv + dC*iv2 + dD*iv2*iv2*iv -
+                3*self.c4[id]*t2*t2*iv2*(self.beta[id] + gv2)*exp(-gv2))
 
 #*******************************************************************************************
 
@@ -102,71 +397,130 @@ class WuStiel(object):
 procedimento de Lee-Kesler para os fluidos polares, por meio do
 método sugerido por Wu-Stiel. Este utiliza a água como referência,
 um fator Y de correção e a equação de estado de Keenan para a água.
+Com intervalo = True (na classe, valendo para todas as instâncias, ou
+numa instância) o Zw escalar é obtido por robustNewton_intervalo.
     """
 
-    def __init__(self): # Constantes para a equação de estado de Keenan
-        
-        self.A = array((
-    [29.492937,     -5.198586,  6.833535,   -0.1564104, -6.397241,  -3.966140,  -0.6904855],
-    [-132.13917,    7.777918,   -26.149751, -0.7254611, 26.409282,  15.453061,  2.7407416],
-    [274.64632,     -33.301902, 65.326396,  -9.2734289, -47.740374, -29.14247,  -5.1028070],
-    [-360.93828,    -16.254622, -26.181978, 4.3125840,  56.323130,  29.568796,  3.9636085],
-    [342.18431,     -177.31074, 0.,         0.,         0.,         0.,         0.],
-    [-244.50042,    127.48742,  0.,         0.,         0.,         0.,         0.],
-    [155.18535,     137.46153,  0.,         0.,         0.,         0.,         0.],
-    [5.972849,      155.97836,  0.,         0.,         0.,         0.,         0.],
-    [-410.30848,    337.31180,  -137.46618, 6.7874983,  136.87317,  79.847970,  13.041253],
-    [-416.05860,    -209.88866, -733.96848, 10.401717,  645.81880,  399.17570,  71.531353]
-                        ))
+    intervalo = False
 
-        self.Ta = array((
-        [1.544912,    2.5,    2.5,    2.5,    2.5,    2.5,    2.5]
-                    ))
-
-        self.Ra = ((
-        [0.634, 1., 1., 1., 1., 1., 1.]
-                ))
+    # Constantes para a equação de estado de Keenan (tabelas do módulo)
+    A = _A_KEENAN
+    Ta = _TA_KEENAN
+    Ra = _RA_KEENAN
 
-    def __call__(self,Z,Tr,Pr,tol=1e-8):       
-        T = 647.29*Tr   
-        P = 22.088*Pr # CUIDADO! Em MPa no original...
-        t = 1000./T   # 1/K
-	
-        def difZw(Z):               
-            rw = P/(.41615*Z*T)
-            Q,DQ,DQT = 0.,0.,0.
+    def keenan(self,rw,t,d2=False,dt=False):
+        u"""Termos Q, DQ (derivada em rw) e DQT da equação de Keenan, para
+        arrays (ou escalares) de densidade rw e de t = 1000/T. As 7 colunas
+        de self.A são avaliadas juntas: os polinômios em (rw - Ra[j]) e suas
+        derivadas por Horner e a exponencial e**(-4.8*rw) uma única vez.
+        Se d2 for True, retorna também D2Q, a derivada segunda em rw; se dt
+        for True, retorna D2Q e ainda DQDT (derivada de DQ em t) e D2QT (a
+        derivada segunda em t)."""
+        rw = asarray(rw, dtype=float)[..., newaxis]
+        t = asarray(t, dtype=float)[..., newaxis]
+        A = self.A
 
-            for j in range(7):
-                EX = e**(-4.8*rw)*(self.A[8,j] + self.A[9,j]*rw)
-                DEX = e**(-4.8*rw)*(-4.8*(self.A[8,j] + 
-                            self.A[9,j]*rw) + self.A[9,j])
+        y = rw - self.Ra
+        QS = A[7] + 0.*y
+        DQS = 0.*y
+        D2QS = 0.*y  # metade da derivada segunda...
+        for i in range(6, -1, -1):
+            D2QS = D2QS*y + DQS
+            DQS = DQS*y + QS
+            QS = QS*y + A[i]
 
-                QS,DQS = 0.,0.
+        E = nexp(-4.8*rw)
+        lin = A[8] + A[9]*rw
+        EX = E*lin
+        DEX = E*(A[9] - 4.8*lin)
 
-                for i in range(8):
-                    QS += self.A[i,j]*(rw - self.Ra[j])**(i)
-                    DQS += (i)*self.A[i,j]*(rw - self.Ra[j])**(i-1)
+        # pesos (t - Ta[j])**(j-1)*(t - Ta[0]) de cada coluna e os de DQT;
+        # para j = 0 eles valem exatamente 1 e 0...
+        tau = t - self.Ta[0]
+        j = arange(1, 7)
+        d = t - self.Ta[1:]
+        pj = d**(j-1)
+        w = concatenate((1. + 0.*tau, pj*tau), -1)
+        wt = concatenate((0.*tau, pj + (j-1)*d**maximum(j-2, 0)*tau), -1)
 
-                Q +=  (t - self.Ta[j])**(j-1)*(QS +   EX)*(t - self.Ta[0])
-                DQ += (t - self.Ta[j])**(j-1)*(DQS + DEX)*(t - self.Ta[0])
-                DQT += ((t - self.Ta[j])**(j-1)*(QS + EX) + 
-                    (j-1)*(t - self.Ta[j])**(j-2)*(QS + EX)*(t - self.Ta[0]) )
+        Q = (w*(QS + EX)).sum(-1)
+        DQ = (w*(DQS + DEX)).sum(-1)
+        DQT = (wt*(QS + EX)).sum(-1)
+        if d2 or dt:
+            D2EX = E*(23.04*lin - 9.6*A[9])
+            D2Q = (w*(2*D2QS + D2EX)).sum(-1)
+            if dt:
+                wtt = concatenate((0.*tau, 2*(j-1)*d**maximum(j-2, 0) +
+                                   (j-1)*(j-2)*d**maximum(j-3, 0)*tau), -1)
+                DQDT = (wt*(DQS + DEX)).sum(-1)
+                D2QT = (wtt*(QS + EX)).sum(-1)
+                return Q,DQ,DQT,D2Q,DQDT,D2QT
+            return Q,DQ,DQT,D2Q
+        return Q,DQ,DQT
 
+    def __call__(self,Z,Tr,Pr,tol=None,chute=None):       
+        u"""Z, Tr e Pr podem ser escalares ou arrays (de mesma forma ou
+        escalares); neste caso todos os Zw são resolvidos num só lote,
+        partindo de 'chute' (array de Zw iniciais), se dado. tol é a
+        tolerância do resíduo de Newton (None: a do perfil de precisão).
+        Dentro de um bloco continuacao(), a solução escalar parte do Zw
+        anterior da mesma fase, se houver."""
+        T = 647.29*asarray(Tr, dtype=float)
+        P = 22.088*asarray(Pr, dtype=float) # CUIDADO! Em MPa no original...
+        t = 1000./T   # 1/K
+	
+        def difZw(Z,args=(T,P,t)):
+            T_,P_,t_ = args
+            rw = P_/(.41615*Z*T_)
+            Q,DQ,DQT = self.keenan(rw,t_)
             return Z -(1 + rw*Q + rw*rw*DQ),Q,DQT
-      
-        if Z <= 0.1: #0.2347 'liquido'
-            Zin = 0.001
-        else:
-            Zin = 1.1
+
+        def jacZw(Z,args=(T,P,t)):
+            # d(difZw)/dZ, com drw/dZ = -rw/Z...
+            T_,P_,t_ = args
+            rw = P_/(.41615*Z*T_)
+            Q,DQ,DQT,D2Q = self.keenan(rw,t_,d2=True)
+            return 1 + rw/Z*(Q + 3*rw*DQ + rw*rw*D2Q)
+
+        if ndim(Z) == 0 and T.ndim == 0 and P.ndim == 0:
+            if Z <= 0.1: #0.2347 'liquido'
+                Zin = 0.001
+            else:
+                Zin = 1.1
             
-        Z3 = robustNewton(lambda z,args: difZw(z)[0],Zin)[0]
+            Z3 = _resolve_continuo(('Zw', Zin), Tr, Pr,
+                        lambda Z0, n: _newton_escalar(lambda z,args: difZw(z)[0],Z0,
+                                                      lambda z,args: jacZw(z),
+                                                      self.intervalo, n, tol), Zin,
+                        _limite(self.intervalo))[0]
+        else:
+            Z,T,P,t = broadcast_arrays(Z,T,P,t)
+            Zin = where(Z <= 0.1, 0.001, 1.1) if chute is None else broadcast_arrays(chute, Z)[0]
+            Z3 = robustNewton_lote(lambda z,args: difZw(z,args)[0],Zin.ravel(),
+                        jacob=jacZw,xtol=tol,args=(T.ravel(),P.ravel(),t.ravel()))[0].reshape(Z.shape)
+
         self.Zw = Z3
         
         Q,DQT = difZw(Z3)[1:]
         rw = P/(.41615*self.Zw*T)
         self.rw = rw
+        self.t = t
         self.Hw = -self.Zw + 1. - rw*t*DQT   # (h*-h)/RTc
-        self.Sw = -log(self.Zw) + rw*Q - rw*t*DQT  # (s*-s)/R
+        self.Sw = -nlog(self.Zw) + rw*Q - rw*t*DQT  # (s*-s)/R
+
+    def derivadas(self):
+        u"""Derivadas da equação de Keenan no estado da última chamada, com
+        a forma de Zw: PT = (dlnP/dlnT) a rw constante, PV = (dlnP/dlnrw) a T
+        constante e o desvio (cv - cv*)/R. Com a energia de Helmholtz
+        residual de Keenan, a/RT = rw*Q:
+            Z = 1 + rw*Q + rw**2*DQ
+            T*dZ/dT = -t*(rw*DQT + rw**2*DQDT)
+            (cv - cv*)/R = -rw*t**2*D2QT"""
+        rw, t, Z = self.rw, self.t, self.Zw
+        Q,DQ,DQT,D2Q,DQDT,D2QT = self.keenan(rw,t,dt=True)
+        PT = 1. - t*(rw*DQT + rw*rw*DQDT)/Z
+        PV = (1. + 2*rw*Q + 4*rw*rw*DQ + rw**3*D2Q)/Z
+        return PT, PV, -rw*t*t*D2QT
 
     
 #***********************************************************************************************
@@ -179,10 +533,15 @@ class newton_2(object):
     fator de compressibilidade e outras propriedades termodinamicas a partir da equacao de estado
     de Lee and Kesler. Observa-se que o valor inicial usado no metodo dita quase que completamente
     a fase em que o fluido se encontra.
+    Com intervalo = True (na classe ou numa instancia), vr' e obtido por
+    robustNewton_intervalo, mantendo um intervalo com troca de sinal.
     """
 
+    intervalo = False
+
+    lee_kesler = None # Lee_Kesler() compartilhado, criado abaixo da classe
+
     def __init__(self,tr,pr,id):
-        self.lee_kesler = Lee_Kesler()
         
         """tr = Temperatura reduzida
         vr = volume reduzido
@@ -191,4 +550,213 @@ class newton_2(object):
         self.id=id
         self.pr = pr
         self.tr = tr
-  
\ No newline at end of file
+  
+
+    def Z_(self, vr, args=None):
+        u"""Residuo da equacao de estado em vr': Z(tr,vr') - pr*vr'/tr."""
+        return self.lee_kesler.Z(self.tr, vr, self.id) - self.pr*vr/self.tr
+
+    def dZ_(self, vr, args=None):
+        u"""Derivada analitica do residuo Z_ em relacao a vr'."""
+        return self.lee_kesler.dZdvr(self.tr, vr, self.id) - self.pr/self.tr
+
+    def resolve(self, vr0):
+        u"""Obtem vr' por Newton-Raphson partindo de vr0, com o jacobiano
+        analitico dZ_ (sem diferencas finitas). Retorna vr', iteracoes e residuo.
+        Dentro de um bloco continuacao(), parte da solucao anterior da mesma
+        fase, se houver; a fase e a do chute vr0 (liquido se o Z que ele
+        implica, pr*vr0/tr, for no maximo 0.1, como em WuStiel)."""
+        liquido = self.pr*vr0/self.tr <= 0.1
+        return _resolve_continuo(('vr', self.id, liquido), self.tr, self.pr,
+                                 lambda x0, n: _newton_escalar(self.Z_, x0, self.dZ_,
+                                                               self.intervalo, n), vr0,
+                                 _limite(self.intervalo))
+
+newton_2.lee_kesler = Lee_Kesler()
+
+
+#***********************************************************************************************
+
+CAMPOS_HS = ('Z', 'Zl', 'Zv', 'h', 'hl', 'hv', 's', 'sl', 'sv', 'Pr', 'Tr')
+
+TIPO_HS = dtype([(campo, 'f8') for campo in CAMPOS_HS])
+
+class EstadoHS(object):
+    u"""
+    Resultado compacto de uma solucao de H_S: so os campos de CAMPOS_HS, em
+    __slots__ (sem um dicionario por objeto). Os campos que a solucao nao
+    tem (Zl, Zv, hl, ... fora da saturacao; Z, h, s na saturacao, se H_S nao
+    os der) valem nan. Aceita tambem estado['Z'], como o dicionario prop.
+    """
+    __slots__ = CAMPOS_HS
+
+    def __init__(self, prop):
+        for campo in CAMPOS_HS:
+            setattr(self, campo, prop.get(campo, float('nan')))
+
+    def __getitem__(self, campo):
+        return getattr(self, campo)
+
+    def tupla(self):
+        return tuple([getattr(self, campo) for campo in CAMPOS_HS])
+
+def versao_coeficientes():
+    u"""Resumo (sha1, em hexadecimal) das constantes de Lee_Kesler e de
+    WuStiel (as das classes, que e o que as solucoes usam) e dos campos de
+    CAMPOS_HS: muda sempre que alguma delas mudar. Identifica as solucoes
+    guardadas num cache persistente (ver cache_eos.py)."""
+    resumo = hashlib.sha1()
+    for tabela in (Lee_Kesler.coef, WuStiel.A, WuStiel.Ta, WuStiel.Ra):
+        resumo.update(array(tabela, dtype='<f8').tostring())
+    resumo.update(' '.join(CAMPOS_HS))
+    return resumo.hexdigest()
+
+u"""Cache das solucoes de H_S: com usar_cache(cache), resolve e resolve_lote
+consultam cache.busca(chave) antes de resolver H_S e guardam cada solucao
+nova com cache.guarda(chave, valores), onde chave = cache.chave(Tr, Pr, x, w)
+e valores e a tupla dos campos de CAMPOS_HS (ver cache_eos.CacheEOS).
+Solucoes que nao convergiram dentro de um orcamento() nao sao guardadas."""
+
+_cache = [None]
+
+def usar_cache(cache):
+    u"Liga (ou, com cache = None, desliga) o cache das solucoes de H_S."
+    _cache[0] = cache
+
+def _solucao(argumentos):
+    u"Tupla dos campos de CAMPOS_HS da solucao de H_S(**argumentos)."
+    c = _cache[0]
+    if c is not None:
+        chave = c.chave(argumentos.get('Tr'), argumentos.get('Pr'),
+                        argumentos.get('x'), argumentos.get('w', 0.344))
+        valores = c.busca(chave)
+        if valores is not None:
+            return valores
+
+    o = _orcamento[0]
+    n = o.nao_convergiu if o is not None else 0
+    prop = H_S(**argumentos).prop
+    valores = tuple([prop.get(campo, float('nan')) for campo in CAMPOS_HS])
+    if c is not None and (o is None or o.nao_convergiu == n):
+        c.guarda(chave, valores)
+    return valores
+
+def resolve(**kwargs):
+    u"""H_S(**kwargs) (Tr, Pr, x e w, como em H_S) na forma de um EstadoHS;
+    o objeto de H_S e o seu dicionario prop sao descartados em seguida."""
+    if _cache[0] is None:
+        return EstadoHS(H_S(**kwargs).prop)
+    return EstadoHS(dict(zip(CAMPOS_HS, _solucao(kwargs))))
+
+def resolve_lote(Tr=None, Pr=None, x=None, w=0.344):
+    u"""Solucoes de H_S para cada elemento de Tr e/ou Pr (arrays de mesma
+    forma, ou escalares), guardadas num unico array estruturado contiguo,
+    de tipo TIPO_HS e com a forma de Tr e Pr: resultado['h'], por exemplo,
+    e o array das entalpias residuais."""
+    dados = dict([(k, v) for k, v in (('Tr', Tr), ('Pr', Pr)) if v is not None])
+    nomes = dados.keys()
+    valores = broadcast_arrays(*[asarray(dados[k], dtype=float) for k in nomes])
+    resultado = empty(valores[0].shape, dtype=TIPO_HS)
+    plano = resultado.reshape(-1)
+    extras = {'w' : w}
+    if x is not None:
+        extras['x'] = x
+    for i, ponto in enumerate(zip(*[v.ravel() for v in valores])):
+        argumentos = dict(zip(nomes, [float(p) for p in ponto]), **extras)
+        plano[i] = _solucao(argumentos)
+    return resultado
+
+
+#***********************************************************************************************
+
+u"""Propriedades derivadas (cp, cv, velocidade do som, Joule-Thomson) sem
+diferencas finitas: derivadas_lote resolve os vr' dos dois fluidos de
+Lee-Kesler (robustNewton_lote, com o jacobiano analitico) e o Zw de Keenan
+(WuStiel, em lote) e, de cada modelo, tira das derivadas analiticas o Z,
+ZT = Tr*(dZ/dTr) e ZP = Pr*(dZ/dPr) a Pr e a Tr constantes e o desvio
+(cp - cp*)/R, que sao combinados como Z na correcao de Wu-Stiel:
+    X = X0 + w*(Xr - X0)/W_REF + Y*(Xw - X0 - W_AGUA*(Xr - X0)/W_REF)
+Sendo derivadas a (Tr, Pr) constantes, elas se combinam como Z e os desvios.
+Para a propria agua (w = W_AGUA e Y = 1) os termos de Lee-Kesler se cancelam
+e X = Xw: so Keenan e resolvido."""
+
+W_REF = 0.3978  # fator acentrico do fluido de referencia (octano)
+W_AGUA = 0.344  # fator acentrico da agua, o fluido de referencia de Wu-Stiel
+
+def _a_pressao_constante(Z, PT, PV, cv):
+    u"""Z, ZT, ZP e (cp - cp*)/R de um modelo, a partir das derivadas a
+    volume constante PT = (dlnP/dlnT)v, PV = -(dlnP/dlnv)T e (cv - cv*)/R."""
+    return Z, Z*(PT/PV - 1.), Z*(1. - 1./PV), cv + Z*PT*PT/PV - 1.
+
+def derivadas_lote(Tr, Pr, liquido, w=0.344, Y=1.0):
+    u"""Derivadas para arrays (ou escalares) Tr, Pr e liquido (booleano: a
+    fase de cada ponto, que escolhe os chutes iniciais, como em WuStiel).
+    Retorna Z, ZT, ZP e (cp - cp*)/R com a forma de Tr, Pr e liquido. Com
+    elas, em cada ponto (R por mol):
+        cp = cp* + R*(cp - cp*)/R
+        cv = cp - R*(Z + ZT)**2/(Z - ZP)
+        (dP/drho)T = R*T*Z**2/(Z - ZP)
+        T*(dv/dT)P - v = v*ZT/Z
+    Os pontos em que a raiz da fase pedida nao e encontrada (num dos
+    fluidos de Lee-Kesler, ou a raiz estavel de Keenan no liquido) ficam
+    com NaN, em vez da raiz da outra fase."""
+    Tr, Pr, liquido = broadcast_arrays(asarray(Tr, dtype=float), asarray(Pr, dtype=float),
+                                       asarray(liquido, dtype=bool))
+    forma = Tr.shape
+    Tr, Pr, liquido = Tr.ravel(), Pr.ravel(), liquido.ravel()
+    Zin = where(liquido, 0.001, 1.1)
+    lk = newton_2.lee_kesler
+    agua = w == W_AGUA and Y == 1
+
+    fluidos = []
+    for id in ((0, 1) if not agua else ()):
+        F = lambda vr, args: lk.Z_lote(args[0], vr, id)[0] - args[1]*vr/args[0]
+        J = lambda vr, args: lk.dZ_lote(args[0], vr, id)[0][0] - args[1]/args[0]
+        # Os pontos que nao convergem em 50 iteracoes sao refeitos com o
+        # limite do perfil, a partir do mesmo chute; perto da saturacao de
+        # cada fluido a raiz da fase pedida pode nao existir, e os que
+        # ainda falham ficam com NaN...
+        xtol = robustNR_args.perfil()['xtol']
+        avisos, robustNR_args.avisos[0] = robustNR_args.avisos[0], False
+        try:
+            vr, ite, res = robustNewton_lote(F, Zin*Tr/Pr, jacob=J, args=(Tr, Pr),
+                                             nitermax=min(50, robustNR_args.perfil()['nitermax']))
+            falhou = abs(res) > xtol
+            if falhou.any():
+                vrf, ite, resf = robustNewton_lote(F, vr[falhou], jacob=J,
+                                                   args=(Tr[falhou], Pr[falhou]))
+                vr[falhou] = where(abs(resf) > xtol, float('nan'), vrf)
+        finally:
+            robustNR_args.avisos[0] = avisos
+        Z = Pr*vr/Tr
+        dZdvr, dZdTr = lk.dZ_lote(Tr, vr, id)
+        fluidos.append(_a_pressao_constante(Z, 1. + Tr*dZdTr[0]/Z, 1. - vr*dZdvr[0]/Z,
+                                            lk.cv_lote(Tr, vr, id)[0]))
+
+    # No liquido, o chute de WuStiel (Zw = 0.001) pode levar a raiz instavel
+    # de Keenan, com (dP/drho)T < 0; esses pontos sao resolvidos de novo a
+    # partir do lado denso (rw = 1.1 g/cm3)...
+    ws = WuStiel()
+    ws(Zin, Tr, Pr)
+    Zw = ws.Zw
+    PT, PV, cv = ws.derivadas()
+    instavel = liquido & (PV <= 0)
+    if instavel.any():
+        T, P = 647.29*Tr[instavel], 22.088*Pr[instavel]
+        ws(Zin[instavel], Tr[instavel], Pr[instavel], chute=P/(.41615*1.1*T))
+        Zw[instavel] = ws.Zw
+        PT[instavel], PV[instavel], cv[instavel] = ws.derivadas()
+    # ...e os que ainda nao convergiram, ou que ficaram instaveis, com NaN.
+    rw, t = 22.088*Pr/(.41615*Zw*647.29*Tr), 1000./(647.29*Tr)
+    Q, DQ = ws.keenan(rw, t)[:2]
+    Zw[(PV <= 0) | (abs(Zw - 1 - rw*Q - rw*rw*DQ) > robustNR_args.perfil()['xtol'])] = float('nan')
+    Xw = _a_pressao_constante(Zw, PT, PV, cv)
+    if agua:
+        return tuple([X.reshape(forma) for X in Xw])
+    fluidos.append(Xw)
+
+    resultado = []
+    for X0, Xr, Xw in zip(*fluidos):
+        X1 = (Xr - X0)/W_REF
+        resultado.append((X0 + w*X1 + Y*(Xw - X0 - W_AGUA*X1)).reshape(forma))
+    return tuple(resultado)
@@ -0,0 +1,280 @@
+# -*- coding:utf-8 -*-
+u"""
+        MEDIDAS DE DESEMPENHO:
+Mede o tempo do método de Newton (robustNewton, escalar e vetorial, com e
+sem jacobiano, e com Broyden), da equação de estado (Lee_Kesler.Z, WuStiel.__call__), de
+LK.H_S, das funções v, h, s, u e derivadas de propriedades_agua, da geração completa
+das quatro tabelas (e da de vapor refeita com o cache persistente das
+soluções, cache_eos.py), de uma grade de ciclos de Rankine e da partida de
+um processo novo (importação de propriedades_agua, sozinha e seguida da
+primeira propriedade, num subprocesso). Para cada caso são informados:
+    chamadas/s : chamadas por segundo (melhor de 'repeticoes' medidas);
+    ite/solucao: iterações de Newton por solução (robustNewton ou lote);
+    eos/chamada: pontos avaliados da equação de estado (Lee_Kesler.Z_lote,
+                 Lee_Kesler.Z escalar e WuStiel.keenan) por chamada;
+    H_S/chamada: soluções de LK.H_S por chamada.
+Os contadores (instrumentacao.py) são tomados numa execução separada da
+medida de tempo.
+Os resultados podem ser gravados em JSON e comparados com uma execução
+anterior: o programa termina com erro (código 1) se algum caso ficar mais
+lento que a referência além do limite relativo dado.
+    python benchmark.py --saida atual.json
+    python benchmark.py --referencia base.json --limite 0.2
+Casos que dependem de LK.H_S ficam indisponíveis se ele não existir.
+"""
+
+import os
+import sys
+import time
+import json
+import imp
+import tempfile
+import subprocess
+import platform
+import argparse
+from numpy import array,linspace
+import LK_WS_NR as LK
+import robustNR_args as NR
+import instrumentacao as INS
+import propriedades_agua as PA
+import ciclo_rankine as CR
+import cache_eos as CE
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def gerador():
+    u"O programa gerador de tabelas, carregado como módulo."
+    return imp.load_source('gerador_propriedades_agua',
+                           os.path.join(_DIR, 'trab.1-gerador_propriedades_agua.py'))
+
+
+#**********************************************************************************
+
+class Caso(object):
+    u"""
+    Um caso de medida: preparo() é chamado antes de cada repetição (fora da
+    medida) e retorna a função que é medida; ela faz 'chamadas' chamadas
+    do que está sendo medido. precisa_hs indica que o caso usa LK.H_S.
+    """
+
+    def __init__(self, nome, preparo, chamadas, precisa_hs=False):
+        self.nome = nome
+        self.preparo = preparo
+        self.chamadas = chamadas
+        self.precisa_hs = precisa_hs
+
+    def mede(self, repeticoes):
+        tempos = []
+        for r in range(repeticoes):
+            funcao = self.preparo()
+            t0 = time.time()
+            funcao()
+            tempos.append(time.time() - t0)
+        melhor = min(tempos)
+
+        # Os contadores são tomados numa execução a mais, instrumentada,
+        # para não pesarem no tempo medido...
+        funcao = self.preparo()
+        with INS.instrumentado() as reg:
+            funcao()
+        solucoes = (reg['robustNewton'] + reg['robustNewton_intervalo'] +
+                    reg['robustNewton_lote.sistemas'])
+        iteracoes = (reg['robustNewton.iteracoes'] + reg['robustNewton_intervalo.iteracoes'] +
+                     reg['robustNewton_lote.iteracoes'])
+        eos = (reg['Lee_Kesler.Z_lote.pontos'] + reg['Lee_Kesler.Z'] +
+               reg['WuStiel.keenan.pontos'])
+
+        return {'chamadas'    : self.chamadas,
+                'segundos'    : melhor,
+                'chamadas_s'  : self.chamadas/max(melhor, 1e-9),
+                'ite_solucao' : float(iteracoes)/solucoes if solucoes else None,
+                'eos_chamada' : float(eos)/self.chamadas,
+                'hs_chamada'  : float(reg['H_S'])/self.chamadas}
+
+
+def _repete(funcao, pontos):
+    def mede():
+        for p in pontos:
+            funcao(*p)
+    return lambda: mede
+
+
+def _processo(codigo):
+    u"Executa 'codigo' num interpretador novo, a partir deste diretório."
+    def executa():
+        subprocess.check_call([sys.executable, '-c', codigo], cwd=_DIR)
+    return lambda: executa
+
+def casos():
+    u"Lista dos casos de medida, na ordem em que são executados."
+    lk = LK.Lee_Kesler()
+    ws = LK.WuStiel()
+    wsi = LK.WuStiel()
+    wsi.intervalo = True
+    n = 200
+    Tr = linspace(0.7, 1.5, n)
+    Pr = linspace(0.01, 2.0, n)
+
+    # vr' do vapor (fluido simples) por Newton, escalar e como sistema de
+    # dois fluidos (vetorial), com e sem o jacobiano analítico...
+    def escalar(jacob):
+        def resolve(tr, pr):
+            sis = LK.newton_2(tr, pr, 0)
+            NR.robustNewton(sis.Z_, tr/pr, jacob=sis.dZ_ if jacob else None)
+        return resolve
+
+    def vetorial(jacob, broyden=False):
+        def resolve(tr, pr):
+            s0, s1 = LK.newton_2(tr, pr, 0), LK.newton_2(tr, pr, 1)
+            F = lambda x, args: array((s0.Z_(x[0]), s1.Z_(x[1])))
+            J = lambda x, args: array(((s0.dZ_(x[0]), 0.), (0., s1.dZ_(x[1]))))
+            NR.robustNewton(F, array((tr/pr, tr/pr)), jacob=J if jacob else None,
+                            broyden=broyden)
+        return resolve
+
+    pontos = zip(Tr, Pr)
+    lista = [
+        Caso('robustNewton escalar jacob', _repete(escalar(True), pontos), n),
+        Caso('robustNewton escalar dif.fin.', _repete(escalar(False), pontos), n),
+        Caso('robustNewton vetorial jacob', _repete(vetorial(True), pontos), n),
+        Caso('robustNewton vetorial dif.fin.', _repete(vetorial(False), pontos), n),
+        Caso('robustNewton vetorial broyden', _repete(vetorial(False, True), pontos), n),
+        # (lk.Z pela instância na hora da chamada, para que a versão
+        # instrumentada seja a contada)
+        Caso('Lee_Kesler.Z', _repete(lambda tr, vr, i: lk.Z(tr, vr, i),
+                                     [(tr, 2.0, i) for tr in Tr for i in (0, 1)]), 2*n),
+        Caso('WuStiel escalar', _repete(ws, [(1.0, tr + 0.5, pr) for tr, pr in pontos]), n),
+        Caso('WuStiel lote', _repete(ws, [(1.0, Tr + 0.5, Pr)]), n),
+        Caso('WuStiel escalar intervalo', _repete(wsi, [(1.0, tr + 0.5, pr) for tr, pr in pontos]), n),
+        Caso('LK.H_S', _repete(lambda tr, pr: LK.H_S(Tr=tr, Pr=pr, w=0.344),
+                               [(tr + 0.5, pr) for tr, pr in pontos]), n, True),
+        ]
+
+    # Funções de propriedades_agua: o cache de estados é esvaziado antes de
+    # cada repetição, para que cada chamada seja uma solução nova...
+    T = linspace(400., 1500., n)
+    for nome in ('v', 'h', 's', 'u'):
+        def preparo(f=getattr(PA, nome)):
+            PA._cache_estados.clear()
+            return lambda: [f(t, 1.0e6) for t in T]
+        lista.append(Caso('propriedades_agua.%s' %nome, preparo, n, True))
+
+    # Propriedades derivadas (cp, cv, velocidade do som, Joule-Thomson),
+    # ponto a ponto e em lote...
+    lista.append(Caso('propriedades_agua.derivadas',
+                      _repete(PA.derivadas, [(t, 1.0e6) for t in T]), n, True))
+    lista.append(Caso('propriedades_agua.derivadas lote',
+                      _repete(PA.derivadas, [(T, 1.0e6)]), n, True))
+    for perfil in ('rascunho', 'referencia'):
+        lista.append(Caso('propriedades_agua.derivadas lote %s' %perfil,
+                          _repete(PA.derivadas, [(T, 1.0e6, 'nada', perfil)]), n, True))
+
+    class Nula(object):
+        def escreve(self, linha):
+            pass
+        def fecha(self):
+            pass
+
+    # Grade de 7x3 ciclos de Rankine, com o cache vazio a cada repetição...
+    def preparo():
+        PA._cache_estados.clear()
+        return lambda: CR.varredura(linspace(2e6, 15e6, 7), 773.15,
+                                    [[7.5e3], [10e3], [20e3]], eta_turb=0.85)
+    lista.append(Caso('ciclo_rankine.varredura 7x3', preparo, 21, True))
+
+    g = gerador()
+    for tabela in ('sat_temp', 'sat_press', 'vapor', 'liq_compr'):
+        def preparo(tabela=tabela):
+            PA._cache_estados.clear()
+            return lambda: g.gera(tabela, [Nula()])
+        lista.append(Caso('tabela %s' %tabela, preparo, 1, True))
+
+    # Segunda geração da tabela de vapor, com o cache persistente já
+    # preenchido (a primeira, fora da medida)...
+    cache = CE.CacheEOS(os.path.join(tempfile.mkdtemp(), 'cache_eos.sqlite'))
+    def preparo():
+        def mede():
+            LK.usar_cache(cache)
+            try:
+                g.gera('vapor', [Nula()])
+            finally:
+                LK.usar_cache(None)
+        PA._cache_estados.clear()
+        if not len(cache):
+            mede()
+            PA._cache_estados.clear()
+        return mede
+    lista.append(Caso('tabela vapor (cache persistente)', preparo, 1, True))
+
+    # Partida de um processo novo, como a de um processo de trabalho ou de
+    # uma chamada curta pela linha de comando (o tempo inclui o do próprio
+    # interpretador)...
+    lista.append(Caso('partida importacao', _processo('import propriedades_agua'), 1))
+    lista.append(Caso('partida importacao + h',
+                      _processo('import propriedades_agua as PA; PA.h(500., 1.0e6)'), 1, True))
+    return lista
+
+
+#**********************************************************************************
+
+def executa(repeticoes=3, filtro=None, saida=sys.stdout):
+    u"""Mede os casos cujo nome contém 'filtro' (todos, se None) e retorna
+    o dicionário de resultados, pronto para ser gravado em JSON."""
+    resultados = {}
+    for caso in casos():
+        if filtro and filtro not in caso.nome:
+            continue
+        if caso.precisa_hs and not hasattr(LK, 'H_S'):
+            resultados[caso.nome] = None
+            saida.write('%-32s indisponível (LK.H_S não existe)\n' %caso.nome)
+            continue
+        r = caso.mede(repeticoes)
+        resultados[caso.nome] = r
+        saida.write('%-32s %12.1f chamadas/s  %6s ite/solucao  %8.1f eos/chamada  %8.1f H_S/chamada\n' %(
+                    caso.nome, r['chamadas_s'],
+                    '-' if r['ite_solucao'] is None else '%.2f' %r['ite_solucao'],
+                    r['eos_chamada'], r['hs_chamada']))
+    return {'plataforma' : platform.platform(),
+            'python'     : platform.python_version(),
+            'data'       : time.strftime('%Y-%m-%d %H:%M:%S'),
+            'repeticoes' : repeticoes,
+            'casos'      : resultados}
+
+def compara(atual, referencia, limite):
+    u"""Lista dos casos (nome, chamadas/s de referência, atual) que ficaram
+    mais lentos que a referência por mais que a fração 'limite'."""
+    lentos = []
+    for nome, ref in sorted(referencia['casos'].items()):
+        novo = atual['casos'].get(nome)
+        if ref is None or novo is None:
+            continue
+        if novo['chamadas_s'] < (1. - limite)*ref['chamadas_s']:
+            lentos.append((nome, ref['chamadas_s'], novo['chamadas_s']))
+    return lentos
+
+
+if __name__ == '__main__':
+    opcoes = argparse.ArgumentParser(description=u'Medidas de desempenho.')
+    opcoes.add_argument('--repeticoes', type=int, default=3)
+    opcoes.add_argument('--casos', default=None,
+                        help=u'mede só os casos cujo nome contém este texto')
+    opcoes.add_argument('--saida', default=None, help=u'grava os resultados em JSON')
+    opcoes.add_argument('--referencia', default=None, help=u'JSON de uma execução anterior')
+    opcoes.add_argument('--limite', type=float, default=0.2,
+                        help=u'perda relativa de chamadas/s tolerada (padrão 0.2)')
+    a = opcoes.parse_args()
+
+    atual = executa(a.repeticoes, a.casos)
+
+    if a.saida:
+        with open(a.saida, 'w') as f:
+            json.dump(atual, f, indent=1, sort_keys=True)
+
+    if a.referencia:
+        with open(a.referencia) as f:
+            lentos = compara(atual, json.load(f), a.limite)
+        for nome, ref, novo in lentos:
+            print '%s: %.1f -> %.1f chamadas/s (%+.0f%%)' %(nome, ref, novo, 100*(novo/ref - 1))
+        if lentos:
+            sys.exit(1)
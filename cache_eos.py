@@ -0,0 +1,108 @@
+# -*- coding:utf-8 -*-
+u"""
+        CACHE PERSISTENTE DAS SOLUÇÕES DA EQUAÇÃO DE ESTADO:
+As soluções de LK.H_S (os campos de LK.CAMPOS_HS) ficam gravadas num
+arquivo SQLite e são reaproveitadas entre execuções e entre processos:
+
+    import LK_WS_NR as LK, cache_eos
+    LK.usar_cache(cache_eos.CacheEOS('cache_eos.sqlite'))
+
+(ou propriedades_agua.usar_cache()). Uma segunda geração das mesmas
+tabelas quase não resolve a equação de estado.
+
+Chave: (Tr, Pr ou x, w), cada um arredondado a 'algarismos' algarismos
+significativos (os vazios, como Pr ou x ausentes, ficam em branco), e o
+nome do perfil de precisão ativo (robustNR_args.PERFIS). Versão:
+LK.versao_coeficientes() mais os parâmetros de todos os perfis; cada linha
+guarda a versão com que foi gravada e só as da versão atual são lidas, de
+modo que nunca se lê uma solução feita com outras constantes ou outras
+tolerâncias. As linhas de outras versões (coeficientes ou perfis mudados)
+ficam no arquivo, lado a lado, até que poda() seja chamado: processos de
+versões diferentes podem usar o mesmo arquivo, e voltar a uma versão
+anterior reaproveita as soluções dela.
+
+O arquivo é aberto em modo WAL: vários processos (os do Pool de _mapa, em
+trab.1-gerador_propriedades_agua.py, ou os de ciclo_rankine.varredura, por
+exemplo) leem e gravam o mesmo arquivo ao mesmo tempo, e a conexão é
+refeita no processo filho depois de um fork. Cada solução nova é
+gravada na hora, já que os processos de trabalho terminam sem atexit.
+"""
+
+import os
+import hashlib
+import LK_WS_NR as LK
+import robustNR_args as NR
+
+
+class CacheEOS(object):
+    u"""
+    Cache das soluções de LK.H_S no arquivo SQLite 'arquivo'. acertos e
+    faltas contam as consultas deste processo que estavam (ou não) no cache.
+    """
+
+    def __init__(self, arquivo, algarismos = 12):
+        self.arquivo = arquivo
+        self.algarismos = algarismos
+        perfis = repr(sorted([(nome, sorted(p.items())) for nome, p in NR.PERFIS.items()]))
+        self.versao = '%s %s' %(LK.versao_coeficientes(), hashlib.sha1(perfis).hexdigest())
+        self.acertos = 0
+        self.faltas = 0
+        self._conexao = None
+        self._pid = None
+
+    def _abre(self):
+        u"Conexão deste processo (uma nova depois de um fork)."
+        if self._pid != os.getpid():
+            import sqlite3  # só quando o cache é de fato usado
+            conexao = sqlite3.connect(self.arquivo, timeout = 30)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            conexao.execute('CREATE TABLE IF NOT EXISTS estados (versao TEXT, chave TEXT, %s, '
+                            'PRIMARY KEY (versao, chave))'
+                            %', '.join(['%s REAL' %campo for campo in LK.CAMPOS_HS]))
+            conexao.commit()
+            self._conexao, self._pid = conexao, os.getpid()
+        return self._conexao
+
+    def chave(self, Tr, Pr, x, w):
+        u"""Texto da chave de (Tr, Pr, x, w), com os valores arredondados, no
+        perfil de precisão ativo."""
+        return ' '.join(['' if valor is None else '%.*g' %(self.algarismos, valor)
+                         for valor in (Tr, Pr, x, w)] + [NR.nome_perfil()])
+
+    def busca(self, chave):
+        u"Tupla dos campos de LK.CAMPOS_HS gravada para 'chave', ou None."
+        linha = self._abre().execute('SELECT %s FROM estados WHERE versao = ? AND chave = ?'
+                                     %', '.join(LK.CAMPOS_HS), (self.versao, chave)).fetchone()
+        if linha is None:
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        return tuple([float('nan') if valor is None else valor for valor in linha])
+
+    def guarda(self, chave, valores):
+        u"Grava os valores (na ordem de LK.CAMPOS_HS) de uma solução nova."
+        conexao = self._abre()
+        conexao.execute('INSERT OR IGNORE INTO estados VALUES (?, ?, %s)'
+                        %', '.join(['?']*len(LK.CAMPOS_HS)), (self.versao, chave) + tuple(valores))
+        conexao.commit()
+
+    def limpa(self):
+        u"Apaga todas as soluções gravadas."
+        conexao = self._abre()
+        conexao.execute('DELETE FROM estados')
+        conexao.commit()
+
+    def poda(self):
+        u"""Apaga as soluções gravadas com outras versões (ver versao) e
+        retorna quantas foram apagadas."""
+        conexao = self._abre()
+        apagadas = conexao.execute('DELETE FROM estados WHERE versao != ?',
+                                   (self.versao,)).rowcount
+        conexao.commit()
+        return apagadas
+
+    def __len__(self):
+        u"Número de soluções gravadas com a versão atual."
+        return self._abre().execute('SELECT COUNT(*) FROM estados WHERE versao = ?',
+                                    (self.versao,)).fetchone()[0]
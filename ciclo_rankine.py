@@ -0,0 +1,183 @@
+# -*- coding:utf-8 -*-
+u"""
+        CICLO DE RANKINE:
+Avaliação de ciclos de Rankine (simples e com reaquecimento) sobre as
+propriedades de propriedades_agua.py, para grades inteiras de parâmetros
+de projeto numa só chamada:
+
+    bomba:        1 -> 2, líquido saturado a Pcond comprimido até Pcald;
+    caldeira:     2 -> 3, até Tsup a Pcald;
+    turbina:      3 -> 4, expansão até Pcond (ou até Preaq, com
+                  reaquecimento a Treaq e nova expansão até Pcond);
+    condensador:  4 -> 1.
+
+A bomba usa w = v1*(Pcald - Pcond)/eta_bomba e cada expansão tem eficiência
+isentrópica eta_turb: h_saida = h_ent - eta_turb*(h_ent - h_s), onde h_s é a
+entalpia a s constante na pressão de saída (por PA.flash_ps).
+
+Todos os pontos da grade são avaliados juntos: os estados saturados de cada
+pressão e os estados (T, P) ficam no cache de estados de propriedades_agua,
+compartilhado entre os pontos de projeto, e as expansões isentrópicas são
+resolvidas em lote. Com processos > 1 a grade, ordenada pela pressão do
+condensador, é dividida em pedaços entre vários processos (cada um com o
+seu cache), com resultados idênticos aos da execução serial.
+
+    r = varredura(Pcald = [4e6, 8e6, 12e6], Tsup = 773.15,
+                  Pcond = [[7.5e3], [10e3]], eta_turb = 0.85)
+    r.eta   # array (2,3) de eficiências térmicas
+
+Unidades: T em K, P em Pa, h e trabalhos em kJ/kg.
+"""
+
+from collections import namedtuple
+from multiprocessing import Pool
+from numpy import array,asarray,broadcast_arrays,argsort,empty,isnan,where
+import propriedades_agua as PA
+
+"""Resultados de varredura, cada um com a forma da grade:
+    eta    : eficiência térmica, w_liq/q_ent;
+    w_liq  : trabalho líquido (kJ/kg);
+    x      : título na saída da turbina (maior que 1 se o vapor sai
+             superaquecido);
+    q_ent  : calor fornecido na caldeira e no reaquecimento (kJ/kg);
+    w_turb : trabalho da turbina (kJ/kg);
+    w_bomba: trabalho da bomba (kJ/kg).
+   Pontos sem solução (Tsup ou Treaq abaixo da saturação, expansão fora da
+   faixa das propriedades) ficam com nan."""
+
+Ciclo = namedtuple('Ciclo', 'eta w_liq x q_ent w_turb w_bomba')
+
+
+def _saturados(P):
+    u"""Líquido e vapor saturados (h e, do líquido, v) em cada pressão de P,
+    uma solução por pressão distinta (pelo cache de estados)."""
+    hl, hv, vl = empty(P.shape), empty(P.shape), empty(P.shape)
+    for p in set(P):
+        sat = PA.saturacao(P = p)
+        m = P == p
+        hl[m], hv[m], vl[m] = sat.liq.h, sat.vap.h, sat.liq.v
+    return hl, hv, vl
+
+def _estados(T, P):
+    u"""h e s a (T, P) fora da saturação; nan se T não estiver acima da
+    temperatura de saturação (abaixo do ponto crítico)."""
+    h, s = empty(T.shape) + float('nan'), empty(T.shape) + float('nan')
+    for i in range(len(T)):
+        if isnan(T[i]) or (P[i] <= 22.08e6 and T[i] <= PA.saturacao(P = P[i]).Tsat):
+            continue
+        est = PA.estado(T[i], P[i])
+        h[i], s[i] = est.h, est.s
+    return h, s
+
+def _expansao(h_ent, s_ent, P, eta):
+    u"""Entalpia na saída de uma expansão até P, a partir de (h_ent, s_ent),
+    com eficiência isentrópica eta; todos os pontos num só flash."""
+    ok = ~isnan(s_ent)
+    hs = empty(P.shape) + float('nan')
+    if ok.any():
+        f = PA.flash_ps(P[ok], s_ent[ok])
+        h = empty(f.T.shape) + float('nan')
+        sat = f.fase == 'sat'
+        if sat.any():
+            hl, hv = _saturados(f.P[sat])[:2]
+            h[sat] = hl + f.x[sat]*(hv - hl)
+        for i in where(~sat & ~isnan(f.T))[0]:
+            h[i] = PA.h(f.T[i], f.P[i])
+        hs[ok] = h
+    return h_ent - eta*(h_ent - hs)
+
+def _avalia(parametros):
+    u"""Ciclo em cada ponto de arrays 1D (Pcald, Tsup, Pcond, eta_turb,
+    eta_bomba, Preaq, Treaq); Preaq = nan indica ciclo sem reaquecimento."""
+    Pcald, Tsup, Pcond, eta_t, eta_b, Preaq, Treaq = parametros
+
+    h1, hv_cond, v1 = _saturados(Pcond)
+    w_bomba = v1*(Pcald - Pcond)/1000./eta_b  # m3/kg * kPa
+    h2 = h1 + w_bomba
+
+    h3, s3 = _estados(Tsup, Pcald)
+    reaq = ~isnan(Preaq)
+
+    # Primeira expansão: até Preaq ou, sem reaquecimento, até Pcond...
+    h4 = _expansao(h3, s3, where(reaq, Preaq, Pcond), eta_t)
+    h5, s5 = _estados(where(reaq, Treaq, float('nan')), where(reaq, Preaq, Pcond))
+    h6 = h4.copy()
+    if reaq.any():
+        h6[reaq] = _expansao(h5[reaq], s5[reaq], Pcond[reaq], eta_t[reaq])
+
+    q_ent = h3 - h2 + where(reaq, h5 - h4, 0.)
+    w_turb = h3 - h4 + where(reaq, h5 - h6, 0.)
+    w_liq = w_turb - w_bomba
+    x = (h6 - h1)/(hv_cond - h1)
+    return array((w_liq/q_ent, w_liq, x, q_ent, w_turb, w_bomba))
+
+
+#**********************************************************************************
+
+def varredura(Pcald, Tsup, Pcond, eta_turb = 1., eta_bomba = 1., Preaq = None,
+              Treaq = None, processos = 1, pedaco = 64):
+    u"""
+    Avalia o ciclo em toda a grade formada (por broadcast do NumPy) pelos
+    parâmetros, escalares ou arrays: pressão da caldeira Pcald (Pa),
+    temperatura de saída da caldeira Tsup (K), pressão do condensador Pcond
+    (Pa), eficiências isentrópicas da turbina e da bomba e, para o ciclo com
+    reaquecimento, a pressão Preaq (Pa) e a temperatura Treaq (K) do
+    reaquecimento (nan, ou None em ambos, indica ciclo sem reaquecimento).
+    Retorna um Ciclo de arrays com a forma da grade (ou de números, se todos
+    os parâmetros forem escalares). processos > 1 divide a grade em pedaços
+    de 'pedaco' pontos entre vários processos.
+    """
+    if Preaq is None or Treaq is None:
+        Preaq = Treaq = float('nan')
+    grade = broadcast_arrays(*[asarray(p, dtype = float) for p in
+                               (Pcald, Tsup, Pcond, eta_turb, eta_bomba, Preaq, Treaq)])
+    forma = grade[0].shape
+    grade = [array(p).ravel() for p in grade]
+    n = len(grade[0])
+
+    # Pontos com a mesma pressão de condensador ficam no mesmo pedaço, para
+    # compartilhar os estados saturados...
+    ordem = argsort(grade[2], kind = 'mergesort')
+    pedacos = [[p[ordem[i:i+pedaco]] for p in grade] for i in range(0, n, pedaco)]
+
+    if processos <= 1 or len(pedacos) <= 1:
+        resultados = map(_avalia, pedacos)
+    else:
+        pool = Pool(processos)
+        try:
+            resultados = pool.map(_avalia, pedacos)
+        except:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        pool.join()
+
+    r = empty((len(Ciclo._fields), n))
+    for i, res in zip(range(0, n, pedaco), resultados):
+        r[:, ordem[i:i+pedaco]] = res
+
+    if forma == ():
+        return Ciclo(*r[:, 0])
+    return Ciclo(*[c.reshape(forma) for c in r])
+
+
+if __name__ == '__main__':  # exemplo de utilização...
+
+    from multiprocessing import cpu_count
+
+    Pcald = array([2., 4., 6., 8., 10., 12.5, 15.])*1e6
+    Pcond = array([[7.5e3], [10e3], [20e3]])
+
+    r = varredura(Pcald, 500. + 273.15, Pcond, eta_turb = 0.85, processos = cpu_count())
+    print 'Rankine, 500 C, eta_turb = 0.85: eficiência (título na saída da turbina)'
+    print 'Pcond (kPa)  ' + ''.join(['%14.1f' %(p/1e6) for p in Pcald]) + '  <- Pcald (MPa)'
+    for i, pc in enumerate(Pcond[:, 0]):
+        print '%11.1f  ' %(pc/1e3) + ''.join(['%7.4f (%.3f)' %(e, x)
+                                             for e, x in zip(r.eta[i], r.x[i])])
+
+    r = varredura(15e6, 600. + 273.15, 10e3, eta_turb = 0.85,
+                  Preaq = [1e6, 2e6, 4e6], Treaq = 600. + 273.15)
+    print '\nCom reaquecimento a 600 C: Preaq (MPa), eficiência, w_liq (kJ/kg), título'
+    for p, e, wl, x in zip([1, 2, 4], r.eta, r.w_liq, r.x):
+        print '%4.1f  %.4f  %8.1f  %.4f' %(p, e, wl, x)
@@ -0,0 +1,209 @@
+# -*- coding:utf-8 -*-
+u"""
+        INSTRUMENTAÇÃO DO CAMINHO QUENTE:
+Contadores e cronômetros opcionais para descobrir onde vai o tempo de uma
+tabela: soluções de Newton, avaliações da equação de estado, soluções de
+LK.H_S e tempo gasto em cada fase. Nada é instrumentado por padrão; dentro
+de um bloco
+
+    with instrumentado(gerador) as reg:
+        ...
+    print reg.resumo()
+
+as funções abaixo são trocadas por versões que contam e cronometram, e as
+originais voltam no final do bloco (fora dele o custo é zero). gerador é o
+módulo propriedades_agua (ou outro com as mesmas funções); sem ele só
+LK_WS_NR e robustNR_args são instrumentados. Os contadores valem para o
+processo atual: numa tabela dividida entre processos o trabalho dos outros
+processos não é contado.
+
+Contagens (reg.contagens):
+    robustNewton, robustNewton_lote, robustNewton_intervalo: chamadas, e
+        .iteracoes, .nao_convergiu, .fun e .jacob (avaliações da função e
+        do jacobiano fornecido);
+        robustNewton_lote.sistemas é o total de sistemas dos lotes;
+    Lee_Kesler.Z_lote, WuStiel, WuStiel.keenan: chamadas, e .pontos
+        (pontos avaliados, contando os dois fluidos de Lee-Kesler);
+    Lee_Kesler.Z, Lee_Kesler.dZdvr, Lee_Kesler.dZdTr: chamadas do caminho
+        escalar (um ponto cada, sem passar por Z_lote);
+    H_S: soluções de LK.H_S;
+    estado.pedidos, saturacao.pedidos: estados pedidos a propriedades_agua
+        (com o cache, são mais que as soluções).
+Tempos em segundos (reg.tempos, com o número de medidas em reg.medidas),
+cada um incluindo o tempo das funções que chama:
+    WuStiel, H_S;
+    propriedade.v, .h, .s, .u: funções v, h, s e u de propriedades_agua;
+    fase.comprimido, fase.superaquecido, fase.saturado: construção dos
+        estados de propriedades_agua; é comprimido o estado abaixo de Tc com Z menor
+        que o Z crítico de Lee-Kesler (0.2901 - 0.0879w), os demais contam
+        como superaquecidos.
+"""
+
+import time
+from contextlib import contextmanager
+from numpy import asarray,size
+import LK_WS_NR as LK
+import robustNR_args as NR
+
+
+class Registro(object):
+    u"Contagens e tempos acumulados por nome."
+
+    def __init__(self):
+        self.zera()
+
+    def zera(self):
+        self.contagens = {}
+        self.tempos = {}
+        self.medidas = {}
+
+    def conta(self, nome, n=1):
+        self.contagens[nome] = self.contagens.get(nome, 0) + n
+
+    def cronometra(self, nome, dt):
+        self.tempos[nome] = self.tempos.get(nome, 0.) + dt
+        self.medidas[nome] = self.medidas.get(nome, 0) + 1
+
+    def __getitem__(self, nome):
+        return self.contagens.get(nome, 0)
+
+    def resumo(self):
+        u"Texto com todas as contagens e tempos, em ordem alfabética."
+        linhas = ['%-32s %12s' %('contagem', 'total')]
+        for nome in sorted(self.contagens):
+            linhas.append('%-32s %12d' %(nome, self.contagens[nome]))
+        linhas.append('')
+        linhas.append('%-32s %12s %10s %12s' %('tempo', 'segundos', 'medidas', 'ms/medida'))
+        for nome in sorted(self.tempos):
+            t, n = self.tempos[nome], self.medidas[nome]
+            linhas.append('%-32s %12.3f %10d %12.4f' %(nome, t, n, 1000.*t/n))
+        return '\n'.join(linhas)
+
+
+#**********************************************************************************
+
+def _cronometrada(reg, nome, funcao):
+    def cronometrada(*args, **kwargs):
+        t0 = time.time()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            reg.cronometra(nome, time.time() - t0)
+    return cronometrada
+
+def _newton(reg, nome, original, lote, limite='nitermax'):
+    def contada(fun, x0, jacob=None, nitermax=None, *args, **kwargs):
+        if nitermax is None:
+            nitermax = NR.perfil()[limite]
+        def fun_(*a):
+            reg.conta(nome + '.fun')
+            return fun(*a)
+        jacob_ = None
+        if jacob is not None:
+            def jacob_(*a):
+                reg.conta(nome + '.jacob')
+                return jacob(*a)
+        r = original(fun_, x0, jacob_, nitermax, *args, **kwargs)
+        ite = asarray(r[1])
+        reg.conta(nome)
+        reg.conta(nome + '.iteracoes', int(ite.sum()))
+        reg.conta(nome + '.nao_convergiu', int((ite >= nitermax).sum()))
+        if lote:
+            reg.conta(nome + '.sistemas', ite.size)
+        return r
+    return contada
+
+@contextmanager
+def instrumentado(gerador=None, registro=None):
+    u"""Instrumenta LK_WS_NR, robustNR_args e, se dado, o módulo gerador
+    (propriedades_agua), enquanto durar o bloco with; retorna o Registro
+    (novo, se não for dado)."""
+    reg = Registro() if registro is None else registro
+    originais = []
+
+    def troca(dono, nome, nova):
+        originais.append((dono, nome, dono.__dict__[nome]))
+        setattr(dono, nome, nova)
+
+    # LK_WS_NR importa as funções de Newton pelo nome: elas são trocadas lá
+    # e no próprio robustNR_args...
+    for dono in (LK, NR):
+        troca(dono, 'robustNewton', _newton(reg, 'robustNewton', NR.robustNewton, False))
+        troca(dono, 'robustNewton_lote',
+              _newton(reg, 'robustNewton_lote', NR.robustNewton_lote, True))
+        troca(dono, 'robustNewton_intervalo',
+              _newton(reg, 'robustNewton_intervalo', NR.robustNewton_intervalo, False,
+                      'nitermax_intervalo'))
+
+    Z_lote = LK.Lee_Kesler.__dict__['Z_lote']
+    def Z_lote_(self, Tr, vr, id=None):
+        r = Z_lote(self, Tr, vr, id)
+        reg.conta('Lee_Kesler.Z_lote')
+        reg.conta('Lee_Kesler.Z_lote.pontos', size(r))
+        return r
+    troca(LK.Lee_Kesler, 'Z_lote', Z_lote_)
+
+    def escalar(nome):
+        original = LK.Lee_Kesler.__dict__[nome]
+        def escalar_(self, Tr, vr, id):
+            reg.conta('Lee_Kesler.' + nome)
+            return original(self, Tr, vr, id)
+        troca(LK.Lee_Kesler, nome, escalar_)
+    for nome in ('Z', 'dZdvr', 'dZdTr'):
+        escalar(nome)
+
+    keenan = LK.WuStiel.__dict__['keenan']
+    def keenan_(self, rw, t, d2=False, dt=False):
+        r = keenan(self, rw, t, d2, dt)
+        reg.conta('WuStiel.keenan')
+        reg.conta('WuStiel.keenan.pontos', size(r[0]))
+        return r
+    troca(LK.WuStiel, 'keenan', keenan_)
+
+    chamada = _cronometrada(reg, 'WuStiel', LK.WuStiel.__dict__['__call__'])
+    def chamada_(self, Z, Tr, Pr, tol=None, chute=None):
+        reg.conta('WuStiel')
+        reg.conta('WuStiel.pontos', size(Z + 0.*asarray(Tr) + 0.*asarray(Pr)))
+        return chamada(self, Z, Tr, Pr, tol, chute)
+    troca(LK.WuStiel, '__call__', chamada_)
+
+    if hasattr(LK, 'H_S'):
+        H_S = _cronometrada(reg, 'H_S', LK.H_S)
+        def H_S_(*args, **kwargs):
+            reg.conta('H_S')
+            return H_S(*args, **kwargs)
+        troca(LK, 'H_S', H_S_)
+
+    if gerador is not None:
+        g = gerador
+        for nome in ('v', 'h', 's', 'u'):
+            troca(g, nome, _cronometrada(reg, 'propriedade.' + nome, getattr(g, nome)))
+
+        def pedido(nome, original):
+            def pedido_(*args, **kwargs):
+                reg.conta(nome + '.pedidos')
+                return original(*args, **kwargs)
+            return pedido_
+        for nome in ('estado', 'saturacao'):
+            troca(g, nome, pedido(nome, getattr(g, nome)))
+
+        # A fase é decidida pela própria solução, sem outras soluções de
+        # LK.H_S: líquido abaixo de Tc e do Z crítico de Lee-Kesler...
+        Estado = g.Estado
+        Zc = 0.2901 - 0.0879*g.w
+        def Estado_(T, P):
+            t0 = time.time()
+            e = Estado(T, P)
+            dt = time.time() - t0
+            comprimido = T < g.Tc and e.Z < Zc
+            reg.cronometra('fase.comprimido' if comprimido else 'fase.superaquecido', dt)
+            return e
+        troca(g, 'Estado', Estado_)
+        troca(g, 'EstadoSat', _cronometrada(reg, 'fase.saturado', g.EstadoSat))
+
+    try:
+        yield reg
+    finally:
+        while originais:
+            dono, nome, original = originais.pop()
+            setattr(dono, nome, original)
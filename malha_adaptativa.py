@@ -0,0 +1,109 @@
+# -*- coding:utf-8 -*-
+u"""
+        MALHAS ADAPTATIVAS:
+Escolha dos pontos de uma tabela unidimensional (uma isobara, a linha de
+saturação) pelo erro da interpolação linear entre linhas vizinhas, em vez
+de um espaçamento fixo. f(x) retorna o vetor das propriedades da linha em x
+(por exemplo v, h e s); o erro de um intervalo é o maior erro relativo, em
+todas as propriedades, de interpolar linearmente o ponto médio a partir dos
+extremos:
+    erro = max |f(xm) - (f(a) + f(b))/2| / max(|f(xm)|, escala)
+    o erro é relativo ao valor no próprio ponto: o volume do vapor
+        saturado, que cai de 206 m3/kg no ponto triplo a 0.003 m3/kg no
+        ponto crítico, é refinado perto do ponto crítico como em qualquer
+        outro trecho. escala (opcional, por propriedade) é só um piso para
+        as propriedades com zero arbitrário (h, s e u), que passam por
+        zero ou perto dele;
+    refinamento: cada intervalo com erro > tol é dividido ao meio, até que
+        todos fiquem abaixo de tol (ou até dxmin ou nmax avaliações); o
+        ponto médio calculado no teste já é um ponto da tabela;
+    junção: depois, com os pontos já calculados, os intervalos vizinhos são
+        juntados enquanto a interpolação entre os extremos da junção
+        reproduz, dentro de tol, todos os pontos calculados entre eles.
+Assim os trechos íngremes (perto do ponto crítico, por exemplo) ficam com
+mais linhas e os trechos planos com menos, para a mesma precisão.
+"""
+
+from collections import namedtuple
+from numpy import array,asarray,abs,maximum
+
+Malha = namedtuple('Malha', 'x y avaliacoes')
+
+
+def _erro(y, ya, yb, xa, xb, x, escala):
+    u"Erro relativo de interpolar y (em x) entre (xa, ya) e (xb, yb)."
+    yi = ya + (yb - ya)*(x - xa)/(xb - xa)
+    return (abs(y - yi)/maximum(abs(y), escala)).max()
+
+def refina(f, x0, tol = 1e-3, escala = None, dxmin = None, nmax = 1000):
+    u"""
+    Pontos x (em ordem crescente) e valores y = f(x) de uma malha adaptativa
+    que começa nos nós x0 (ao menos 2, em ordem crescente) e é refinada e
+    depois juntada como descrito acima; retorna Malha(x, y, avaliacoes),
+    com y de forma (len(x), m) e o número de avaliações de f.
+    escala: piso (por propriedade, ou um só número) do denominador do erro
+            relativo, para propriedades que passam perto de zero; por padrão
+            nenhum (erro relativo ao valor em cada ponto).
+    dxmin: menor intervalo que ainda é dividido (padrão: 1e-4 do total).
+    nmax: número máximo de avaliações de f.
+    """
+    x = [float(xi) for xi in x0]
+    y = [asarray(f(xi), dtype = float) for xi in x]
+    avaliacoes = len(x)
+    if escala is None:
+        escala = 0.
+    escala = maximum(asarray(escala, dtype = float), 1e-300)
+    if dxmin is None:
+        dxmin = 1e-4*(x[-1] - x[0])
+
+    # Refinamento: intervalos [x[i], x[i+1]] testados da esquerda para a
+    # direita; um intervalo dividido é testado de novo na metade esquerda...
+    i = 0
+    while i < len(x) - 1:
+        a, b = x[i], x[i+1]
+        if b - a <= dxmin or avaliacoes >= nmax:
+            i += 1
+            continue
+        xm = .5*(a + b)
+        ym = asarray(f(xm), dtype = float)
+        avaliacoes += 1
+        x.insert(i + 1, xm)
+        y.insert(i + 1, ym)
+        if _erro(ym, y[i], y[i+2], a, b, xm, escala) <= tol:
+            i += 2
+
+    # Junção: do ponto âncora, a linha seguinte é a mais distante que ainda
+    # interpola todos os pontos intermediários dentro de tol...
+    manter = [0]
+    j = 1
+    while j < len(x):
+        ancora = manter[-1]
+        k = j
+        while k + 1 < len(x) and all([_erro(y[m], y[ancora], y[k+1], x[ancora], x[k+1], x[m],
+                                            escala) <= tol for m in range(ancora + 1, k + 1)]):
+            k += 1
+        manter.append(k)
+        j = k + 1
+
+    return Malha(array([x[m] for m in manter]), array([y[m] for m in manter]), avaliacoes)
+
+
+if __name__ == '__main__':  # verificação, com uma curva de saturação modelo...
+    from numpy import exp,linspace,diff,median
+
+    # volume do vapor saturado: cai de ~60000 vc no ponto triplo a vc no
+    # ponto crítico (Tc, vc), com o expoente crítico 0.35 (a derivada em T
+    # diverge em Tc)...
+    Tc, vc = 647.3, 0.00317
+    def v_vap(T):
+        tau = max(1. - T/Tc, 0.)
+        return (vc*exp(12.*(Tc/T - 1.))*(1. + tau**0.35),)
+
+    malha = refina(v_vap, linspace(273.16, Tc, 9), 1e-3)
+    dx = diff(malha.x)
+    perto = (malha.x > Tc - 1.).sum()
+    print '%d linhas (%d avaliações); espaçamento mediano %.3g K, %.3g K antes de Tc;' \
+          ' %d linhas no último 1 K' %(len(malha.x), malha.avaliacoes, median(dx), dx[-1], perto)
+    # com um piso fixo de 1% do maior volume (o antigo padrão de escala), o
+    # último intervalo tinha 199 K e só o próprio Tc ficava no último 1 K...
+    assert dx[-1] < 0.1*median(dx) and perto >= 3, 'a malha nao se concentra perto de Tc'
@@ -0,0 +1,689 @@
+# -*- coding: utf-8 -*-
+
+# Autores: Róbinson Erazo e Agmar Pereira
+# RAs: 200711491 e 200712331
+# Contato: robinson.erazo@hotmail.com ou agmar_filho@hotmail.com
+
+"""Propriedades termodinâmicas da água (v, u, h e s) nas regiões saturadas
+   e fora da saturação, pela equação de estado generalizada de Lee-Kesler
+   e relações entre as propriedades termodinâmicas. É a biblioteca usada
+   pelo programa gerador de tabelas (trab.1-gerador_propriedades_agua.py),
+   e pode ser importada sozinha: a importação não imprime nada, não grava
+   nada e não resolve nenhum estado. As soluções, a curva de saturação
+   (gravada em disco na primeira vez) e o estado de referência só são
+   calculados quando uma propriedade é pedida.
+
+       import propriedades_agua as PA
+       PA.h(500., 1.0e6)               # kJ/kg, vapor a 500 K e 1 MPa
+       PA.s(373.15, Fase_sat = 'vap')  # kJ/kg.K, vapor saturado a 100 °C"""
+
+from math import log
+import os
+from collections import namedtuple
+import LK_WS_NR as LK
+import robustNR_args as NR
+from robustNR_args import PERFIS,precisao,usar_perfil
+import saturacao as SAT
+import tabela_interp as TAB
+from numpy import array,arange,asarray,broadcast_arrays,zeros,where
+from numpy import maximum,minimum,nonzero,sqrt,isnan,ndim
+
+
+"Constantes importantes da água e companhia."
+
+Tc = 647.3    # Kelvin
+Pc = 22.09 * pow(10,6) #Pa
+Ttri = 273.16 # Kelvin
+Ptri = 0.6113 * pow(10,3) #Pa
+MM = 18.015 # g/mol massa molecular
+w = 0.344   # Fator acêntrico da água
+R = 8.3145 #Constante universal dos gases em J/K.mol  
+
+#Coeficientes do calor específico de gás ideal, Cp(T) = cp0 + cp1*T + cp2*T^2 + cp3*T^3
+CP = ( 3.224 * pow(10, 1),
+       1.924 * pow(10,-3),
+       1.055 * pow(10,-5),
+      -3.596 * pow(10,-9))
+
+
+
+"--------- FUNÇÕES QUE CALCULAM AS PROPRIEDADES TERMODINÂMICAS --------------"
+
+
+"Calor específico de gás ideal Cp(T), o integrando de Scp."
+
+def Cp_ideal(T): # J/mol.K
+
+    cp0, cp1, cp2, cp3 = CP
+
+    return cp0 + T*(cp1 + T*(cp2 + T*cp3))
+
+"Calcula a antidiferencial de Cp(T) para calcularmos integral SCp(T)dT."
+
+def Scp(T): # Cp(T) é dado em J/mol.K
+
+    cp0, cp1, cp2, cp3 = CP
+
+    return cp0*T + cp1*pow(T,2)/2  +  cp2*pow(T,3)/3  +  cp3*pow(T,4)/4    
+
+
+
+
+'---------------------------------------------------------------------------'
+
+"Calcula a antidiferencial de Cp(T)/T para calcularmos SCp(T)/TdT."
+
+def Scp_per_T(T):
+
+    cp0, cp1, cp2, cp3 = CP
+
+    return cp0*log(T) + cp1*pow(T,1)  +  cp2*pow(T,2)/2  +  cp3*pow(T,3)/3   
+
+
+
+
+'----------------------------------------------------------------------------'
+
+"""Estado de referência: desvios de entalpia e entropia do líquido no ponto
+   triplo. São constantes para o fluido, então são calculados uma única vez
+   por processo e perfil de precisão e guardados num dicionário indexado
+   por (Tc, Pc, w, perfil), como os estados: h e s de um perfil usam a
+   referência resolvida no mesmo perfil."""
+
+_ref_tri = {}
+
+def ref_tri(Tc = Tc , Pc = Pc , w = w):
+
+    """Retorna um dicionário com os desvios no ponto triplo:
+       'h' e 's' -> líquido comprimido a (Ttri, Ptri);
+       'hl' e 'sl' -> líquido saturado a Ttri;
+       'vtri' -> volume específico do líquido saturado a Ttri (m3/kg)."""
+
+    chave = (Tc, Pc, w, NR.nome_perfil())
+
+    if chave not in _ref_tri:
+
+        comp = LK.resolve(Tr = Ttri/Tc , Pr = Ptri/Pc , w = w)
+        sat = LK.resolve(Tr = Ttri/Tc , x = 0.5 , w = w)
+
+        Psat = sat.Pr * Pc #Pa
+        vtri = (sat.Zl*R*Ttri) * 1000 / (MM * Psat) #m3/kg
+
+        _ref_tri[chave] = {'h' : comp.h , 's' : comp.s ,
+                           'hl' : sat.hl , 'sl' : sat.sl ,
+                           'vtri' : vtri}
+
+    return _ref_tri[chave]
+
+
+
+
+'----------------------------------------------------------------------------'
+
+"""Estados termodinâmicos: cada objeto é construído a partir de UMA única
+   solução de LK.H_S e fornece todas as propriedades (v, u, h, s) sob
+   demanda. As funções v, h, s e u mais abaixo, assim como as tabelas, são
+   montadas sobre esses objetos. Eles guardam só o necessário, em
+   __slots__: a solução vem de LK.resolve (um LK.EstadoHS), e não do
+   dicionário prop de LK.H_S."""
+
+class Fase(object):
+
+    """Propriedades de uma fase no estado (T, P), obtidas do fator de
+       compressibilidade Z e dos desvios de entalpia Dh e de entropia Ds
+       calculados por LK.H_S. ref_h e ref_s indicam quais desvios do ponto
+       triplo (ver ref_tri) são usados como referência."""
+
+    __slots__ = ('T', 'P', 'Z', 'Dh', 'Ds', 'ref_h', 'ref_s')
+
+    def __init__(self, T, P, Z, Dh, Ds, ref_h, ref_s):
+
+        self.T = T   # K
+        self.P = P   # Pa
+        self.Z = Z
+        self.Dh = Dh
+        self.Ds = Ds
+        self.ref_h = ref_h
+        self.ref_s = ref_s
+
+    @property
+    def v(self):
+
+        """O volume específico é determinado pelo fator de compressibilidade
+           Z da água em um determinado estado. Com Z, usamos ele na equação
+           de estado do gás ideal pv = RT ."""
+
+        return (self.Z*R*self.T) * 1000 / (MM * self.P) #m3/kg
+
+    @property
+    def h(self):
+
+        """Pelo princípio de igualdade de variação de entalpia de bases
+           diferentes, pode se calcular a entalpia da água para qualquer
+           temperatura e pressão, lembrando que a referência para essa en-
+           talpia é o líquido saturado no ponto triplo da água, arbitra-
+           riamente estabelecido como zero. Também se percebe que é ne-
+           cessário dimensionalizar os desvios pelo termo R*Tc."""
+
+        Dh_tri = ref_tri()[self.ref_h]
+        SCpdt = Scp(self.T)-Scp(Ttri) #Integral
+
+        h = (Dh_tri - self.Dh) * R * Tc + SCpdt #J/mol
+        return h / MM # J/g ou kJ/kg
+
+    @property
+    def s(self):
+
+        """Pelas princípio de igualdade de variação de entropia de bases
+           diferentes, pode se calcular a entropia da água para qualquer
+           temperatura e pressão, lembrando que a referência para a  en-
+           tropia é valor no líquido saturado do ponto triplo da água,
+           arbitrariamente estabelecido como zero."""
+
+        Ds_tri = ref_tri()[self.ref_s]
+        SCpTdt = Scp_per_T(self.T) - Scp_per_T(Ttri)
+
+        s  = (Ds_tri - self.Ds) * R + ( SCpTdt ) -  R * log(self.P/Ptri) #J/K.mol
+        return s / MM # J/g.K ou kJ/kg.K
+
+    @property
+    def u(self):
+
+        """Para calcular energia interna usamos a definição de entalpia
+           H = U + PV, no caso, usando como referência o líquido saturado
+           no ponto triplo da água, onde a s, h e u são zero. Assim, a e-
+           nergia interna específica é calculada por
+           u(T,P)=h(T,P)-(P*v(T,P)-Ptri*vtri)."""
+
+        vtri = ref_tri()['vtri'] #Vol. específico do líq. m3/kg
+
+        u = 1000 * self.h - (self.P * self.v - Ptri*vtri) #J/kg
+        return u / 1000 #kJ/kg
+
+
+
+
+class Estado(Fase):
+
+    """Líquido comprimido ou vapor superaquecido a T (K) e P (Pa)."""
+
+    __slots__ = ()
+
+    def __init__(self, T, P):
+
+        res = LK.resolve(Tr = T/Tc , Pr = P/Pc , w = w)
+
+        Fase.__init__(self, T, P, res.Z, res.h, res.s, 'h', 's')
+
+
+
+
+class EstadoSat(object):
+
+    """Mistura líquido-vapor saturada, dada a temperatura T (K) ou a pressão
+       P (Pa). Uma única solução de LK.H_S fornece Tsat, Psat e as duas fases,
+       acessíveis por .liq e .vap (ou por fase('liq') e fase('vap'))."""
+
+    __slots__ = ('Tsat', 'Psat', 'prop', '_fases')
+
+    def __init__(self, T = None, P = None):
+
+        if T is not None:
+            prop = LK.resolve(Tr = T/Tc , x = 0.5 , w = w)
+            self.Tsat = T
+            self.Psat = prop.Pr * Pc #Pa
+        else:
+            prop = LK.resolve(Pr = P/Pc , x = 0.5 , w = w)
+            self.Tsat = prop.Tr * Tc #K
+            self.Psat = P
+
+        self.prop = prop #LK.EstadoHS
+        self._fases = {}
+
+    def fase(self, Fase_sat):
+
+        "Retorna a Fase 'liq' ou 'vap', criada só quando for pedida."
+
+        if Fase_sat not in self._fases:
+            sufixo = {'liq' : 'l' , 'vap' : 'v'}[Fase_sat]
+            self._fases[Fase_sat] = Fase(self.Tsat, self.Psat,
+                                         self.prop['Z' + sufixo],
+                                         self.prop['h' + sufixo],
+                                         self.prop['s' + sufixo], 'hl', 'sl')
+        return self._fases[Fase_sat]
+
+    liq = property(lambda self: self.fase('liq'))
+    vap = property(lambda self: self.fase('vap'))
+
+
+
+
+"""Os estados já resolvidos ficam guardados, assim cada ponto (T, P) ou
+   (T, fase) distinto é resolvido uma única vez, mesmo que se peça v, u, h
+   e s separadamente. O cache é esvaziado quando passa de _MAX_CACHE."""
+
+_MAX_CACHE = 4096
+_cache_estados = {}
+
+def _guarda(chave, construtor, *args, **kwargs):
+
+    if chave not in _cache_estados:
+        if len(_cache_estados) >= _MAX_CACHE:
+            _cache_estados.clear()
+        _cache_estados[chave] = construtor(*args, **kwargs)
+    return _cache_estados[chave]
+
+def estado(T , P):
+
+    "Estado fora da saturação a T (K) e P (Pa)."
+
+    return _guarda(('TP', T, P, NR.nome_perfil()), Estado, T, P)
+
+def saturacao(T = None , P = None):
+
+    "Estado saturado dada a temperatura T (K) ou a pressão P (Pa)."
+
+    if T is not None:
+        return _guarda(('T', T, NR.nome_perfil()), EstadoSat, T = T)
+    return _guarda(('P', P, NR.nome_perfil()), EstadoSat, P = P)
+
+def _fase( T , P , Fase_sat ):
+
+    if Fase_sat == 'nada':
+        return estado(T, P)
+    return saturacao(T = T).fase(Fase_sat)
+
+
+
+
+"""Pressão e temperatura de saturação pelos aproximantes de saturacao.py,
+   do ponto triplo ao ponto crítico, sem nenhuma solução de LK.H_S depois
+   que a curva é construída (ou lida do disco). A curva é construída no
+   modo quase crítico de saturacao.py (continuação com orçamento de ite-
+   rações por ponto) até 374.13 °C e fechada daí até (Tc, Pc). O fecha-
+   mento é só uma interpolação, não um resultado do modelo: nesse trecho
+   (T acima de 374.13 °C, ou P acima da Psat dessa temperatura) Psat e
+   Tsat retornam nan, a não ser com fechamento = True. polir = True usa a
+   solução completa."""
+
+def curva_sat():
+
+    with precisao('engenharia'): # a curva gravada em disco não depende do perfil
+        return SAT.curva(w, Ttri/Tc, (374.13 + 273.15)/Tc, critico = True)
+
+def _sem_fechamento( y , fora , fechamento ):
+
+    "y, com nan onde fora (no trecho de fechamento), se não fechamento."
+
+    if fechamento or not fora.any():
+        return y
+    if ndim(y) == 0:
+        return float('nan')
+    return where(fora, float('nan'), y)
+
+def Psat( T , polir = False , fechamento = False ):
+
+    "Pressão de saturação (Pa) à temperatura T (K)."
+
+    curva = curva_sat()
+    return _sem_fechamento(curva.Pr(T/Tc, polir) * Pc,
+                           curva.fechamento(T/Tc) & (not polir), fechamento)
+
+def Tsat( P , polir = False , fechamento = False ):
+
+    "Temperatura de saturação (K) à pressão P (Pa)."
+
+    curva = curva_sat()
+    return _sem_fechamento(curva.Tr(P/Pc, polir) * Tc,
+                           curva.fechamento(Pr = P/Pc) & (not polir), fechamento)
+
+
+
+
+"""Propriedades tabeladas (tabela_interp.py): com usar_tabela(nivel), as
+   funções v, h, s e u fora da saturação passam a ser lidas por interpolação
+   bicúbica de malhas gravadas em disco, em vez de resolver LK.H_S. As malhas
+   cobrem do ponto triplo a 60 MPa e 1300 °C e são construídas na primeira
+   vez que um nível ('baixa', 'media' ou 'alta') é pedido (ou de novo, se
+   os coeficientes de LK_WS_NR ou o perfil 'engenharia' mudaram). Fora da
+   malha as propriedades são as da equação de estado. usar_eos() volta às
+   soluções da equação de estado."""
+
+_tabela = [None]
+
+def usar_tabela( nivel = 'media' , diretorio = None ):
+
+    if diretorio is None:
+        diretorio = os.path.dirname(os.path.abspath(__file__))
+
+    with precisao('engenharia'): # as malhas gravadas em disco também não
+        _tabela[0] = TAB.abre(diretorio, nivel, Tsat,
+                              estado = estado ,
+                              saturado = lambda P: saturacao(P = P) ,
+                              Pmin = Ptri , Pmax = 60.0e6 ,
+                              Tmin = Ttri , Tmax = 1300 + 273.15 ,
+                              Pmax_sat = Psat(374.13 + 273.15) ,
+                              modelo = '%s %r' %(LK.versao_coeficientes(),
+                                                 sorted(PERFIS['engenharia'].items())))
+    return _tabela[0]
+
+def _tabelado( nome , T , P ):
+
+    "Propriedade interpolada nas malhas; fora delas (nan), a da equação de estado."
+
+    y = _tabela[0](nome, T, P)
+    fora = isnan(y)
+    if not fora.any():
+        return y
+    if ndim(y) == 0:
+        return getattr(estado(T, P), nome)
+    T, P = broadcast_arrays(asarray(T, dtype = float), asarray(P, dtype = float))
+    y[fora] = [getattr(estado(t, p), nome) for t, p in zip(T[fora], P[fora])]
+    return y
+
+def usar_eos():
+
+    _tabela[0] = None
+
+
+"""Cache persistente (cache_eos.py): com usar_cache(), as soluções de LK.H_S
+   ficam gravadas num arquivo SQLite (por padrão cache_eos.sqlite, ao lado
+   deste módulo) e são reaproveitadas pelas execuções seguintes e pelos
+   outros processos. usar_cache(None) desliga o cache."""
+
+def usar_cache( arquivo = '' ):
+
+    if arquivo is None:
+        LK.usar_cache(None)
+        return None
+
+    import cache_eos
+    if not arquivo:
+        arquivo = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache_eos.sqlite')
+    cache = cache_eos.CacheEOS(arquivo)
+    LK.usar_cache(cache)
+    return cache
+
+"""Perfis de precisão (robustNR_args.PERFIS): 'rascunho', 'engenharia' (o
+   padrão) e 'referencia' dão a tolerância, o limite de iterações e o passo
+   das diferenças finitas de todas as soluções de Newton (LK.H_S, newton_2,
+   WuStiel e robustNewton). O perfil vale para o processo (usar_perfil),
+   para um bloco with (precisao) ou para uma chamada (o argumento perfil
+   das funções abaixo). Os estados guardados são separados por perfil; as
+   tabelas de usar_tabela e a curva de saturação são sempre as do perfil
+   'engenharia'."""
+
+def _propriedade( nome , T , P , Fase_sat , perfil = None ):
+
+    if perfil is not None:
+        with precisao(perfil):
+            return _propriedade(nome, T, P, Fase_sat)
+    if Fase_sat == 'nada' and _tabela[0] is not None:
+        return _tabelado(nome, T, P)
+    return getattr(_fase(T, P, Fase_sat), nome)
+
+
+
+
+'----------------------------------------------------------------------------'
+
+"Função que calcula volume específico da água"
+
+def v( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ): 
+
+    return _propriedade('v', T, P, Fase_sat, perfil)
+
+
+
+
+'----------------------------------------------------------------------------'
+
+"""Função que calcula ENTALPIA da água na saturação, quando é líquido
+   comprimido ou vapor superaquecido. Deve ser especificada a fase no
+   caso de região saturada."""
+
+def h( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ): 
+
+    return _propriedade('h', T, P, Fase_sat, perfil)
+
+
+
+
+"-----------------------------------------------------------------------------"
+
+"""Função que calcula ENTROPIA da água na saturação, quando é líquido
+   comprimido ou vapor superaquecido. Deve ser especificada a fase no
+   caso de região saturada."""
+
+def s( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ): 
+
+    return _propriedade('s', T, P, Fase_sat, perfil)
+
+
+
+
+"------------------------------------------------------------------------------"
+
+"""Função que calcula ENERGIA INTERNA da água na saturação, quando é líquido
+   comprimido ou vapor superaquecido. Deve ser especificada a fase no
+   caso de região saturada."""
+
+def u( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ): 
+
+    return _propriedade('u', T, P, Fase_sat, perfil)
+
+
+
+"------------------------------------------------------------------------------"
+
+"""FLASHES: temperatura e título dados a pressão e a entalpia (flash_ph) ou
+   a pressão e a entropia (flash_ps). A fase é decidida primeiro pelas pro-
+   priedades saturadas à pressão P (que ficam no cache de estados): dentro
+   da saturação o resultado é o título, sem nenhuma outra solução; fora
+   dela T é obtida por Newton (derivada por diferença finita no primeiro
+   passo e pela secante nos seguintes), salvaguardado por bisseção no
+   intervalo de T da fase, já que h e s crescem com T: do ponto triplo a
+   Tsat no líquido, de Tsat a 1300 °C no vapor e do ponto triplo a 1300 °C
+   acima de 22.08 MPa. P e h (ou s) podem ser arrays: todos os pontos são
+   resolvidos juntos, em lote (com usar_tabela, cada passo do lote é uma
+   só interpolação).
+
+   Flash: T (K), P (Pa), x (título, nan fora da saturação) e fase ('liq',
+          'sat', 'vap' ou 'sup', acima de 22.08 MPa). T é nan quando h (ou
+          s) está fora da faixa de temperaturas da fase. Entre 22.08 MPa
+          e Pc, onde a saturação não é traçada (o trecho de fechamento de
+          Psat e Tsat), T é obtida como em 'sup', mas a fase fica 'fech':
+          não se sabe se o ponto está dentro da saturação."""
+
+Flash = namedtuple('Flash', 'T P x fase')
+
+_CP_FASE = {'liq' : 4.2 , 'vap' : 2.1} # kJ/kg.K, só para o primeiro chute
+
+def _lote( nome , T , P ):
+
+    "Propriedade nome ('v', 'h', 's' ou 'u') fora da saturação, em arrays."
+
+    if _tabela[0] is not None:
+        return _tabelado(nome, T, P)
+    return array([getattr(estado(t, p), nome) for t, p in zip(T, P)])
+
+def _inverte_T( nome , y , P , a , b , T , tol = None , nitermax = None ):
+
+    """T (K) tal que nome(T, P) = y em cada ponto, com a raiz entre a e b.
+       tol e nitermax None: os do perfil de precisão (xtol e, como em
+       robustNewton_intervalo, nitermax_intervalo)."""
+
+    if tol is None:
+        tol = NR.perfil()['xtol']
+    if nitermax is None:
+        nitermax = NR.perfil()['nitermax_intervalo']
+
+    a0, b0 = a.copy(), b.copy()
+    F = _lote(nome, T, P) - y
+    dF = (_lote(nome, T*(1 + 1e-6), P) - y - F)/(T*1e-6)
+    ativos = arange(len(T))
+
+    for ite in range(nitermax):
+
+        Ta, Fa, dFa = T[ativos], F[ativos], dF[ativos]
+
+        #A raiz fica entre o último T com F < 0 e o último com F > 0
+        b[ativos] = where(Fa > 0, Ta, b[ativos])
+        a[ativos] = where(Fa > 0, a[ativos], Ta)
+        aa, ba = a[ativos], b[ativos]
+
+        #Passo de Newton, ou bisseção se ele sair do intervalo
+        Tn = Ta - Fa/where(dFa > 0, dFa, 1.)
+        Tn = where((dFa > 0) & (Tn > aa) & (Tn < ba), Tn, .5*(aa + ba))
+
+        Fn = _lote(nome, Tn, P[ativos]) - y[ativos]
+        passo = Tn - Ta
+        dF[ativos] = where(passo != 0, (Fn - Fa)/where(passo != 0, passo, 1.), dFa)
+        T[ativos], F[ativos] = Tn, Fn
+
+        pronto = (abs(passo) <= tol*Tn) | (Fn == 0) | (ba - aa <= tol*Tn)
+        ativos = ativos[~pronto]
+        if not ativos.size:
+            break
+
+    #Raiz presa num extremo do intervalo: y fora da faixa da fase
+    preso = (((T - a0 <= 1e-6*T) | (b0 - T <= 1e-6*T)) &
+             (abs(F) > 1e-6*maximum(abs(y), 1.)))
+    T[preso] = float('nan')
+    return T
+
+def _flash( nome , P , y ):
+
+    P, y = broadcast_arrays(asarray(P, dtype = float), asarray(y, dtype = float))
+    forma = P.shape
+    P, y = array(P).ravel(), array(y).ravel()
+    n = len(P)
+
+    T = zeros(n)
+    x = zeros(n) + float('nan')
+    fase = array(['sup'] * n, dtype = 'S4')
+    a = zeros(n) + Ttri
+    b = zeros(n) + 1300 + 273.15
+    T0 = zeros(n) + Tc
+
+    #Classificação pelas propriedades saturadas, uma vez por pressão
+    for p in set(P[P <= 22.08e6]):
+
+        sat = saturacao(P = p)
+        yl, yv = getattr(sat.liq, nome), getattr(sat.vap, nome)
+        escala = 1. if nome == 'h' else sat.Tsat  # ds = cp dT / T
+
+        m = P == p
+        liq = m & (y < yl)
+        vap = m & (y > yv)
+        mist = m & ~liq & ~vap
+
+        T[mist] = sat.Tsat
+        x[mist] = (y[mist] - yl)/(yv - yl)
+        fase[mist] = 'sat'
+
+        fase[liq] = 'liq'
+        b[liq] = sat.Tsat
+        T0[liq] = sat.Tsat + escala*(y[liq] - yl)/_CP_FASE['liq']
+
+        fase[vap] = 'vap'
+        a[vap] = sat.Tsat
+        T0[vap] = sat.Tsat + escala*(y[vap] - yv)/_CP_FASE['vap']
+
+    #Fora da saturação: Newton salvaguardado, em lote
+    i = nonzero(fase != 'sat')[0]
+    if i.size:
+        folga = 1e-3*(b[i] - a[i])
+        T0i = minimum(maximum(T0[i], a[i] + folga), b[i] - folga)
+        T[i] = _inverte_T(nome, y[i], P[i], a[i], b[i], T0i)
+
+    fase[(P > 22.08e6) & (P <= Pc)] = 'fech'
+
+    if forma == ():
+        return Flash(T[0], P[0], x[0], str(fase[0]))
+    return Flash(T.reshape(forma), P.reshape(forma), x.reshape(forma), fase.reshape(forma))
+
+def flash_ph( P , h , perfil = None ):
+
+    "Estado (Flash) à pressão P (Pa) com entalpia h (kJ/kg)."
+
+    with precisao(perfil):
+        return _flash('h', P, h)
+
+def flash_ps( P , s , perfil = None ):
+
+    "Estado (Flash) à pressão P (Pa) com entropia s (kJ/kg.K)."
+
+    with precisao(perfil):
+        return _flash('s', P, s)
+
+
+
+
+"------------------------------------------------------------------------------"
+
+"""PROPRIEDADES DERIVADAS: calores específicos, velocidade do som e coefi-
+   ciente de Joule-Thomson pelas derivadas analíticas da equação de estado
+   (LK.derivadas_lote: Lee_Kesler.Z, os termos de Keenan de WuStiel e a
+   correção de Wu-Stiel) e pelo cp de gás ideal Cp_ideal, sem diferenças
+   finitas de h e u e sem LK.H_S. T e P podem ser arrays: todos os pontos
+   são resolvidos juntos, numa só chamada. A fase de cada ponto fora da
+   saturação é a da curva de saturação (líquido se P > Psat(T), abaixo de
+   Tc); na saturação (Fase_sat 'liq' ou 'vap') P é Psat(T), e as derivadas
+   são nan no trecho de fechamento de Psat.
+
+   Derivadas: cp e cv (kJ/kg.K), velocidade do som vsom (m/s) e coeficiente
+              de Joule-Thomson mu_jt = (dT/dP)h (K/Pa)."""
+
+Derivadas = namedtuple('Derivadas', 'cp cv vsom mu_jt')
+
+def derivadas( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ):
+
+    "Derivadas (cp, cv, vsom, mu_jt) a T (K) e P (Pa), de uma só solução."
+
+    if perfil is not None:
+        with precisao(perfil):
+            return derivadas(T, P, Fase_sat)
+
+    T, P = broadcast_arrays(asarray(T, dtype = float), asarray(P, dtype = float))
+    if Fase_sat == 'nada':
+        liquido = (T < Tc) & (P > Psat(minimum(T, Tc), fechamento = True))
+    else:
+        P = Psat(T)
+        liquido = Fase_sat == 'liq'
+
+    Z, ZT, ZP, Dcp = LK.derivadas_lote(T/Tc, P/Pc, liquido, w)
+
+    cp = (Cp_ideal(T) + R*Dcp) / MM #kJ/kg.K
+    cv = cp - R*(Z + ZT)**2/(Z - ZP) / MM
+    vsom = sqrt(cp/cv * R*T*Z*Z/(Z - ZP) * 1000 / MM) #m/s
+    v = (Z*R*T) * 1000 / (MM * P) #m3/kg
+    mu_jt = v*ZT/Z / (1000 * cp) #K/Pa
+
+    if T.ndim == 0:
+        return Derivadas(float(cp), float(cv), float(vsom), float(mu_jt))
+    return Derivadas(cp, cv, vsom, mu_jt)
+
+def cp( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ):
+
+    "Calor específico a pressão constante (kJ/kg.K)."
+
+    return derivadas(T, P, Fase_sat, perfil).cp
+
+def cv( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ):
+
+    "Calor específico a volume constante (kJ/kg.K)."
+
+    return derivadas(T, P, Fase_sat, perfil).cv
+
+def vsom( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ):
+
+    "Velocidade do som (m/s)."
+
+    return derivadas(T, P, Fase_sat, perfil).vsom
+
+def mu_jt( T , P = 1.0 , Fase_sat = 'nada' , perfil = None ):
+
+    "Coeficiente de Joule-Thomson, (dT/dP) a h constante (K/Pa)."
+
+    return derivadas(T, P, Fase_sat, perfil).mu_jt
@@ -7,17 +7,94 @@ x0 s
 obtida algbricamente ou numericamente por diferenas finitas,
 se jacob is None. Esta verso permite argumentos-extra na funo e est
 totalmente vetorizada. 
+robustNewton_lote resolve de uma s vez um lote de sistemas independentes
+com a mesma estrutura (mesma fun, x0 e args diferentes), usando NumPy.
+robustNewton_intervalo resolve uma equao escalar mantendo um intervalo
+com troca de sinal (Newton ou Illinois, com bisseo de salvaguarda).
+As trs imprimem um aviso quando no convergem em nitermax iteraes, a
+menos que avisos[0] seja False. Os padres de nitermax, xtol e passo (o
+passo relativo das diferenas finitas) vm do perfil de preciso ativo.
 """
 #                                                           #
 #   Por E R Woiski UNESP Ilha Solteira - SP - 2007-09-17    #
 #                                                           #
 
 from numpy import array,any,dot,size,asarray,zeros,identity,ones,copy
+from numpy import empty,maximum,ndim,newaxis,nonzero,outer,arange,where
 from numpy.linalg import solve
 import time
+from contextlib import contextmanager
 
-def robustNewton(fun,x0,jacob = None, nitermax = 200, xtol=1.e-8, args=None):
-    
+avisos = [True] # imprime os avisos de no convergncia?
+
+class SemTrocaDeSinal(ValueError):
+    ''' nenhum intervalo com troca de sinal (procura_intervalo, ou [a,b]
+    dado a robustNewton_intervalo); os demais ValueError, como os erros de
+    domnio de math dentro de fun, no so desta classe'''
+
+""" Perfis de preciso: quando no so dados na chamada, xtol (tolerncia
+do resduo), nitermax (limite de iteraes; nitermax_intervalo em
+robustNewton_intervalo) e passo (passo relativo das diferenas finitas do
+jacobiano) vm do perfil ativo. 'engenharia', o perfil inicial, tem os
+padres de sempre; 'rascunho' troca preciso por velocidade (varreduras
+rpidas de parmetros) e 'referencia' faz o contrrio. usar_perfil(nome)
+troca o perfil ativo e precisao(nome) o troca s dentro de um bloco with
+(precisao(None) no troca nada)."""
+
+PERFIS = {
+    'rascunho'   : {'xtol' : 1.e-5,  'nitermax' : 100, 'nitermax_intervalo' : 50,  'passo' : 1.e-6},
+    'engenharia' : {'xtol' : 1.e-8,  'nitermax' : 200, 'nitermax_intervalo' : 100, 'passo' : 1.e-8},
+    'referencia' : {'xtol' : 1.e-12, 'nitermax' : 400, 'nitermax_intervalo' : 200, 'passo' : 1.e-8},
+    }
+
+_perfil = ['engenharia']
+
+def perfil():
+    ''' parmetros (o dicionrio de PERFIS) do perfil ativo'''
+    return PERFIS[_perfil[0]]
+
+def nome_perfil():
+    return _perfil[0]
+
+def usar_perfil(nome):
+    if nome not in PERFIS:
+        raise ValueError('perfil de preciso desconhecido: %r' %(nome,))
+    _perfil[0] = nome
+
+@contextmanager
+def precisao(nome):
+    ''' perfil 'nome' dentro do bloco with; retorna os seus parmetros'''
+    anterior = _perfil[0]
+    if nome is not None:
+        usar_perfil(nome)
+    try:
+        yield perfil()
+    finally:
+        _perfil[0] = anterior
+
+def _padroes(nitermax, xtol, passo, limite='nitermax'):
+    ''' nitermax, xtol e passo, com os que forem None tirados do perfil'''
+    p = PERFIS[_perfil[0]]
+    return (p[limite] if nitermax is None else nitermax,
+            p['xtol'] if xtol is None else xtol,
+            p['passo'] if passo is None else passo)
+
+def robustNewton(fun,x0,jacob = None, nitermax = None, xtol=None, args=None,
+                 broyden = False, renova = 10, passo = None):
+    ''' broyden=True: o jacobiano (de jacob ou por diferenas finitas) s 
+    calculado na primeira iterao e a cada 'renova' iteraes, ou quando
+    o erro aumenta; nas demais ele  atualizado pela frmula "boa" de
+    Broyden (no caso escalar, a secante), sem nenhuma avaliao a mais de
+    fun: uma avaliao por iterao, em vez de n+1 (diferenas finitas).
+    Broyden converge de forma superlinear, no quadrtica: so mais
+    iteraes (5.6 contra 3.5 por soluo nos sistemas de dois fluidos de
+    Lee-Kesler de benchmark.py, com 25% menos avaliaes de fun), cada uma
+    com o custo fixo da atualizao. Por isso o padro  broyden=False;
+    Broyden s compensa sem jacob e quando as n avaliaes de fun que ele
+    poupa por iterao custam mais que essas iteraes a mais: fun cara
+    (uma soluo completa em cada avaliao, por exemplo) ou n grande.'''
+
+    nitermax, xtol, passo = _padroes(nitermax, xtol, passo)
     error = 2*xtol
     ite = 0
     if args:
@@ -26,19 +103,22 @@ def robustNewton(fun,x0,jacob = None, nitermax = 200, xtol=1.e-8, args=None):
     if size(x0) != 1: #  VETORIAL!...
         x = asarray(x0)
         linhas = colunas = size(x0)        
+        F = fun(x, args) # F(x)  guardada de uma iterao para a outra...
+        J = None
        
         while error > xtol and ite <= nitermax:
-            F = fun(x, args)              
-            if jacob is None:
-                ''' se o jacobiano no for fornecido,
-                calcule um por diferenas finitas...'''
-                ix = ones((linhas,colunas))*x
-                ixtol = identity((colunas))*xtol
-                J = (array(map(lambda x:fun(x,args),ix + ixtol)) -
-                  array(map(lambda x:fun(x,args),ix)) ).transpose()/xtol      
+            if J is None or not broyden or idade >= renova:
+                if jacob is None:
+                    ''' se o jacobiano no for fornecido,
+                    calcule um por diferenas finitas, uma avaliao de
+                    fun por coluna (F(x) j  conhecida)...'''
+                    ixtol = identity((colunas))*passo
+                    J = (array(map(lambda dx:fun(x + dx,args),ixtol)) -
+                      F).transpose()/passo      
            
-            else: # ou ento jacobiano fornecido...
-                J = jacob(x,args)
+                else: # ou ento jacobiano fornecido...
+                    J = jacob(x,args)
+                idade = 0
                         
             # seja qual for a forma de determinao do jacobiano...    
             dx = solve(J,-F)
@@ -49,22 +129,32 @@ def robustNewton(fun,x0,jacob = None, nitermax = 200, xtol=1.e-8, args=None):
                         
             ite += 1
             x += dx # avana x...
-            F = fun(x, args)
+            Fn = fun(x, args)
+
+            if broyden: # atualizao de Broyden: J*dx = Fn - F...
+                J = J + outer(Fn - F - dot(J,dx), dx)/dot(dx,dx)
+                idade += 1
+            F = Fn
             
             # O erro  o maior valor dentre a norma quadrtica e o maior resduo...
-            error = max(dot(F,F),abs(F).max())
+            anterior, error = error, max(dot(F,F),abs(F).max())
+            if error > anterior and ite > 1: # piorou: recalcule o jacobiano...
+                idade = renova
 
     else: #ESCALAR!...
         x = x0       
+        F = fun(x, args) # F(x)  guardada de uma iterao para a outra...
+        J = None
         while error > xtol and ite <= nitermax:
-            F = fun(x, args)                                                                   
-            if jacob is None:
-                J = (fun(x*(1.+xtol),args) - fun(x,args))/(x*xtol)
-                ''' se o jacobiano no for fornecido,
-                    calcule um por diferenas finitas...'''
+            if J is None or not broyden or idade >= renova:
+                if jacob is None:
+                    J = (fun(x*(1.+passo),args) - F)/(x*passo)
+                    ''' se o jacobiano no for fornecido,
+                        calcule um por diferenas finitas...'''
                                                    
-            else: # ou ento jacob fornecido...
-                J = jacob(x,args)
+                else: # ou ento jacob fornecido...
+                    J = jacob(x,args)
+                idade = 0
                         
             # seja qual for a forma de determinao do jacobiano...    
             dx = -F/J
@@ -74,15 +164,275 @@ def robustNewton(fun,x0,jacob = None, nitermax = 200, xtol=1.e-8, args=None):
 
             ite += 1
             x += dx # avana x...
-            F = fun(x, args)
+            Fn = fun(x, args)
+
+            if broyden and dx != 0: # secante...
+                J = (Fn - F)/dx
+                idade += 1
+            F = Fn
                 
-            error = abs(F)
+            anterior, error = error, abs(F)
+            if error > anterior and ite > 1: # piorou: recalcule a derivada...
+                idade = renova
 
-    if ite >= nitermax:
+    if ite >= nitermax and avisos[0]:
         print '%s: no convergiu com %s iteraes!' %(fun,nitermax)
         
     return x,ite,F
 
+def procura_intervalo(fun,x0,args=None,jacob=None,passo=.05,nmax=40,nnewton=10):
+    ''' procura, a partir de x0 > 0, um intervalo [a,b] (a, b > 0) em que fun
+    troca de sinal. Com jacob, tenta primeiro at nnewton passos de Newton
+    (robustos, como em robustNewton) a partir de x0, testando, quando o
+    passo dx j  pequeno, o ponto x + 2*dx: perto da raiz ele fica do
+    outro lado dela e o intervalo sai pequeno. Seno (ou se isso falhar),
+    a partir de x0 (ou do ltimo passo de Newton), testa alternadamente
+    x0*(1 + d) e x0/(1 + d), com d comeando em 'passo' e dobrando a cada
+    teste, e fica com a troca de sinal mais prxima (o que, como no chute
+    de robustNewton, escolhe a raiz da fase procurada).
+    Retorna a,F(a),b,F(b); SemTrocaDeSinal se no houver troca de sinal.'''
+    F0 = fun(x0,args)
+    if F0 == 0:
+        return x0,F0,x0,F0
+
+    if jacob is not None:
+        x,F = x0,F0
+        for k in range(nnewton):
+            J = jacob(x,args)
+            if J == 0:
+                break
+            dx = -F/J
+            while -dx > x: dx *= .5
+            if abs(dx) < .1*x: # perto da raiz...
+                xt = x + 2*dx
+                Ft = fun(xt,args)
+                if Ft*F <= 0:
+                    return (x,F,xt,Ft) if xt > x else (xt,Ft,x,F)
+            xn = x + dx
+            Fn = fun(xn,args)
+            if Fn*F <= 0:
+                return (x,F,xn,Fn) if xn > x else (xn,Fn,x,F)
+            x,F = xn,Fn
+        x0,F0 = x,F
+
+    xs,Fs = x0,F0   # extremo superior...
+    xi,Fi = x0,F0   # e inferior j testados
+    d = passo
+    for k in range(nmax):
+        x = x0*(1. + d)
+        F = fun(x,args)
+        if F*Fs <= 0:
+            return xs,Fs,x,F
+        xs,Fs = x,F
+        x = x0/(1. + d)
+        F = fun(x,args)
+        if F*Fi <= 0:
+            return x,F,xi,Fi
+        xi,Fi = x,F
+        d *= 2.
+    raise SemTrocaDeSinal('%s: sem troca de sinal entre %g e %g' %(fun,xi,xs))
+
+def robustNewton_intervalo(fun,x0,jacob = None, nitermax = None, xtol=None, args=None,
+                           a = None, b = None):
+    ''' Raiz escalar de fun dentro de um intervalo [a,b] com troca de sinal
+    (procurado a partir de x0 por procura_intervalo, se no for dado), que 
+    mantido durante toda a soluo. Cada passo  de Newton (com jacob) ou de
+    Illinois (falsa posio modificada, sem jacob), e vira bisseo se cair
+    fora do intervalo ou se no for menor que a metade do penltimo passo;
+    assim os passos caem  metade a cada dois, no mximo, e o nmero de
+    avaliaes  limitado mesmo perto do ponto crtico. Termina quando
+    abs(F) <= xtol ou quando o passo ou o intervalo fica menor que xtol*x. Mesma assinatura e retorno (x,ite,F) de robustNewton.'''
+
+    nitermax, xtol = _padroes(nitermax, xtol, None, 'nitermax_intervalo')[:2]
+
+    if a is None or b is None:
+        a,Fa,b,Fb = procura_intervalo(fun,x0,args,jacob)
+    else:
+        Fa,Fb = fun(a,args),fun(b,args)
+        if Fa*Fb > 0:
+            raise SemTrocaDeSinal('%s: sem troca de sinal entre %g e %g' %(fun,a,b))
+
+    # xn: extremo com F <= 0; xp: extremo com F >= 0...
+    if Fa <= 0:
+        xn,Fn,xp,Fp = a,Fa,b,Fb
+    else:
+        xn,Fn,xp,Fp = b,Fb,a,Fa
+
+    if abs(Fn) <= xtol:
+        return xn,0,Fn
+    if abs(Fp) <= xtol:
+        return xp,0,Fp
+
+    # Pesos de Illinois (F dos extremos divididos quando eles se repetem)...
+    Gn,Gp = Fn,Fp
+    lado = 0
+    passos = [float('inf')]*2
+    ite = 0
+
+    # parte do extremo de menor resduo...
+    if abs(Fn) < abs(Fp):
+        x,F = xn,Fn
+    else:
+        x,F = xp,Fp
+
+    while ite < nitermax:
+        baixo,alto = min(xn,xp),max(xn,xp)
+
+        passo = None
+        if jacob is not None:
+            J = jacob(x,args)
+            if J != 0:
+                passo = x - F/J
+        else:
+            passo = xp - Gp*(xp - xn)/(Gp - Gn)
+
+        # bisseo se o passo sair do intervalo ou no for menor que a
+        # metade do penltimo passo...
+        if (passo is None or not baixo < passo < alto or
+                abs(passo - x) > .5*passos[-2]):
+            passo = .5*(baixo + alto)
+            lado = 0
+
+        passos.append(abs(passo - x))
+        x = passo
+        F = fun(x,args)
+        ite += 1
+
+        if F <= 0:
+            if lado == -1: Gp *= .5
+            xn,Fn,Gn,lado = x,F,F,-1
+        else:
+            if lado == 1: Gn *= .5
+            xp,Fp,Gp,lado = x,F,F,1
+
+        if abs(F) <= xtol or min(passos[-1],abs(xp - xn)) <= xtol*abs(x):
+            break
+
+    if ite >= nitermax and avisos[0]:
+        print '%s: no convergiu com %s iteraes!' %(fun,nitermax)
+
+    return x,ite,F
+
+def _fatia(args, idx, N):
+    ''' seleciona, nos argumentos-extra, apenas as linhas idx do lote.
+    Arrays (ou listas) com N linhas so fatiados; escalares e demais
+    objetos so repassados sem alterao.'''
+    if args is None:
+        return None
+    if isinstance(args, tuple):
+        return tuple([_fatia(a, idx, N) for a in args])
+    if ndim(args) >= 1 and len(args) == N:
+        return asarray(args)[idx]
+    return args
+
+def robustNewton_lote(fun,x0,jacob = None, nitermax = None, xtol=None, args=None,
+                      broyden = False, renova = 10, passo = None):
+    """
+    Resolve em conjunto N sistemas independentes e de mesma estrutura,
+    que diferem apenas em x0 e/ou args. x0 tem forma (N,) no caso escalar
+    ou (N,n) no caso vetorial; args pode ser um array de N linhas ou uma
+    tupla de arrays (de N linhas) e escalares. fun(x,args) deve aceitar o
+    lote e retornar F com a mesma forma de x; jacob(x,args), se fornecido,
+    retorna (N,) ou (N,n,n).
+    Cada linha tem sua prpria mscara de convergncia: linhas que j
+    convergiram saem do lote e no custam mais avaliaes de fun.
+    broyden e renova como em robustNewton (ver l quando Broyden compensa),
+    com o jacobiano de cada linha guardado e atualizado separadamente.
+    Retorna x, o nmero de iteraes e os resduos F de cada linha.
+    """
+    nitermax, xtol, passo = _padroes(nitermax, xtol, passo)
+    x = array(x0, dtype=float)
+    N = x.shape[0]
+    vetorial = x.ndim == 2
+
+    def erro(F):
+        # O erro  o maior valor dentre a norma quadrtica e o maior resduo...
+        if vetorial:
+            return maximum((F*F).sum(axis=1), abs(F).max(axis=1))
+        return abs(F)
+
+    ite = zeros(N, dtype=int)
+    F = array(fun(x, args), dtype=float)
+    ativos = nonzero(erro(F) > xtol)[0]
+
+    # Jacobianos de todas as linhas e iteraes desde o ltimo clculo...
+    Jt = empty((N, x.shape[1], x.shape[1]) if vetorial else N)
+    idade = zeros(N, dtype=int) + renova
+
+    while ativos.size:
+        xa = x[ativos]
+        Fa = F[ativos]
+
+        # linhas (dentre as ativas) cujo jacobiano  calculado de novo...
+        novos = nonzero(idade[ativos] >= renova)[0] if broyden else arange(ativos.size)
+        if novos.size:
+            xn = xa[novos]
+            argsn = _fatia(args, ativos[novos], N)
+            if vetorial:
+                if jacob is None:
+                    ''' se o jacobiano no for fornecido, calcule um por
+                    diferenas finitas, uma coluna por vez para todo o lote...'''
+                    n = xa.shape[1]
+                    J = empty((novos.size, n, n))
+                    for j in range(n):
+                        xp = xn.copy()
+                        xp[:, j] += passo
+                        J[:, :, j] = (fun(xp, argsn) - Fa[novos])/passo
+                else: # ou ento jacobiano fornecido...
+                    J = jacob(xn, argsn)
+            else:
+                if jacob is None:
+                    J = (fun(xn*(1.+passo), argsn) - Fa[novos])/(xn*passo)
+                else:
+                    J = jacob(xn, argsn)
+            Jt[ativos[novos]] = J
+            idade[ativos[novos]] = 0
+        J = Jt[ativos]
+
+        if vetorial:
+            dx = solve(J, -Fa[..., newaxis])[..., 0]
+
+            # se algum componente de xi + dxi for negativo, reduza dxi pela metade...
+            neg = (xa + dx) < 0
+            while neg.any():
+                dx[neg] *= .5
+                neg = (xa + dx) < 0
+
+        else:
+            dx = -Fa/J
+
+            # se x + dx for negativo, reduza dx pela metade...
+            neg = -dx > xa
+            while neg.any():
+                dx[neg] *= .5
+                neg = -dx > xa
+
+        xa = xa + dx # avana x...
+        x[ativos] = xa
+        ite[ativos] += 1
+        Fn = array(fun(xa, _fatia(args, ativos, N)), dtype=float)
+        F[ativos] = Fn
+
+        if broyden: # atualizao de Broyden (secante no caso escalar)...
+            if vetorial:
+                Jdx = (J*dx[:, newaxis, :]).sum(axis=2)
+                dx2 = (dx*dx).sum(axis=1)
+                Jt[ativos] = J + ((Fn - Fa - Jdx)[:, :, newaxis]*dx[:, newaxis, :]/
+                                  where(dx2 > 0, dx2, 1.)[:, newaxis, newaxis])
+            else:
+                Jt[ativos] = where(dx != 0, (Fn - Fa)/where(dx != 0, dx, 1.), J)
+            idade[ativos] += 1
+            # piorou: recalcule o jacobiano...
+            idade[ativos[erro(Fn) > erro(Fa)]] = renova
+
+        ativos = ativos[(erro(F[ativos]) > xtol) & (ite[ativos] <= nitermax)]
+
+    nconv = (ite >= nitermax).sum()
+    if nconv and avisos[0]:
+        print '%s: %d de %d sistemas no convergiram com %s iteraes!' %(fun,nconv,N,nitermax)
+
+    return x,ite,F
+
 if __name__ == '__main__':  # exemplos de utilizao...
     from math import sin,cos,log
 
@@ -118,6 +468,7 @@ if __name__ == '__main__':  # exemplos de utiliza
 
     x,ite,F = robustNewton(fun,(1.,1.,1.),args=args,jacob = jacob)
     xs,ites,Fs = robustNewton(fun,(1.,1.,1.),jacob = None, args = args)
+    xb,iteb,Fb = robustNewton(fun,(1.,1.,1.),jacob = None, args = args, broyden = True)
 
     print 'EXEMPLOS SIMPLES:'
     print '\n1- Sistema no-linear resolvido por Newton-Raphson:'
@@ -131,6 +482,7 @@ if __name__ == '__main__':  # exemplos de utiliza
     print 'razes:\ncom jacobiano:',x,' em ',ite,
     print 'iteraes\ne sem jacobiano:',xs,' em ',ite,'iteraes'
     print 'resduos:\ncom jacobiano:',F,'\ne sem jacobiano:',Fs
+    print 'com Broyden (sem jacobiano):',xb,' em ',iteb,'iteraes; resduos:',Fb
     print 50*'*'
     
     def fun_linear(x,arg):
@@ -204,3 +556,31 @@ n
     print 'Taxa de juros:\t%f'%(i*100) + ' %',' em ',ite,'iteraes\n'
     print 'resduo: %s' %F
     print '*'*50
+
+    def FVAs_lote(i,args):
+        A,R,n = args
+        fac = (1 + i)**n
+        return (fac - 1.)/(i*fac) - A/R
+
+    lote_A = array((3419.,3419.,10000.,500.))
+    lote_R = array((721.21,650.,1200.,100.))
+    lote_n = array((6,6,12,6))
+
+    il,itel,Fl = robustNewton_lote(FVAs_lote,ones(4),args=(lote_A,lote_R,lote_n))
+
+    print '\n4- Lote de funes escalares resolvido de uma s vez:'
+    print 'Taxas de juros (%):',il*100
+    print 'iteraes por linha:',itel
+    print 'resduos:',Fl
+    print '*'*50
+
+    # fun e jacob do exemplo 1 avaliados linha a linha para formar o lote...
+    fun_l = lambda x,args: array(map(fun,x,zip(*args)))
+    jacob_l = lambda x,args: array(map(jacob,x,zip(*args)))
+    args_l = (array((-1.,-1.,0.)),array((.5,.5,1.)))
+
+    xl,itel,Fl = robustNewton_lote(fun_l,ones((3,3)),args=args_l,jacob=jacob_l)
+    print '\n5- Lote do sistema do exemplo 1 (args por linha):'
+    print 'razes:\n',xl
+    print 'iteraes por linha:',itel
+    print '*'*50
@@ -0,0 +1,79 @@
+# -*- coding:utf-8 -*-
+u"""
+        SAÍDAS DAS TABELAS:
+Destinos (sinks) para as linhas produzidas pelos geradores de tabelas.
+Cada linha é uma namedtuple de números; toda saída tem os métodos
+escreve(linha), chamado para cada linha assim que ela é calculada, e
+fecha(). As linhas são gravadas e o arquivo é descarregado (flush) a cada
+escreve, de modo que outros programas podem ler a tabela enquanto ela
+ainda está sendo calculada.
+    SaidaCSV: texto separado por vírgulas, com os nomes dos campos na
+              primeira linha e os números com precisão completa (repr);
+    SaidaNPY: array estruturado do NumPy (.npy), um campo float64 por
+              coluna. O cabeçalho é reescrito a cada linha com o número de
+              linhas já gravadas, então numpy.load lê o arquivo a qualquer
+              momento.
+"""
+
+import csv
+import struct
+from numpy import array,dtype
+from numpy.lib.format import MAGIC_PREFIX,dtype_to_descr
+
+
+class SaidaCSV(object):
+
+    def __init__(self, arquivo):
+        u"arquivo: nome do arquivo ou objeto file já aberto."
+        if isinstance(arquivo, basestring):
+            arquivo = open(arquivo, 'wb')
+        self.arquivo = arquivo
+        self.escritor = csv.writer(arquivo)
+        self.campos = None
+
+    def escreve(self, linha):
+        if self.campos is None:
+            self.campos = linha._fields
+            self.escritor.writerow(self.campos)
+        self.escritor.writerow([repr(x) for x in linha])
+        self.arquivo.flush()
+
+    def fecha(self):
+        self.arquivo.close()
+
+
+class SaidaNPY(object):
+
+    TAM_CABECALHO = 256 # bytes reservados para o cabeçalho do .npy
+
+    def __init__(self, arquivo):
+        u"arquivo: nome do arquivo ou objeto file já aberto para escrita binária."
+        if isinstance(arquivo, basestring):
+            arquivo = open(arquivo, 'w+b')
+        self.arquivo = arquivo
+        self.tipo = None
+        self.n = 0
+
+    def _cabecalho(self):
+        u"""Cabeçalho .npy (versão 1.0) de tamanho fixo: o número de linhas
+        é escrito com largura fixa, completado por espaços."""
+        texto = "{'descr': %r, 'fortran_order': False, 'shape': (%20d,), }" %(
+                dtype_to_descr(self.tipo), self.n)
+        tam = self.TAM_CABECALHO - len(MAGIC_PREFIX) - 4
+        texto = texto.ljust(tam - 1) + '\n'
+        return MAGIC_PREFIX + '\x01\x00' + struct.pack('<H', tam) + texto
+
+    def escreve(self, linha):
+        if self.tipo is None:
+            self.tipo = dtype([(campo, '<f8') for campo in linha._fields])
+            self.arquivo.write(self._cabecalho())
+
+        self.arquivo.seek(0, 2)
+        self.arquivo.write(array([tuple(linha)], dtype = self.tipo).tostring())
+        self.n += 1
+        self.arquivo.seek(0)
+        self.arquivo.write(self._cabecalho())
+        self.arquivo.flush()
+
+    def fecha(self):
+        self.arquivo.close()
@@ -0,0 +1,293 @@
+# -*- coding:utf-8 -*-
+u"""
+        CURVA DE SATURAÇÃO APROXIMADA:
+Aproximantes de Chebyshev, por partes, da pressão reduzida de saturação
+Pr(Tr) e da sua inversa Tr(Pr), entre o ponto triplo e (quase) o ponto
+crítico, construídos a partir da solução completa LK.H_S(..., x=.5).
+Os polinômios aproximam ln(Pr) em função de Tr e Tr em função de ln(Pr).
+O erro relativo máximo em relação à solução completa é medido em pontos
+de teste que não são nós do ajuste e fica guardado nos atributos erro_Pr
+e erro_Tr. Os coeficientes são gravados em disco (.npz) e carregados nas
+execuções seguintes, sem nenhuma solução de LK.H_S. Junto com eles é
+gravado o modelo (LK.versao_coeficientes() e o perfil de precisão da
+construção); um arquivo de outro modelo, ou de outra curva, é refeito. A
+solução completa só é usada quando se pede polir=True.
+
+Modo quase crítico (critico=True): as soluções de saturação, cada vez mais
+lentas e frágeis quando Tr se aproxima de 1, são feitas em ordem crescente
+de Tr, como uma continuação a partir do ponto convergido anterior: dentro
+de LK.continuacao() (cada solução parte da anterior, extrapolada ao longo
+da curva no plano (Tr, Pr)) e de LK.orcamento(nitermax), que limita as
+iterações de cada solução. Um ponto que não converge dentro do orçamento
+(ou que não fica acima do anterior) é alcançado em passos menores, a partir
+do último ponto convergido, no máximo 'subpassos' vezes; se ainda assim não
+convergir, ln(Pr) é extrapolado dos pontos anteriores. O custo de cada
+ponto fica, assim, limitado. Acima de Trmax a curva é fechada até o ponto
+crítico (Tr = 1, Pr = 1) por um trecho quadrático em Tr, contínuo e com a
+mesma derivada do último pedaço em Trmax, de modo que Pr(Tr) e Tr(Pr)
+são contínuas até o ponto crítico. Esse trecho não vem do modelo: é só uma
+interpolação entre o último ponto traçado e o ponto crítico, de erro não
+medido; fechamento(Tr) (ou fechamento(Pr = Pr)) indica os pontos nele.
+"""
+
+import os
+from numpy import array,asarray,atleast_1d,arange,cos,pi,exp,log,clip
+from numpy import searchsorted,zeros,linspace,load,savez,argsort,isfinite,empty
+from numpy.polynomial.chebyshev import chebfit,chebval,chebder
+import LK_WS_NR as LK
+import robustNR_args as NR
+
+VERSAO = 3 # mude sempre que a construção dos aproximantes mudar
+
+
+def modelo():
+    u"""Texto do modelo das soluções de saturação: a versão dos coeficientes
+    de LK_WS_NR e os parâmetros do perfil de precisão ativo."""
+    return '%s %r' %(LK.versao_coeficientes(), sorted(NR.perfil().items()))
+
+
+def _nos(grau):
+    u"Nós de Chebyshev (de primeira espécie) em [-1, 1]."
+    k = arange(grau + 1)
+    return cos(pi*(k + .5)/(grau + 1))
+
+def _avalia(bordas, coefs, x):
+    u"""Avalia o polinômio por partes (bordas, coefs) em x, escalar ou array.
+    Fora de [bordas[0], bordas[-1]] o pedaço da ponta é extrapolado."""
+    x = asarray(x, dtype=float)
+    xs = atleast_1d(x)
+    k = clip(searchsorted(bordas, xs) - 1, 0, len(coefs) - 1)
+    a, b = bordas[k], bordas[k+1]
+    u = (2*xs - a - b)/(b - a)
+
+    y = zeros(xs.shape)
+    for i in range(len(coefs)):
+        m = k == i
+        if m.any():
+            y[m] = chebval(u[m], coefs[i])
+
+    if x.ndim == 0:
+        return y[0]
+    return y
+
+
+class CurvaSat(object):
+    u"""
+    Curva de saturação Pr(Tr) e Tr(Pr) do fluido de fator acêntrico w,
+    entre Trmin e Trmax, com 'pedacos' intervalos de grau 'grau'.
+    Se arquivo for dado e existir, os coeficientes são lidos dele; senão
+    (ou se ele for de outro modelo ou de outra curva) são construídos
+    (pedacos*(grau + 4) soluções de LK.H_S) e gravados nele.
+    critico=True liga o modo quase crítico, com no máximo nitermax iterações
+    por solução e 'subpassos' passos menores por ponto; extrapolados é o
+    número de pontos que não convergiram e foram extrapolados.
+    """
+
+    def __init__(self, w, Trmin, Trmax, pedacos=8, grau=10, arquivo=None,
+                 critico=False, nitermax=30, subpassos=4):
+        self.w = w
+        self.Trmin = Trmin
+        self.Trmax = Trmax
+        self.pedacos = pedacos
+        self.grau = grau
+        self.critico = critico
+        self.nitermax = nitermax
+        self.subpassos = subpassos
+        self.extrapolados = 0
+
+        if arquivo is None or not os.path.exists(arquivo) or not self._carrega(arquivo):
+            self._constroi()
+            if arquivo is not None:
+                self._grava(arquivo)
+
+    def _constroi(self):
+        nos = _nos(self.grau)
+
+        # Pr(Tr): ajuste de ln(Pr) em nós de Chebyshev de cada intervalo...
+        self.bordas_T = linspace(self.Trmin, self.Trmax, self.pedacos + 1)
+        pedacos = zip(self.bordas_T[:-1], self.bordas_T[1:])
+        self.coefs_T = []
+        if self.critico:
+            Tr = array([.5*(a + b) + .5*(b - a)*nos for a, b in pedacos])
+            lnPr = self._traca(Tr.ravel()).reshape(Tr.shape)
+            for y in lnPr:
+                self.coefs_T.append(chebfit(nos, y, self.grau))
+            self.coefs_T.append(self._fechamento(nos))
+            self.bordas_T = array(list(self.bordas_T) + [1.])
+        else:
+            for a, b in pedacos:
+                Tr = .5*(a + b) + .5*(b - a)*nos
+                lnPr = log(LK.resolve_lote(Tr = Tr, x = 0.5, w = self.w)['Pr'])
+                self.coefs_T.append(chebfit(nos, lnPr, self.grau))
+        self.coefs_T = array(self.coefs_T)
+
+        # Tr(Pr): ajuste de Tr em função de ln(Pr), com os valores de Tr
+        # obtidos invertendo o aproximante acima (sem novas soluções)...
+        self.bordas_P = array([self._lnPr(x) for x in self.bordas_T])
+        self.coefs_P = []
+        for a, b in zip(self.bordas_P[:-1], self.bordas_P[1:]):
+            lnPr = .5*(a + b) + .5*(b - a)*nos
+            self.coefs_P.append(chebfit(nos, [self._inverte(y) for y in lnPr], self.grau))
+        self.coefs_P = array(self.coefs_P)
+
+        # Erro máximo contra a solução completa, em pontos que não são nós
+        # (no modo quase crítico, só nos pontos que convergiram)...
+        self.erro_Pr = self.erro_Tr = 0.
+        teste = array([a + (b - a)*array((.2, .5, .8)) for a, b in pedacos]).ravel()
+        if self.critico:
+            extrapolados = self.extrapolados
+            Prs = exp(self._traca(teste, convergidos=True))
+            self.extrapolados = extrapolados
+        else:
+            Prs = [LK.resolve(Tr = Tr, x = 0.5, w = self.w).Pr for Tr in teste]
+        for Tr, Pr in zip(teste, Prs):
+            if isfinite(Pr):
+                self.erro_Pr = max(self.erro_Pr, abs(self.Pr(Tr)/Pr - 1))
+                self.erro_Tr = max(self.erro_Tr, abs(self.Tr(Pr)/Tr - 1))
+
+    def _traca(self, Tr, convergidos=False):
+        u"""ln(Pr) de saturação em cada Tr, pela continuação do modo quase
+        crítico (ver o início do módulo). Com convergidos=True, os pontos
+        que não convergem ficam com nan em vez de extrapolados."""
+        lnPr = empty(len(Tr))
+        feitos = []  # (Tr, ln(Pr)) convergidos, em ordem crescente de Tr
+
+        with LK.continuacao(), LK.orcamento(self.nitermax) as o:
+
+            def resolve(tr):
+                n = o.nao_convergiu
+                Pr = LK.resolve(Tr = tr, x = 0.5, w = self.w).Pr
+                if o.nao_convergiu > n or not isfinite(Pr) or Pr <= 0:
+                    return None
+                y = log(Pr)
+                if feitos and y <= feitos[-1][1]:
+                    return None  # Pr cresce com Tr: outra raiz...
+                return y
+
+            for i in argsort(Tr):
+                y = resolve(Tr[i])
+                # Não convergiu: passos menores a partir do último ponto...
+                for passo in range(self.subpassos):
+                    if y is not None or not feitos:
+                        break
+                    meio = .5*(feitos[-1][0] + Tr[i])
+                    ym = resolve(meio)
+                    if ym is not None:
+                        feitos.append((meio, ym))
+                    y = resolve(Tr[i])
+                if y is None:
+                    self.extrapolados += 1
+                    if convergidos or not feitos:
+                        lnPr[i] = float('nan')
+                        continue
+                    y = self._extrapola(feitos, Tr[i])
+                else:
+                    feitos.append((Tr[i], y))
+                lnPr[i] = y
+        return lnPr
+
+    def _extrapola(self, feitos, Tr):
+        u"ln(Pr) em Tr pela parábola dos três últimos pontos (ou reta dos dois)."
+        pontos = feitos[-3:]
+        y = 0.
+        for j, (tj, yj) in enumerate(pontos):
+            peso = 1.
+            for k, (tk, yk) in enumerate(pontos):
+                if k != j:
+                    peso *= (Tr - tk)/(tj - tk)
+            y += peso*yj
+        return y
+
+    def _fechamento(self, nos):
+        u"""Coeficientes do trecho de Trmax ao ponto crítico: ln(Pr)
+        quadrático em Tr, com o valor e a derivada do último pedaço em Trmax
+        e ln(Pr) = 0 em Tr = 1."""
+        a, b = self.bordas_T[-2], self.bordas_T[-1]
+        c = self.coefs_T[-1]
+        ya = chebval(1., c)
+        ma = chebval(1., chebder(c))*2./(b - a)  # d ln(Pr)/dTr em Trmax
+        Tr = .5*(self.Trmax + 1.) + .5*(1. - self.Trmax)*nos
+        d = Tr - self.Trmax
+        h = 1. - self.Trmax
+        return chebfit(nos, ya + ma*d - (ya + ma*h)*(d/h)**2, self.grau)
+
+    def _lnPr(self, Tr):
+        return _avalia(self.bordas_T, self.coefs_T, Tr)
+
+    def _inverte(self, lnPr):
+        u"Tr tal que _lnPr(Tr) = lnPr, por Newton sobre o próprio aproximante."
+        k = clip(searchsorted(self.bordas_P, lnPr) - 1, 0, len(self.coefs_T) - 1)
+        a, b = self.bordas_T[k], self.bordas_T[k+1]
+        c, dc = self.coefs_T[k], chebder(self.coefs_T[k])
+        u = 0.
+        for ite in range(50):
+            du = (chebval(u, c) - lnPr)/chebval(u, dc)
+            u -= du
+            if abs(du) < 1e-15:
+                break
+        return .5*(a + b) + .5*(b - a)*u
+
+    def _carrega(self, arquivo):
+        u"""Lê os coeficientes de 'arquivo'; retorna False, sem ler nada, se
+        ele não corresponder a esta curva e ao modelo atual."""
+        dados = load(arquivo)
+        if ('modelo' not in dados.files or int(dados['versao']) != VERSAO or
+                str(dados['modelo']) != modelo() or float(dados['w']) != self.w or
+                bool(dados['critico']) != self.critico or
+                dados['coefs_T'].shape != (self.pedacos + self.critico, self.grau + 1)):
+            return False
+        for nome in ('bordas_T', 'coefs_T', 'bordas_P', 'coefs_P'):
+            setattr(self, nome, dados[nome])
+        self.erro_Pr = float(dados['erro_Pr'])
+        self.erro_Tr = float(dados['erro_Tr'])
+        self.extrapolados = int(dados['extrapolados'])
+        return True
+
+    def _grava(self, arquivo):
+        savez(arquivo, versao = VERSAO, modelo = modelo(), w = self.w, critico = self.critico,
+              extrapolados = self.extrapolados,
+              bordas_T = self.bordas_T, coefs_T = self.coefs_T,
+              bordas_P = self.bordas_P, coefs_P = self.coefs_P,
+              erro_Pr = self.erro_Pr, erro_Tr = self.erro_Tr)
+
+    def fechamento(self, Tr=None, Pr=None):
+        u"""True (escalar ou array) onde Tr, ou Pr, está no trecho de
+        fechamento, acima de Trmax (ou da Pr de saturação em Trmax); sempre
+        False fora do modo quase crítico."""
+        if Tr is not None:
+            x, limite = asarray(Tr, dtype=float), self.Trmax
+        else:
+            x, limite = log(asarray(Pr, dtype=float)), self.bordas_P[-2]
+        return (x > limite + 1e-12) & bool(self.critico)
+
+    def Pr(self, Tr, polir=False):
+        u"""Pressão reduzida de saturação para Tr (escalar ou array).
+        Com polir=True usa a solução completa LK.H_S em cada ponto."""
+        if polir:
+            return LK.resolve_lote(Tr = Tr, x = 0.5, w = self.w)['Pr'][()]
+        return exp(self._lnPr(Tr))
+
+    def Tr(self, Pr, polir=False):
+        u"""Temperatura reduzida de saturação para Pr (escalar ou array).
+        Com polir=True usa a solução completa LK.H_S em cada ponto."""
+        if polir:
+            return LK.resolve_lote(Pr = Pr, x = 0.5, w = self.w)['Tr'][()]
+        return _avalia(self.bordas_P, self.coefs_P, log(Pr))
+
+
+#**********************************************************************************
+
+_curvas = {}
+
+def curva(w, Trmin, Trmax, pedacos=8, grau=10, diretorio=None, critico=False):
+    u"""Retorna a CurvaSat de (w, Trmin, Trmax), uma só por processo. Ela é
+    lida de 'diretorio' (por padrão o deste módulo) ou construída e gravada lá."""
+    chave = (w, Trmin, Trmax, pedacos, grau, critico)
+    if chave not in _curvas:
+        if diretorio is None:
+            diretorio = os.path.dirname(os.path.abspath(__file__))
+        nome = 'curva_sat_v%d_w%.6f_%.8f_%.8f_%dx%d%s.npz' %((VERSAO,) + chave[:-1] +
+                                                           ('_critico' if critico else '',))
+        _curvas[chave] = CurvaSat(w, Trmin, Trmax, pedacos, grau,
+                                  os.path.join(diretorio, nome), critico)
+    return _curvas[chave]
@@ -0,0 +1,332 @@
+# -*- coding:utf-8 -*-
+u"""
+        SERVIDOR LOCAL DE PROPRIEDADES:
+Um processo servidor mantém propriedades_agua carregado, com a curva de
+saturação, o estado de referência e os estados já resolvidos, e atende
+programas em outros processos por um socket Unix (só local, sem rede).
+Todos os clientes compartilham o mesmo cache LRU de resultados.
+
+    python servidor_agua.py [caminho_do_socket] [--tabela nivel] [--perfil nome]
+
+    import servidor_agua as SA
+    agua = SA.Cliente()            # mesmo caminho padrão do servidor
+    agua.h(500., 1.0e6)            # como propriedades_agua.h
+    agua.varios([('h', 500., 1.0e6), ('Tsat', 1.0e6)])
+
+O servidor é um laço de eventos único (asyncore): os pedidos que chegam
+juntos, de todas as conexões, são atendidos em lote a cada volta do laço:
+os pedidos repetidos são resolvidos uma só vez, os de v, h, s e u fora da
+saturação são resolvidos juntos, por propriedade (numa só interpolação
+com usar_tabela), e os de Psat e Tsat numa só avaliação da curva de
+saturação. Por ser um só processo e uma só thread, propriedades_agua é
+usado sem nenhuma trava. Os resultados são os mesmos das chamadas diretas.
+
+Protocolo: uma linha JSON por pedido, [nome, argumentos...], e uma linha
+JSON por resposta, na ordem dos pedidos da conexão: {"r": valor} ou
+{"erro": mensagem}. nome é 'v', 'h', 's', 'u' (T, P = 1.0,
+Fase_sat = 'nada'), 'Psat' (T, polir = False) ou 'Tsat' (P, polir = False).
+"""
+
+import os
+import sys
+import stat
+import json
+import socket
+import asyncore
+import asynchat
+import tempfile
+from collections import OrderedDict
+from numpy import array
+import propriedades_agua as PA
+
+CAMINHO = os.path.join(tempfile.gettempdir(), 'propriedades_agua.sock')
+
+PROPS = ('v', 'h', 's', 'u')
+SATURACAO = ('Psat', 'Tsat')
+
+
+def _chave(pedido):
+    u"""Chave do pedido [nome, argumentos...], com os argumentos omitidos
+    preenchidos como nas funções de propriedades_agua."""
+    nome, args = pedido[0], list(pedido[1:])
+    if nome in PROPS:
+        T, P, Fase_sat = (args + [1.0, 'nada'][len(args) - 1:])[:3]
+        if Fase_sat != 'nada':
+            P = None  # saturado: só T importa
+        return (nome, float(T), P if P is None else float(P), str(Fase_sat))
+    if nome in SATURACAO:
+        x, polir = (args + [False][len(args) - 1:])[:2]
+        return (nome, float(x), bool(polir))
+    raise ValueError('pedido desconhecido: %r' %(nome,))
+
+def _avalia(chave):
+    u"Resultado de um pedido, pela chamada direta a propriedades_agua."
+    if chave[0] in PROPS:
+        nome, T, P, Fase_sat = chave
+        if P is None:
+            return getattr(PA, nome)(T, Fase_sat = Fase_sat)
+        return getattr(PA, nome)(T, P, Fase_sat)
+    nome, x, polir = chave
+    return getattr(PA, nome)(x, polir)
+
+def _tenta(chave):
+    u"Resultado de um pedido, ou a exceção que ele levantou."
+    try:
+        return float(_avalia(chave))
+    except Exception, erro:
+        return erro
+
+def _libera(caminho):
+    u"""Apaga um socket abandonado em 'caminho'; levanta socket.error se
+    houver um servidor atendendo nele ou se lá houver outro tipo de arquivo."""
+    if not os.path.exists(caminho):
+        return
+    if not stat.S_ISSOCK(os.stat(caminho).st_mode):
+        raise socket.error('%s existe e não é um socket' %caminho)
+    teste = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        teste.connect(caminho)
+    except socket.error:
+        os.remove(caminho)  # ninguém atende: socket abandonado
+    else:
+        raise socket.error('já há um servidor atendendo em %s' %caminho)
+    finally:
+        teste.close()
+
+
+class CacheLRU(object):
+    u"Resultados por chave; o usado há mais tempo sai quando passa de 'tamanho'."
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self.itens = OrderedDict()
+
+    def __contains__(self, chave):
+        return chave in self.itens
+
+    def __getitem__(self, chave):
+        valor = self.itens.pop(chave)
+        self.itens[chave] = valor
+        return valor
+
+    def __setitem__(self, chave, valor):
+        self.itens.pop(chave, None)
+        self.itens[chave] = valor
+        if len(self.itens) > self.tamanho:
+            self.itens.popitem(last = False)
+
+
+#**********************************************************************************
+
+class _Conexao(asynchat.async_chat):
+
+    def __init__(self, sock, servidor):
+        asynchat.async_chat.__init__(self, sock, map = servidor.mapa)
+        self.servidor = servidor
+        self.entrada = []
+        self.set_terminator('\n')
+
+    def collect_incoming_data(self, dados):
+        self.entrada.append(dados)
+
+    def found_terminator(self):
+        linha, self.entrada = ''.join(self.entrada), []
+        self.servidor.pendentes.append((self, linha))
+
+    def handle_error(self):
+        self.close()
+
+
+class Servidor(asyncore.dispatcher):
+    u"""
+    Servidor de propriedades no socket Unix 'caminho', com um cache LRU de
+    'tamanho' resultados. janela é o tempo (s) que o servidor ainda espera,
+    depois do primeiro pedido de uma volta, por outros pedidos do mesmo lote.
+    """
+
+    def __init__(self, caminho = CAMINHO, tamanho = 100000, janela = 0.001):
+        self.mapa = {}
+        asyncore.dispatcher.__init__(self, map = self.mapa)
+        _libera(caminho)
+        self.create_socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.bind(caminho)
+        self.listen(64)
+        self.caminho = caminho
+        self.cache = CacheLRU(tamanho)
+        self.janela = janela
+        self.pendentes = []
+        self.lotes = 0     # lotes atendidos
+        self.pedidos = 0   # pedidos atendidos
+        self.solucoes = 0  # pedidos que não estavam no cache
+
+    def handle_accept(self):
+        par = self.accept()
+        if par is not None:
+            _Conexao(par[0], self)
+
+    def serve(self, voltas = None):
+        u"Atende pedidos até ser interrompido (ou por 'voltas' voltas do laço)."
+        try:
+            while voltas is None or voltas > 0:
+                asyncore.loop(1.0, map = self.mapa, count = 1)
+                if self.pendentes and self.janela:
+                    asyncore.loop(self.janela, map = self.mapa, count = 1)
+                if self.pendentes:
+                    self.atende()
+                if voltas is not None:
+                    voltas -= 1
+        finally:
+            if voltas is None:
+                self.fecha()
+
+    def fecha(self):
+        for conexao in self.mapa.values():
+            conexao.close()
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+    def atende(self):
+        u"Resolve, em lote, todos os pedidos pendentes e envia as respostas."
+        pendentes, self.pendentes = self.pendentes, []
+        chaves = []
+        for conexao, linha in pendentes:
+            try:
+                chaves.append(_chave(json.loads(linha)))
+            except Exception, erro:
+                chaves.append(erro)
+
+        # As respostas do lote ficam num dicionário local: guardar os
+        # resultados novos no cache pode tirar dele um acerto deste lote...
+        respostas = {}
+        novas = OrderedDict()
+        for chave in chaves:
+            if isinstance(chave, Exception) or chave in respostas or chave in novas:
+                continue
+            if chave in self.cache:
+                respostas[chave] = self.cache[chave]
+            else:
+                novas[chave] = None
+        respostas.update(self._resolve(novas.keys()))
+
+        for (conexao, linha), chave in zip(pendentes, chaves):
+            if not isinstance(chave, Exception):
+                chave = respostas[chave]
+            if isinstance(chave, Exception):
+                resposta = {'erro' : '%s: %s' %(chave.__class__.__name__, chave)}
+            else:
+                resposta = {'r' : chave}
+            if conexao.connected:
+                conexao.push(json.dumps(resposta) + '\n')
+        self.lotes += 1
+        self.pedidos += len(pendentes)
+        self.solucoes += len(novas)
+
+    def _resolve(self, chaves):
+        u"""Dicionário com o resultado (ou a exceção) de cada chave: os
+        pedidos fora da saturação, por propriedade, e os de Psat e Tsat sem
+        polir são avaliados juntos; os demais, um a um. Só os resultados vão
+        para o cache: um erro (talvez passageiro) não fica guardado."""
+        resultados = {}
+        grupos = {}
+        for chave in chaves:
+            if chave[0] in PROPS and chave[3] == 'nada':
+                grupos.setdefault(chave[0], []).append(chave)
+            elif chave[0] in SATURACAO and not chave[2]:
+                grupos.setdefault(chave[0], []).append(chave)
+            else:
+                resultados[chave] = _tenta(chave)
+
+        for nome, grupo in grupos.items():
+            try:
+                if nome in PROPS:
+                    valores = PA._lote(nome, array([c[1] for c in grupo]),
+                                       array([c[2] for c in grupo]))
+                else:
+                    valores = getattr(PA, nome)(array([c[1] for c in grupo]))
+            except Exception:
+                # Um ponto com erro não derruba o lote: um a um...
+                for chave in grupo:
+                    resultados[chave] = _tenta(chave)
+            else:
+                for chave, valor in zip(grupo, valores):
+                    resultados[chave] = float(valor)
+
+        for chave, valor in resultados.items():
+            if not isinstance(valor, Exception):
+                self.cache[chave] = valor
+        return resultados
+
+
+#**********************************************************************************
+
+class Cliente(object):
+    u"""
+    Conexão com um Servidor no socket Unix 'caminho'. Os métodos v, h, s, u,
+    Psat e Tsat têm as assinaturas das funções de propriedades_agua (com
+    argumentos escalares); erros do servidor são levantados como ValueError.
+    """
+
+    def __init__(self, caminho = CAMINHO):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(caminho)
+        self.entrada = self.sock.makefile('rb')
+
+    def varios(self, pedidos):
+        u"""Envia todos os pedidos [(nome, argumentos...), ...] de uma vez e
+        retorna a lista dos resultados, na mesma ordem."""
+        self.sock.sendall(''.join([json.dumps(list(p)) + '\n' for p in pedidos]))
+        resultados = []
+        for p in pedidos:
+            resposta = json.loads(self.entrada.readline())
+            if 'erro' in resposta:
+                raise ValueError(resposta['erro'])
+            resultados.append(resposta['r'])
+        return resultados
+
+    def _pede(self, *pedido):
+        return self.varios([pedido])[0]
+
+    def v(self, T, P = 1.0, Fase_sat = 'nada'):
+        return self._pede('v', T, P, Fase_sat)
+
+    def h(self, T, P = 1.0, Fase_sat = 'nada'):
+        return self._pede('h', T, P, Fase_sat)
+
+    def s(self, T, P = 1.0, Fase_sat = 'nada'):
+        return self._pede('s', T, P, Fase_sat)
+
+    def u(self, T, P = 1.0, Fase_sat = 'nada'):
+        return self._pede('u', T, P, Fase_sat)
+
+    def Psat(self, T, polir = False):
+        return self._pede('Psat', T, polir)
+
+    def Tsat(self, P, polir = False):
+        return self._pede('Tsat', P, polir)
+
+    def fecha(self):
+        self.entrada.close()
+        self.sock.close()
+
+
+if __name__ == '__main__':
+
+    argumentos = sys.argv[1:]
+    nivel = None
+    if '--tabela' in argumentos:
+        i = argumentos.index('--tabela')
+        nivel = argumentos[i + 1]
+        del argumentos[i:i + 2]
+    if '--perfil' in argumentos:
+        i = argumentos.index('--perfil')
+        PA.usar_perfil(argumentos[i + 1])
+        del argumentos[i:i + 2]
+    if nivel is not None:
+        PA.usar_tabela(nivel)
+
+    servidor = Servidor(*argumentos[:1])
+    sys.stderr.write('propriedades_agua em %s\n' %servidor.caminho)
+    try:
+        servidor.serve()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,216 @@
+# -*- coding:utf-8 -*-
+u"""
+        PROPRIEDADES TABELADAS COM INTERPOLAÇÃO BICÚBICA:
+Alternativa às soluções de Lee-Kesler/Wu-Stiel para v, u, h e s fora da
+saturação (líquido comprimido e vapor superaquecido). As propriedades são
+calculadas uma única vez numa malha em (ln P, tau), uma para cada fase,
+separadas pela linha de saturação:
+    líquido: tau = (T - Tmin)/(Ts(P) - Tmin)
+    vapor:   tau = (T - Ts(P))/(Tmax - Ts(P))
+onde Ts(P) é a temperatura de saturação (acima da pressão de saturação
+máxima da curva, Ts é a temperatura final da curva), de modo que nenhuma
+célula atravessa a linha de saturação. As malhas são gravadas como .npy e
+abertas com numpy.load(..., mmap_mode='r') (numpy.memmap): nada é copiado
+para a memória e vários processos compartilham as mesmas páginas.
+A leitura é por interpolação de Lagrange cúbica nas duas direções
+(estêncil 4x4). O nível de precisão escolhe a densidade da malha.
+Fora da malha (P ou T fora dos limites da construção) o resultado é nan:
+não há extrapolação. O arquivo de metadados guarda os limites e a versão
+do modelo (modelo: texto dado por quem constrói, por exemplo a versão dos
+coeficientes da equação de estado); abre reconstrói as malhas quando eles
+não são os pedidos.
+"""
+
+import os
+from numpy import array,asarray,atleast_1d,linspace,log,exp,clip
+from numpy import floor,empty,zeros,where,maximum,load,save,dtype,nan
+from numpy.random import RandomState
+
+VERSAO = 2 # mude sempre que a construção das malhas mudar
+
+NIVEIS = {'baixa' : (24, 24),     # pontos em (ln P, tau) por fase
+          'media' : (64, 64),
+          'alta'  : (160, 160)}
+
+PROPS = ('v', 'u', 'h', 's')
+FASES = ('liq', 'vap')
+
+_META = dtype([('versao', int), ('modelo', 'S128'), ('lnPmin', float), ('lnPmax', float),
+               ('Tmin', float), ('Tmax', float), ('Pmax_sat', float), ('Ts_max', float),
+               ('erro', float)])
+
+
+def _arquivos(diretorio, nivel):
+    base = os.path.join(diretorio, 'tabela_%s' %nivel)
+    return base + '_meta.npy', dict([(f, base + '_%s.npy' %f) for f in FASES])
+
+def _le_meta(meta):
+    u"""Metadados gravados em 'meta' (um registro de _META), ou None se o
+    arquivo for de outra versão de tabela_interp."""
+    m = load(meta)
+    if m.dtype != _META or int(m['versao']) != VERSAO:
+        return None
+    return m[()]
+
+def _pesos(x, n):
+    u"""Para x em unidades de índice da malha (0 a n-1), retorna o início
+    i0 do estêncil de 4 pontos (sempre dentro da malha) e os 4 pesos de
+    Lagrange cúbicos, cada um com a forma de x."""
+    i0 = clip(floor(x).astype(int) - 1, 0, n - 4)
+    u = x - i0
+    return i0, ((u - 1)*(u - 2)*(u - 3)/-6., u*(u - 2)*(u - 3)/2.,
+                u*(u - 1)*(u - 3)/-2., u*(u - 1)*(u - 2)/6.)
+
+
+class TabelaInterp(object):
+    u"""
+    Malhas de um nível de precisão, já gravadas em 'diretorio' (ver constroi).
+    Tsat(P) é a temperatura de saturação (K) à pressão P (Pa), aceitando
+    arrays, usada para separar as fases como na construção.
+    """
+
+    def __init__(self, diretorio, nivel, Tsat):
+        meta, arquivos = _arquivos(diretorio, nivel)
+        m = _le_meta(meta)
+        if m is None:
+            raise ValueError('%s foi gerado por outra versão de tabela_interp' %meta)
+        (self.lnPmin, self.lnPmax, self.Tmin, self.Tmax,
+         self.Pmax_sat, self.Ts_max) = [float(m[k]) for k in _META.names[2:8]]
+        self.modelo = str(m['modelo'])
+        self.erro = float(m['erro']) # maior erro relativo medido na construção
+        self.Tsat = Tsat
+        self.malhas = dict([(f, load(arquivos[f], mmap_mode = 'r')) for f in FASES])
+
+    def _Ts(self, P):
+        return where(P > self.Pmax_sat, self.Ts_max,
+                     self.Tsat(clip(P, exp(self.lnPmin), self.Pmax_sat)))
+
+    def __call__(self, prop, T, P):
+        u"""Propriedade prop ('v', 'u', 'h' ou 's') em T (K) e P (Pa),
+        escalares ou arrays de mesma forma; mesmas unidades de v, u, h, s.
+        nan nos pontos fora da malha."""
+        T = asarray(T, dtype=float)
+        P = asarray(P, dtype=float)
+        escalar = T.ndim == 0 and P.ndim == 0
+        T, P = atleast_1d(T, P)
+        T, P = T + 0.*P, P + 0.*T
+        k = PROPS.index(prop)
+
+        lnP = log(maximum(P, 1e-300))
+        dentro = ((lnP >= self.lnPmin) & (lnP <= self.lnPmax) &
+                  (T >= self.Tmin) & (T <= self.Tmax))
+        Ts = self._Ts(P)
+        liq = T <= Ts
+        tau = where(liq, (T - self.Tmin)/maximum(Ts - self.Tmin, 1e-12),
+                         (T - Ts)/maximum(self.Tmax - Ts, 1e-12))
+
+        y = empty(T.shape)
+        y[~dentro] = nan
+        for fase, m in (('liq', liq & dentro), ('vap', ~liq & dentro)):
+            if m.any():
+                y[m] = self._interpola(self.malhas[fase][k], lnP[m], tau[m])
+
+        if escalar:
+            return y[0]
+        return y
+
+    def _interpola(self, G, lnP, tau):
+        nP, nT = G.shape
+        iP, wP = _pesos((lnP - self.lnPmin)/(self.lnPmax - self.lnPmin)*(nP - 1), nP)
+        iT, wT = _pesos(tau*(nT - 1), nT)
+
+        y = 0.
+        for a in range(4):
+            for b in range(4):
+                y = y + wP[a]*wT[b]*G[iP + a, iT + b]
+        return y
+
+
+#**********************************************************************************
+
+def constroi(diretorio, nivel, estado, saturado, Tsat, Pmin, Pmax, Tmin, Tmax, Pmax_sat,
+             modelo = ''):
+    u"""
+    Calcula e grava as malhas do nível 'nivel' em 'diretorio'.
+    modelo: texto que identifica o modelo das propriedades, gravado com as
+            malhas (ver abre).
+    estado(T, P) -> objeto com v, u, h, s fora da saturação (T em K, P em Pa);
+    saturado(P) -> objeto com Tsat e as fases .liq e .vap saturadas, usadas
+                   nos nós sobre a linha de saturação (P <= Pmax_sat);
+    Tsat(P)     -> temperatura de saturação (K) usada na separação das fases.
+    O erro relativo máximo (em v, u, h e s) é medido em pontos que não são
+    nós e gravado junto com a malha.
+    """
+    nP, nT = NIVEIS[nivel]
+    meta, arquivos = _arquivos(diretorio, nivel)
+    lnP = linspace(log(Pmin), log(Pmax), nP)
+    tau = linspace(0., 1., nT)
+    Ts_max = float(Tsat(Pmax_sat))
+
+    def Ts(P):
+        return Ts_max if P > Pmax_sat else float(Tsat(P))
+
+    def props(obj):
+        return [getattr(obj, p) for p in PROPS]
+
+    for fase in FASES:
+        G = zeros((len(PROPS), nP, nT))
+        for i, P in enumerate(exp(lnP)):
+            sat = saturado(P) if P <= Pmax_sat else None
+            for j, t in enumerate(tau):
+                if fase == 'liq':
+                    if sat is not None and j == nT - 1:
+                        G[:, i, j] = props(sat.liq)
+                        continue
+                    T = Tmin + t*(Ts(P) - Tmin)
+                else:
+                    if sat is not None and j == 0:
+                        G[:, i, j] = props(sat.vap)
+                        continue
+                    T = Ts(P) + t*(Tmax - Ts(P))
+                G[:, i, j] = props(estado(T, P))
+        save(arquivos[fase], G)
+
+    save(meta, array((VERSAO, modelo, lnP[0], lnP[-1], Tmin, Tmax, Pmax_sat, Ts_max, 0.),
+                     dtype = _META))
+
+    # Erro medido fora dos nós, contra a solução completa, relativo ao
+    # valor exato (ou a 0.1% do maior valor da malha, perto de zero)...
+    tabela = TabelaInterp(diretorio, nivel, Tsat)
+    escala = [1e-3*max([abs(tabela.malhas[f][k]).max() for f in FASES])
+              for k in range(len(PROPS))]
+    sorteio = RandomState(0)
+    erro = 0.
+    for n in range(100):
+        P = exp(sorteio.uniform(lnP[0], lnP[-1]))
+        T = sorteio.uniform(Tmin, Tmax)
+        if abs(T - Ts(P)) < 1e-3*Ts(P):
+            continue  # muito perto da saturação...
+        exato = props(estado(T, P))
+        for p, x, e in zip(PROPS, exato, escala):
+            erro = max(erro, abs(tabela(p, T, P) - x)/max(abs(x), e))
+
+    save(meta, array((VERSAO, modelo, lnP[0], lnP[-1], Tmin, Tmax, Pmax_sat, Ts_max, erro),
+                     dtype = _META))
+    return TabelaInterp(diretorio, nivel, Tsat)
+
+def _gravadas(meta, Pmin, Pmax, Tmin, Tmax, Pmax_sat, modelo = '', **outros):
+    u"""Se as malhas gravadas (metadados em 'meta') foram construídas com
+    estes limites e este modelo."""
+    if not os.path.exists(meta):
+        return False
+    m = _le_meta(meta)
+    if m is None or str(m['modelo']) != modelo:
+        return False
+    pedidos = (log(Pmin), log(Pmax), Tmin, Tmax, Pmax_sat)
+    gravados = [float(m[k]) for k in _META.names[2:7]]
+    return all([abs(a - b) <= 1e-12*abs(b) for a, b in zip(gravados, pedidos)])
+
+def abre(diretorio, nivel, Tsat, **construcao):
+    u"""Abre as malhas de 'nivel', construindo-as antes (com os argumentos
+    de constroi) se ainda não existirem em 'diretorio' ou se as gravadas
+    forem de outra versão, de outros limites ou de outro modelo."""
+    meta, arquivos = _arquivos(diretorio, nivel)
+    if not _gravadas(meta, **construcao):
+        return constroi(diretorio, nivel, Tsat = Tsat, **construcao)
+    return TabelaInterp(diretorio, nivel, Tsat)
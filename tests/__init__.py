@@ -0,0 +1,9 @@
+# -*- coding:utf-8 -*-
+u"""
+        TESTES:
+Testes de comportamento (unittest), executados do diretório do projeto:
+
+    python -m unittest discover -s tests -t .
+
+Os que dependem de LK.H_S são pulados se ele não existir.
+"""
@@ -0,0 +1,95 @@
+# -*- coding:utf-8 -*-
+u"""Testes de LK_WS_NR: derivadas analíticas contra diferenças finitas, o
+caminho escalar contra o lote e Keenan vetorizado contra o laço original."""
+
+import unittest
+from math import e
+from numpy import array,linspace,meshgrid
+import LK_WS_NR as LK
+
+
+def keenan_laco(A, Ta, Ra, rw, t):
+    u"Q, DQ e DQT de Keenan pelo laço da primeira versão de WuStiel."
+    Q, DQ, DQT = 0., 0., 0.
+    for j in range(7):
+        EX = e**(-4.8*rw)*(A[8,j] + A[9,j]*rw)
+        DEX = e**(-4.8*rw)*(-4.8*(A[8,j] + A[9,j]*rw) + A[9,j])
+        QS, DQS = 0., 0.
+        for i in range(8):
+            QS += A[i,j]*(rw - Ra[j])**(i)
+            DQS += (i)*A[i,j]*(rw - Ra[j])**(i-1)
+        Q += (t - Ta[j])**(j-1)*(QS + EX)*(t - Ta[0])
+        DQ += (t - Ta[j])**(j-1)*(DQS + DEX)*(t - Ta[0])
+        DQT += ((t - Ta[j])**(j-1)*(QS + EX) +
+                (j-1)*(t - Ta[j])**(j-2)*(QS + EX)*(t - Ta[0]))
+    return Q, DQ, DQT
+
+
+class TesteLeeKesler(unittest.TestCase):
+
+    def setUp(self):
+        self.lk = LK.Lee_Kesler()
+        Tr, vr = meshgrid(linspace(0.5, 2.5, 9), linspace(0.05, 20., 11))
+        self.Tr, self.vr = Tr.ravel(), vr.ravel()
+
+    def test_dBCD_lote(self):
+        h = 1e-6
+        dB, dC, dD = self.lk.dBCD_lote(self.Tr)
+        mais = self.lk.BCD_lote(self.Tr*(1 + h))
+        menos = self.lk.BCD_lote(self.Tr*(1 - h))
+        for d, a, b in zip((dB, dC, dD), mais, menos):
+            fd = (a - b)/(2*h*self.Tr)
+            self.assertTrue((abs(d - fd) <= 1e-6*abs(fd) + 1e-9).all())
+
+    def test_dZ_lote(self):
+        h = 1e-6
+        dZdvr, dZdTr = self.lk.dZ_lote(self.Tr, self.vr)
+        fd_v = (self.lk.Z_lote(self.Tr, self.vr*(1 + h)) -
+                self.lk.Z_lote(self.Tr, self.vr*(1 - h)))/(2*h*self.vr)
+        fd_T = (self.lk.Z_lote(self.Tr*(1 + h), self.vr) -
+                self.lk.Z_lote(self.Tr*(1 - h), self.vr))/(2*h*self.Tr)
+        self.assertTrue((abs(dZdvr - fd_v) <= 1e-5*abs(fd_v) + 1e-8).all())
+        self.assertTrue((abs(dZdTr - fd_T) <= 1e-5*abs(fd_T) + 1e-8).all())
+
+    def test_escalar_igual_ao_lote(self):
+        lk = self.lk
+        for id in (0, 1):
+            Z = lk.Z_lote(self.Tr, self.vr, id)[0]
+            dZdvr, dZdTr = [d[0] for d in lk.dZ_lote(self.Tr, self.vr, id)]
+            for i in range(len(self.Tr)):
+                tr, vr = float(self.Tr[i]), float(self.vr[i])
+                self.assertAlmostEqual(lk.Z(tr, vr, id), Z[i], 12)
+                self.assertAlmostEqual(lk.dZdvr(tr, vr, id), dZdvr[i], 10)
+                self.assertAlmostEqual(lk.dZdTr(tr, vr, id), dZdTr[i], 10)
+
+
+class TesteKeenan(unittest.TestCase):
+
+    def test_vetorizado_igual_ao_laco(self):
+        ws = LK.WuStiel()
+        rw = linspace(0.001, 1.1, 15)
+        t = 1000./linspace(300., 1200., 7)
+        R, T = meshgrid(rw, t)
+        Q, DQ, DQT = ws.keenan(R, T)
+        for i in range(R.shape[0]):
+            for j in range(R.shape[1]):
+                q, dq, dqt = keenan_laco(ws.A, ws.Ta, ws.Ra, R[i,j], T[i,j])
+                self.assertAlmostEqual(Q[i,j]/q, 1., 10)
+                self.assertAlmostEqual(DQ[i,j]/dq, 1., 10)
+                self.assertAlmostEqual(DQT[i,j]/dqt, 1., 10)
+
+    def test_derivadas_agua_sem_lee_kesler(self):
+        u"""Para a água (w = W_AGUA, Y = 1), derivadas_lote é o próprio
+        Keenan, com ou sem a combinação de Wu-Stiel."""
+        Tr = array((0.5, 0.8, 1.2))
+        Pr = array((0.05, 0.5, 0.3))
+        liquido = array((True, True, False))
+        agua = LK.derivadas_lote(Tr, Pr, liquido)
+        quase = LK.derivadas_lote(Tr, Pr, liquido, w=LK.W_AGUA*(1 + 1e-13))
+        for a, b in zip(agua, quase):
+            for x, y in zip(a, b):
+                self.assertAlmostEqual(x/y, 1., 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*- coding:utf-8 -*-
+u"Testes de cache_eos.CacheEOS: versões, poda e a chave por perfil."
+
+import os
+import shutil
+import tempfile
+import unittest
+import LK_WS_NR as LK
+import robustNR_args as NR
+from cache_eos import CacheEOS
+
+
+def valores(x):
+    return tuple([x + i for i in range(len(LK.CAMPOS_HS))])
+
+
+class TesteCacheEOS(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.arquivo = os.path.join(self.diretorio, 'cache.sqlite')
+        self.cache = CacheEOS(self.arquivo)
+        self.outra = CacheEOS(self.arquivo)
+        self.outra.versao = 'outros coeficientes'
+
+    def tearDown(self):
+        for cache in (self.cache, self.outra):
+            if cache._conexao is not None:
+                cache._conexao.close()
+        shutil.rmtree(self.diretorio)
+
+    def test_versoes_isoladas(self):
+        chave = self.cache.chave(0.8, 0.1, None, LK.W_AGUA)
+        self.cache.guarda(chave, valores(1.))
+        self.assertEqual(self.cache.busca(chave), valores(1.))
+        self.assertEqual(self.outra.busca(chave), None)
+        self.outra.guarda(chave, valores(2.))
+        self.assertEqual(self.cache.busca(chave), valores(1.))
+        self.assertEqual(self.outra.busca(chave), valores(2.))
+        self.assertEqual((len(self.cache), len(self.outra)), (1, 1))
+        self.assertEqual((self.cache.acertos, self.cache.faltas), (2, 0))
+        self.assertEqual((self.outra.acertos, self.outra.faltas), (1, 1))
+
+    def test_poda(self):
+        for i in range(3):
+            self.outra.guarda(self.outra.chave(0.8, 0.1*(i + 1), None, LK.W_AGUA), valores(i))
+        self.cache.guarda(self.cache.chave(0.9, 0.1, None, LK.W_AGUA), valores(0.))
+        self.assertEqual(self.cache.poda(), 3)
+        self.assertEqual((len(self.cache), len(self.outra)), (1, 0))
+        self.assertEqual(self.cache.poda(), 0)
+
+    def test_chave_por_perfil(self):
+        chave = self.cache.chave(0.8, None, 0.5, LK.W_AGUA)
+        with NR.precisao('rascunho'):
+            rascunho = self.cache.chave(0.8, None, 0.5, LK.W_AGUA)
+            self.cache.guarda(rascunho, valores(1.))
+        self.assertNotEqual(chave, rascunho)
+        self.assertEqual(self.cache.busca(chave), None)
+        with NR.precisao('rascunho'):
+            self.assertEqual(self.cache.busca(self.cache.chave(0.8, None, 0.5, LK.W_AGUA)),
+                             valores(1.))
+
+    def test_nan_gravado(self):
+        chave = self.cache.chave(1.2, 0.5, None, LK.W_AGUA)
+        self.cache.guarda(chave, (float('nan'),) + valores(1.)[1:])
+        lido = self.cache.busca(chave)
+        self.assertTrue(lido[0] != lido[0])
+        self.assertEqual(lido[1:], valores(1.)[1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
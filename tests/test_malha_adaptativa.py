@@ -0,0 +1,42 @@
+# -*- coding:utf-8 -*-
+u"Testes de malha_adaptativa.refina."
+
+import unittest
+from numpy import exp,sin,linspace,interp,array,diff,median
+from malha_adaptativa import refina
+
+
+def f(x):
+    return (exp(x) + sin(3*x) + 2.,)
+
+
+class TesteRefina(unittest.TestCase):
+
+    def test_dentro_da_tolerancia(self):
+        u"""A interpolação linear entre as linhas mantidas fica perto de tol
+        em toda a faixa (o erro é testado só nos pontos médios, então pode
+        passar um pouco de tol entre eles)."""
+        x = linspace(0., 3., 20001)
+        y = array([f(xi)[0] for xi in x])
+        for tol in (1e-3, 1e-4):
+            malha = refina(f, linspace(0., 3., 4), tol)
+            self.assertTrue((diff(malha.x) > 0).all())
+            self.assertEqual(malha.y.shape, (len(malha.x), 1))
+            self.assertTrue(malha.avaliacoes >= len(malha.x))
+            erro = (abs(y - interp(x, malha.x, malha.y[:, 0]))/abs(y)).max()
+            self.assertTrue(erro <= 1.5*tol, erro)
+
+    def test_concentra_perto_de_tc(self):
+        u"Como na verificação do módulo: volume do vapor saturado modelo."
+        Tc, vc = 647.3, 0.00317
+        def v_vap(T):
+            tau = max(1. - T/Tc, 0.)
+            return (vc*exp(12.*(Tc/T - 1.))*(1. + tau**0.35),)
+        malha = refina(v_vap, linspace(273.16, Tc, 9), 1e-3)
+        dx = diff(malha.x)
+        self.assertTrue(dx[-1] < 0.1*median(dx))
+        self.assertTrue((malha.x > Tc - 1.).sum() >= 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
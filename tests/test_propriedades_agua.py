@@ -0,0 +1,44 @@
+# -*- coding:utf-8 -*-
+u"""Testes de propriedades_agua: flash_ph e flash_ps de volta aos estados
+de partida. Dependem de LK.H_S e são pulados sem ele."""
+
+import unittest
+import LK_WS_NR as LK
+import propriedades_agua as PA
+
+ESTADOS = ((350., 1e5, 'liq'), (500., 1e5, 'vap'), (400., 5e6, 'liq'), (700., 10e6, 'vap'))
+
+
+@unittest.skipUnless(hasattr(LK, 'H_S'), u'LK.H_S indisponível')
+class TesteFlash(unittest.TestCase):
+
+    def test_ida_e_volta(self):
+        for T, P, fase in ESTADOS:
+            for flash, prop in ((PA.flash_ph, PA.h), (PA.flash_ps, PA.s)):
+                r = flash(P, prop(T, P))
+                self.assertAlmostEqual(r.T/T, 1., 7)
+                self.assertEqual(r.P, P)
+                self.assertEqual(r.fase, fase)
+                self.assertTrue(r.x != r.x)
+
+    def test_mistura(self):
+        P = 1e5
+        sat = PA.saturacao(P = P)
+        for flash, nome in ((PA.flash_ph, 'h'), (PA.flash_ps, 's')):
+            yl, yv = getattr(sat.liq, nome), getattr(sat.vap, nome)
+            r = flash(P, 0.3*yl + 0.7*yv)
+            self.assertEqual(r.fase, 'sat')
+            self.assertEqual(r.T, sat.Tsat)
+            self.assertAlmostEqual(r.x, 0.7, 10)
+
+    def test_lote(self):
+        T = [t for t, p, f in ESTADOS]
+        P = [p for t, p, f in ESTADOS]
+        r = PA.flash_ph(P, [PA.h(t, p) for t, p in zip(T, P)])
+        self.assertEqual(list(r.fase), [f for t, p, f in ESTADOS])
+        for a, b in zip(r.T, T):
+            self.assertAlmostEqual(a/b, 1., 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
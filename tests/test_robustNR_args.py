@@ -0,0 +1,81 @@
+# -*- coding:utf-8 -*-
+u"Testes de robustNR_args: lote contra o escalar e a procura do intervalo."
+
+import math
+import unittest
+from numpy import array,linspace,sin,cos,log
+import robustNR_args as NR
+import LK_WS_NR as LK
+
+
+def sistema(x, args):
+    u"Sistema 3x3 do exemplo de robustNR_args, para uma linha ou um lote."
+    x1, x2, x3 = x[..., 0], x[..., 1], x[..., 2]
+    arg1, arg2 = args
+    return array((x1**2 - sin(2*x2) - .3*log(x3) - 0.42721880871 + arg1,
+                  x2**3 + cos(2.*x1) + x3**(-1/2.) - 4.08060171632/arg2,
+                  0.5*x1**(2./3) + x2**(2./7) - cos(x3) - 2.7090061508)).T
+
+
+class TesteLote(unittest.TestCase):
+
+    def setUp(self):
+        self.avisos, NR.avisos[0] = NR.avisos[0], False
+
+    def tearDown(self):
+        NR.avisos[0] = self.avisos
+
+    def test_escalar_lee_kesler(self):
+        u"""robustNewton_lote dá, linha a linha, o vr' de robustNewton para a
+        equação de Lee-Kesler (fluido simples, chute de vapor)."""
+        lk = LK.Lee_Kesler()
+        Tr = linspace(0.7, 1.5, 40)
+        Pr = linspace(0.01, 2.0, 40)
+        F = lambda vr, args: lk.Z_lote(args[0], vr, 0)[0] - args[1]*vr/args[0]
+        J = lambda vr, args: lk.dZ_lote(args[0], vr, 0)[0][0] - args[1]/args[0]
+        for jacob in (J, None):
+            vr, ite, res = NR.robustNewton_lote(F, Tr/Pr, jacob=jacob, args=(Tr, Pr))
+            for i in range(len(Tr)):
+                sis = LK.newton_2(Tr[i], Pr[i], 0)
+                x = NR.robustNewton(sis.Z_, Tr[i]/Pr[i],
+                                    jacob=sis.dZ_ if jacob else None)[0]
+                self.assertAlmostEqual(vr[i]/x, 1., 7)
+            self.assertTrue((abs(res) <= NR.perfil()['xtol']).all())
+
+    def test_vetorial(self):
+        u"Lote de sistemas 3x3 com args diferentes, contra robustNewton."
+        args = (array((-1., -0.9, -1.1)), array((0.5, 0.5, 0.55)))
+        x0 = array([(1., 1., 1.)]*3)
+        x, ite, F = NR.robustNewton_lote(sistema, x0, args=args)
+        for i in range(3):
+            xi = NR.robustNewton(sistema, array((1., 1., 1.)),
+                                 args=(args[0][i], args[1][i]))[0]
+            for a, b in zip(x[i], xi):
+                self.assertAlmostEqual(a, b, 7)
+
+
+class TesteIntervalo(unittest.TestCase):
+
+    def test_sem_troca_de_sinal(self):
+        self.assertRaises(NR.SemTrocaDeSinal, NR.procura_intervalo,
+                          lambda x, args: x*x + 1., 1.)
+
+    def test_erro_da_funcao_nao_e_engolido(self):
+        u"""Um ValueError da própria função (erro de domínio) chega a quem
+        chamou, em vez de trocar o método em silêncio."""
+        fun = lambda x, args: math.log(x - 5.)
+        self.assertRaises(ValueError, LK._newton_escalar, fun, 1., None, True)
+        try:
+            LK._newton_escalar(fun, 1., None, True)
+        except NR.SemTrocaDeSinal:
+            self.fail(u'SemTrocaDeSinal no lugar do erro de domínio')
+        except ValueError:
+            pass
+
+    def test_raiz(self):
+        x, ite, F = NR.robustNewton_intervalo(lambda x, args: x**3 - 8., 1.)
+        self.assertAlmostEqual(x, 2., 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
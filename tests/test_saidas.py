@@ -0,0 +1,47 @@
+# -*- coding:utf-8 -*-
+u"Testes de saidas.SaidaNPY."
+
+import os
+import shutil
+import tempfile
+import unittest
+from collections import namedtuple
+from numpy import load
+from saidas import SaidaNPY
+
+Linha = namedtuple('Linha', 'T P h')
+
+
+class TesteSaidaNPY(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.arquivo = os.path.join(self.diretorio, 'tabela.npy')
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def test_legivel_a_cada_linha(self):
+        u"""O cabeçalho é reescrito a cada linha: numpy.load lê o arquivo,
+        ainda aberto, com todas as linhas já escritas."""
+        saida = SaidaNPY(self.arquivo)
+        linhas = [Linha(300. + i, 1e5*(i + 1), 0.1*i + 1./3) for i in range(5)]
+        for n, linha in enumerate(linhas):
+            saida.escreve(linha)
+            a = load(self.arquivo)
+            self.assertEqual(a.shape, (n + 1,))
+            self.assertEqual(a.dtype.names, Linha._fields)
+            for lida, escrita in zip(a, linhas):
+                self.assertEqual(tuple(lida), tuple(escrita))
+        saida.fecha()
+        self.assertEqual(len(load(self.arquivo)), len(linhas))
+
+    def test_cabecalho_de_tamanho_fixo(self):
+        saida = SaidaNPY(self.arquivo)
+        saida.escreve(Linha(1., 2., 3.))
+        saida.fecha()
+        self.assertEqual(os.path.getsize(self.arquivo), SaidaNPY.TAM_CABECALHO + 3*8)
+
+
+if __name__ == '__main__':
+    unittest.main()
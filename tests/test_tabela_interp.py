@@ -0,0 +1,92 @@
+# -*- coding:utf-8 -*-
+u"""Testes de tabela_interp com um modelo analítico: valores dentro da
+malha, nan fora dela e reconstrução quando o modelo muda."""
+
+import shutil
+import tempfile
+import unittest
+from collections import namedtuple
+from numpy import log,array,isnan
+import tabela_interp
+
+Props = namedtuple('Props', 'v u h s')
+Sat = namedtuple('Sat', 'Tsat liq vap')
+
+LIMITES = dict(Pmin = 1e4, Pmax = 1e7, Tmin = 280., Tmax = 900., Pmax_sat = 5e6)
+
+
+def Tsat(P):
+    return 1./(1./373.15 - log(P/1e5)/4800.)
+
+def exato(T, P):
+    return Props(0.4615*T/P, 1.5*T + 1e-3*log(P), 2.*T + 2e-3*log(P), log(T) - 0.05*log(P))
+
+
+class Modelo(object):
+    u"estado e saturado de constroi, contando as avaliações de estado."
+
+    def __init__(self):
+        self.avaliacoes = 0
+
+    def estado(self, T, P):
+        self.avaliacoes += 1
+        return exato(T, P)
+
+    def saturado(self, P):
+        Ts = Tsat(P)
+        return Sat(Ts, exato(Ts, P), exato(Ts, P))
+
+    def construcao(self, modelo):
+        return dict(LIMITES, estado = self.estado, saturado = self.saturado, modelo = modelo)
+
+
+class TesteTabelaInterp(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.modelo = Modelo()
+        self.tabela = tabela_interp.abre(self.diretorio, 'baixa', Tsat,
+                                         **self.modelo.construcao('A'))
+
+    def tearDown(self):
+        del self.tabela
+        shutil.rmtree(self.diretorio)
+
+    def test_dentro_da_malha(self):
+        T = array((300., 450., 600., 850.))
+        P = array((2e4, 1e5, 3e6, 8e6))
+        for prop in tabela_interp.PROPS:
+            y = self.tabela(prop, T, P)
+            for t, p, yi in zip(T, P, y):
+                x = getattr(exato(t, p), prop)
+                self.assertTrue(abs(yi - x) <= 1e-3*abs(x), (prop, t, p, yi, x))
+        # o erro medido na construção inclui pontos perto de Pmax_sat, onde
+        # Ts(P) tem uma quina; no nível 'baixa' ele fica abaixo de 1%...
+        self.assertTrue(0. < self.tabela.erro < 1e-2)
+
+    def test_nan_fora_da_malha(self):
+        T = array((250., 400., 950., 400.))
+        P = array((1e5, 1e3, 1e5, 2e7))
+        self.assertTrue(isnan(self.tabela('h', T, P)).all())
+        self.assertTrue(isnan(self.tabela('v', 250., 1e5)))
+        self.assertFalse(isnan(self.tabela('v', 400., 1e5)))
+
+    def test_reabre_ou_reconstroi(self):
+        u"""Mesmo modelo e mesmos limites: só lê as malhas; outro modelo (ou
+        outros limites): constrói de novo."""
+        n = self.modelo.avaliacoes
+        self.assertTrue(n > 0)
+        tabela = tabela_interp.abre(self.diretorio, 'baixa', Tsat, **self.modelo.construcao('A'))
+        self.assertEqual(self.modelo.avaliacoes, n)
+        self.assertEqual(tabela.modelo, 'A')
+        tabela = tabela_interp.abre(self.diretorio, 'baixa', Tsat, **self.modelo.construcao('B'))
+        self.assertEqual(self.modelo.avaliacoes, 2*n)
+        self.assertEqual(tabela.modelo, 'B')
+        construcao = dict(self.modelo.construcao('B'), Tmax = 800.)
+        tabela = tabela_interp.abre(self.diretorio, 'baixa', Tsat, **construcao)
+        self.assertTrue(self.modelo.avaliacoes > 2*n)
+        self.assertEqual(tabela.Tmax, 800.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,515 +9,507 @@
    grama a equao de estado generalizada de Lee-Kesler e relaes en-
    tre as propriedades termodinmicas."""
 
-from math import *
+import sys
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
 import LK_WS_NR as LK
+import propriedades_agua as PA
+import saidas as SAI
+import malha_adaptativa as MA
+import instrumentacao as INS
+from math import exp,log
+from numpy import linspace
 
 
-"Constantes importantes da gua e companhia."
+"""As propriedades vm da biblioteca propriedades_agua.py; os nomes abaixo
+   continuam disponveis aqui para quem usava este programa como mdulo."""
 
-Tc = 647.3    # Kelvin
-Pc = 22.09 * pow(10,6) #Pa
-Ttri = 273.16 # Kelvin
-Ptri = 0.6113 * pow(10,3) #Pa
-MM = 18.015 # g/mol massa molecular
-w = 0.344   # Fator acntrico da gua
-R = 8.3145 #Constante universal dos gases em J/K.mol  
+from propriedades_agua import Tc,Pc,Ttri,Ptri,MM,w,R
+from propriedades_agua import v,h,s,u,Psat,Tsat,flash_ph,flash_ps,Flash
+from propriedades_agua import usar_tabela,usar_eos,usar_cache,usar_perfil,precisao
 
 
 
-"--------- FUNES QUE CALCULAM AS PROPRIEDADES TERMODINMICAS --------------"
 
+"----------------------------------TABELAS-------------------------------------------------------------------------------------------------------------------------"
 
-"Calcula a antidiferencial de Cp(T) para calcularmos integral SCp(T)dT."
 
-def Scp(T): # Cp(T)  dado em J/mol.K
-            
-    cp0 =  3.224 * pow(10, 1)  # Coeficientes do calor especfico para gua
-    cp1 =  1.924 * pow(10,-3)
-    cp2 =  1.055 * pow(10,-5) 
-    cp3 = -3.596 * pow(10,-9) 
+"""As tabelas so calculadas separadamente da sua formatao: os geradores
+   linhas_sat_temp, linhas_sat_press, linhas_vapor e linhas_liq_compr
+   produzem, uma a uma, linhas tipadas (LinhaSat ou LinhaEstado), que gera()
+   entrega s sadas assim que so calculadas: SaidaTexto (o leiaute de
+   sempre), ou SaidaCSV e SaidaNPY de saidas.py.
 
-    return cp0*T + cp1*pow(T,2)/2  +  cp2*pow(T,3)/3  +  cp3*pow(T,4)/4    
+   LinhaSat: T (Celsius), P (MPa) e v (m3/kg), u, h (kJ/kg) e s (kJ/kg.K)
+             do lquido saturado, da evaporao e do vapor saturado.
+   LinhaEstado: P (MPa), T (Celsius), V, U, H e S fora da saturao."""
 
+LinhaSat = namedtuple('LinhaSat', 'T P Vl Vv Ul Ulv Uv Hl Hlv Hv Sl Slv Sv')
+LinhaEstado = namedtuple('LinhaEstado', 'P T V U H S')
 
 
 
-'---------------------------------------------------------------------------'
 
-"Calcula a antidiferencial de Cp(T)/T para calcularmos SCp(T)/TdT."
+"""As linhas so calculadas uma a uma (tabelas 1 e 2) ou isobara a isobara
+   (tabelas 3 e 4). _mapa aplica essas funes em ordem, no prprio processo
+   (processos = 1) ou divididas entre vrios processos, com os resultados
+   na mesma ordem e idnticos aos da execuo serial. pedaco  o nmero de
+   itens enviados de cada vez a um processo."""
 
-def Scp_per_T(T):
+def _mapa( funcao , itens , processos = 1 , pedaco = 1 ):
 
-    cp0 =  3.224 * pow(10, 1)  # Coeficientes do calor especfico
-    cp1 =  1.924 * pow(10,-3)
-    cp2 =  1.055 * pow(10,-5) 
-    cp3 = -3.596 * pow(10,-9) 
+    if processos <= 1:
+        for item in itens:
+            yield funcao(item)
+        return
 
-    return cp0*log(T) + cp1*pow(T,1)  +  cp2*pow(T,2)/2  +  cp3*pow(T,3)/3   
+    pool = Pool(processos)
+    try:
+        for resultado in pool.imap(funcao, itens, pedaco):
+            yield resultado
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    pool.join()
 
 
 
 
-'----------------------------------------------------------------------------'
+def _linha_sat( T , P , sat ):
 
-"Funo que calcula volume especfico da gua"
+    # Propriedades do vapor saturado
+    Vv = sat.vap.v
+    Uv = sat.vap.u
+    Hv = sat.vap.h
+    Sv = sat.vap.s
 
-def v( T , P = 1.0 , Fase_sat = 'nada'): 
- 
-    Tr = T/Tc # Temperaturas e presses reduzidas
-    Pr = P/Pc
+    # Propriedades do lquido saturado
+    Vl = sat.liq.v
+    Ul = sat.liq.u
+    Hl = sat.liq.h
+    Sl = sat.liq.s
 
-    """O volume especfico  determinado pelo fator de compressibilidade
-       Z da gua em um determinado estado. Com Z, usamos ele na equao
-       de estado do gs ideal pv = RT ."""
+    # Propriedades para evaporao
+    Ulv = Uv - Ul
+    Hlv = Hv - Hl
+    Slv = Sv - Sl
 
-    if Fase_sat == 'nada': 
+    return LinhaSat(T,P,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)
 
-        Z = LK.H_S(Tr = Tr , Pr = Pr , w = 0.344).prop['Z']
-        v =  (Z*R*T) * 1000 / (MM * P) #m3/kg
-        return v
+def _linha_sat_temp(T):
 
-    elif Fase_sat == 'liq':
+    sat = PA.saturacao(T = T+273.15) #Uma s soluo por linha
 
-        Z = LK.H_S(Tr = Tr , x = 0.5 , w = 0.344).prop['Zl']
-        Psat = LK.H_S(Tr = Tr , x = 0.5 , w = 0.344).prop['Pr'] * Pc #Pa
-        
-        v = (Z*R*T) * 1000 / (MM * Psat) #m3/kg
-        return v
+    return _linha_sat(T, sat.Psat / 1000000, sat) #Presso de saturao em MPa
 
-    elif Fase_sat == 'vap':
+def _linha_sat_press(P):
 
-        Z = LK.H_S(Tr = Tr , x = 0.5 , w = 0.344).prop['Zv']
-        Psat = LK.H_S(Tr = Tr , x = 0.5 , w = 0.344).prop['Pr'] * Pc #Pa
-        
-        v = (Z*R*T) * 1000 / (MM * Psat) #m3/kg
-        return v
+    #Estado saturado na presso P, com Tsat em K
+    sat = PA.saturacao(P = 1000000.0*P)
 
+    return _linha_sat(sat.Tsat - 273.15, P, sat)
 
+"""Ao longo de uma isobara, com a continuao ligada (padro), cada soluo
+   parte da soluo da linha anterior (ou da extrapolao das duas ltimas),
+   e no do chute fixo de cada solver (ver LK.continuacao)."""
 
+_continuacao = {'ativa' : True , 'extrapola' : True}
 
-'----------------------------------------------------------------------------'
+def usar_continuacao( ativa = True , extrapola = True ):
 
-"""Funo que calcula ENTALPIA da gua na saturao, quando  lquido
-   comprimido ou vapor superaquecido. Deve ser especificada a fase no
-   caso de regio saturada."""
+    _continuacao['ativa'] = ativa
+    _continuacao['extrapola'] = extrapola
 
-def h( T , P = 1.0 , Fase_sat = 'nada'): 
- 
-    Tr = T/Tc # Temperaturas e presses reduzidas
-    Pr = P/Pc
+def _isobara( p , lista_T ):
 
-    """    Pelo princpio de igualdade de variao de entalpia de bases
-           diferentes, pode se calcular a entalpia da gua para qualquer
-           temperatura e presso, lembrando que a referncia para essa en-
-           talpia  o lquido saturado no ponto triplo da gua, arbitra-
-           riamente estabelecido como zero. Tambm se percebe que  ne-
-           cessrio dimensionalizar os desvios pelo termo R*Tc."""
-    
-    if Fase_sat == 'nada':  
-        
-        Dh = LK.H_S(Tr = Tr , Pr = Pr , w = w).prop['h']
-        # Desvio de entalpia para temperatura e presso solicitadas
+    #Temperatura de saturao em K
+    Tsat = PA.saturacao(P = 1000000.0*p).Tsat
 
-        Dh_tri = LK.H_S(Tr = Ttri/Tc , Pr = Ptri/Pc , w = w).prop['h']
-        # Desvio de entalpia do lquido saturado no ponto triplo da gua
+    if _continuacao['ativa']:
+        with LK.continuacao(_continuacao['extrapola']):
+            return _linhas_isobara(p, [Tsat-273.15]+lista_T)
+    return _linhas_isobara(p, [Tsat-273.15]+lista_T)
 
-        SCpdt = Scp(T)-Scp(Ttri) #Integral
+def _linhas_isobara( p , lista_T ):
 
-         
-        h = (Dh_tri - Dh) * R * Tc + SCpdt #J/mol
-        return h / MM # J/g ou kJ/kg
+    linhas = []
 
+    for T in lista_T:
 
-    elif Fase_sat == 'liq':
+        est = PA.estado(T = T+273.15, P = p * 1000000.) #MPa
+        linhas.append(LinhaEstado(p, T, est.v, est.u, est.h, est.s))
 
-        Dh = LK.H_S(Tr = Tr , x = 0.5 ,w = w).prop['hl']
-        # Desvio de entalpia do lquido para temperatura e presso solicitadas
+    return linhas
 
-        Dh_tri = LK.H_S(Tr = Ttri/Tc , x = 0.5 , w = w).prop['hl']
-        # Desvio de entalpia para lquido saturado no ponto triplo da gua
+def _isobara_vapor(p):
 
-        SCpdt = Scp(T)-Scp(Ttri) #Integral
+    return _isobara(p, range(375,1301,25))
 
-        h = (Dh_tri - Dh) * R * Tc + SCpdt #J/mol
-        return h / MM # J/g ou kJ/kg
+def _isobara_liq_compr(p):
 
-    elif Fase_sat == 'vap':
+    return _isobara(p, range(0,381,20))
 
-        Dh = LK.H_S(Tr = Tr , x = 0.5 ,w = w).prop['hv']
-        Dh_tri = LK.H_S(Tr = Ttri/Tc , x = 0.5 , w = w).prop['hl']
-        
-        SCpdt = Scp(T)-Scp(Ttri)
 
-        h = (Dh_tri - Dh) * R * Tc + SCpdt #J/mol
-        return h / MM #J/g ou kJ/kg
 
 
+"""Geradores das linhas de cada tabela."""
 
-"-----------------------------------------------------------------------------"
+def linhas_sat_temp( processos = 1 ):
 
-"""Funo que calcula ENTROPIA da gua na saturao, quando  lquido
-   comprimido ou vapor superaquecido. Deve ser especificada a fase no
-   caso de regio saturada."""
+    #Construo das temperaturas de entrada
 
-def s( T , P = 1.0 , Fase_sat = 'nada'): 
- 
-    Tr = T/Tc # Temperaturas e presses reduzidas
-    Pr = P/Pc
+    lista_T = range(5,371,5) #Lista homognea range(5,370,5)
 
-    """Pelas princpio de igualdade de variao de entropia de bases
-           diferentes, pode se calcular a entropia da gua para qualquer
-           temperatura e presso, lembrando que a referncia para a  en-
-           tropia  valor no lquido saturado do ponto triplo da gua,
-           arbitrariamente estabelecido como zero. Tambm se percebe que
-            necessrio dimensionalizar os desvios pelo termo R*Tc.""" 
+    #Inserindo valores no dados pelo range()
 
-    if Fase_sat == 'nada':
+    lista_T.insert(0,0.01)   #Temperatura do ponto triplo
+    lista_T.append(374.13)   #Temperatura quase crtica para no
+                             #dar indefinio no mdulo LK
 
-        Ds = LK.H_S(Tr = Tr , Pr = Pr , w = w).prop['s']
-        # Desvio de entropia para temperatura e presso solicitadas
+    return _mapa(_linha_sat_temp, lista_T, processos, 8)
 
-        Ds_tri = LK.H_S(Tr = Ttri/Tc , Pr = Ptri/Pc , w = w).prop['s']
-        # Desvio de entropia para lquido saturado no ponto triplo da gua                   
+def linhas_sat_press( processos = 1 ):
 
-        SCpTdt = Scp_per_T(T) - Scp_per_T(Ttri)
-        
-        s  = (Ds_tri - Ds) * R + ( SCpTdt ) -  R * log(P/Ptri) #J/K.mol
-        return s / MM # J/g.K ou kJ/kg.K
+    #Construo das presses de entrada
 
+    lista_P = [(0.5 + x * 0.5)/1000 for x in range(1,15)] #Tudo em MPa
+    lista_P = lista_P + [(5. + x * 5)/1000 for x in range(1,15)] # At 75 kPa
+    lista_P = lista_P + [0.075 + x * 0.025 for x in range(1,13)]#At 0.375 MPa
+    lista_P = lista_P + [0.35 + x * 0.05 for x in range(1,14)]#De 0.40 a 1.0 MPa
+    lista_P = lista_P + [1.10,1.20,1.30,1.4,1.50,1.75,2.0,2.25,2.5,3.0,3.5]
+    lista_P = lista_P + [ x for x in range(4,23)] #De 4 a 22 MPa
 
-    elif Fase_sat == 'liq':
+    #Inserindo valores no dados pelos range()
+    lista_P.insert(0,0.0006113) #Presso em MPa no ponto triplo
+    lista_P.append(22.08)    #Presso quase crtica para no
+                             #dar indefinio no mdulo LK
 
-        Ds = LK.H_S(Tr = Tr , x = 0.5 ,w = w).prop['sl']
-        # Desvio de entalpia para temperatura e presso solicitadas
+    return _mapa(_linha_sat_press, lista_P, processos, 8)
 
-        Ds_tri = LK.H_S(Tr = Ttri/Tc , x = 0.5 , w = w).prop['sl']
-        # Desvio de entalpia para lquido saturado no ponto triplo da gua
+#Presses das isobaras das tabelas 3 e 4
 
-        Psat = LK.H_S(Tr = Tr , x = 0.5 , w = 0.344).prop['Pr'] * Pc
-        #Presso de saturao para tal temperatura em Pa
+_ISOBARAS_VAPOR = [0.01,0.05] #Tudo em MPa
+_ISOBARAS_VAPOR = _ISOBARAS_VAPOR + [x * 0.10 for x in range(1,21)] # At 2.00 MPa
+_ISOBARAS_VAPOR = _ISOBARAS_VAPOR + [2.50,3.00,3.50,4.0,4.5,5.0,6.0,7.0,8.0,9.0,10.0]#MPa
+_ISOBARAS_VAPOR = _ISOBARAS_VAPOR + [12.5,15.0,17.5,20.0,25.0,30.0,35.0,40.0,50.0,60.0]#MPa
 
-        SCpTdt = Scp_per_T(T) - Scp_per_T(Ttri)
+_ISOBARAS_LIQ_COMPR = [5.0,10,15,20,30] #Tudo em MPa
 
-        s  = (Ds_tri - Ds) * R + ( SCpTdt ) -  R * log(Psat/Ptri) #J/K.mol
-        return s / MM # J/g.K ou kJ/kg.K
+def linhas_vapor( processos = 1 ):
 
-    elif Fase_sat == 'vap':
+    for isobara in _mapa(_isobara_vapor, _ISOBARAS_VAPOR, processos):
+        for linha in isobara:
+            yield linha
 
-        Ds = LK.H_S(Tr = Tr , x = 0.5 ,w = w).prop['sv']
-        Ds_tri = LK.H_S(Tr = Ttri/Tc , x = 0.5 , w = w).prop['sl']
-        SCpTdt = Scp_per_T(T) - Scp_per_T(Ttri)
-        Psat = LK.H_S(Tr = Tr , x = 0.5 , w = 0.344).prop['Pr'] * Pc 
+def linhas_liq_compr( processos = 1 ):
 
-        s  = (Ds_tri - Ds) * R + ( SCpTdt ) -  R * log(Psat/Ptri) #J/K.mol
-        return s / MM #J/g.K ou kJ/kg.K
+    for isobara in _mapa(_isobara_liq_compr, _ISOBARAS_LIQ_COMPR, processos):
+        for linha in isobara:
+            yield linha
 
 
 
-"------------------------------------------------------------------------------"
 
-"""Funo que calcula ENERGIA INTERNA da gua na saturao, quando  lquido
-   comprimido ou vapor superaquecido. Deve ser especificada a fase no
-   caso de regio saturada."""
+"""Tabelas com malha adaptativa (malha_adaptativa.py): em vez dos passos
+   fixos, as linhas so escolhidas pelo erro da interpolao linear entre
+   linhas vizinhas, em v, h e s (no vapor e no lquido saturados, nas tabe-
+   las de saturao), relativo ao valor em cada linha e menor que
+   _adaptativa['tol'] (mude com usar_tolerancia); h e s, de zero arbitr-
+   rio, tm os pisos de _ESCALA_VHS (ver malha_adaptativa.refina). A
+   saturao vai do ponto triplo a 374.13 C (em T) ou
+   a 22.08 MPa (em ln P); as isobaras so as mesmas das tabelas 3 e 4, do
+   vapor a 0.01 C acima de Tsat (ou de 375 C, acima de 22.08 MPa) at
+   1300 C e do lquido de 0 C at 0.01 C abaixo de Tsat (ou 380 C).
+   O refinamento de cada linha de saturao  feito num s processo; as
+   isobaras so divididas entre os processos."""
 
-def u( T , P = 1.0 , Fase_sat = 'nada'): 
- 
-    Tr = T/Tc # Temperaturas e presses reduzidas
-    Pr = P/Pc
+_adaptativa = {'tol' : 1e-3}
 
-    """Para calcular energia interna usamos a definio de entalpia
-       H = U + PV, no caso, usando como referncia o lquido saturado
-       no ponto triplo da gua, onde a s, h e u so zero. Assim, a e-
-       nergia interna especfica  calculada por
-       u(T,P)=h(T,P)-(P*v(T,P)-Ptri*vtri)."""
+_ESCALA_VHS = (0., 10., 0.01) # pisos de v (m3/kg), h (kJ/kg) e s (kJ/kg.K)
 
-    if Fase_sat == 'nada': 
+def usar_tolerancia( tol = 1e-3 ):
 
-        h_ = h(T = T , P = P)  # J/g
-        v_ = v(T = T , P = P)  # m3/kg
-        vtri =  v(T = Ttri , Fase_sat = 'liq') #Vol. especfico do lq. m3/kg
-                                       
-        u = 1000 * h_ - (P * v_ - Ptri*vtri) #J/kg
-        return u / 1000 #kJ/kg
+    _adaptativa['tol'] = tol
 
+def _vhs( est ):
 
-    elif Fase_sat == 'liq':
+    return (est.v, est.h, est.s)
 
-        h_ = h(T = T , Fase_sat = 'liq')  # J/kg
-        v_ = v(T = T , Fase_sat = 'liq')  # m3/kg
-        vtri =  v(T = Ttri , Fase_sat = 'liq') #Vol. especfico do lq. m3/kg
-        Psat = LK.H_S(Tr = Tr , x = 0.5 , w = 0.344).prop['Pr'] * Pc #Pa
+def _vhs_sat( sat ):
 
-        u = 1000 * h_ - (Psat * v_ - Ptri*vtri) #J/kg
-        return u / 1000 #kJ/kg
+    return _vhs(sat.liq) + _vhs(sat.vap)
 
-    elif Fase_sat == 'vap':
+def linhas_sat_temp_adaptativa( processos = 1 ):
 
-        h_ = h(T = T , Fase_sat = 'vap')  # J/kg
-        v_ = v(T = T , Fase_sat = 'vap')  # m3/kg
-        vtri =  v(T = Ttri , Fase_sat = 'liq') #Vol. especfico do lq. m3/kg
-        Psat = LK.H_S(Tr = Tr , x = 0.5 , w = 0.344).prop['Pr'] * Pc #Pa
+    malha = MA.refina(lambda T: _vhs_sat(PA.saturacao(T = T+273.15)),
+                      linspace(0.01, 374.13, 9), _adaptativa['tol'], 2*_ESCALA_VHS)
+    for T in malha.x:
+        yield _linha_sat_temp(T)
 
-        u = 1000 * h_ - (Psat * v_ - Ptri*vtri) #J/kg
-        return u / 1000 #kJ/kg
+def linhas_sat_press_adaptativa( processos = 1 ):
 
+    malha = MA.refina(lambda lnP: _vhs_sat(PA.saturacao(P = 1000000.0*exp(lnP))),
+                      linspace(log(0.0006113), log(22.08), 9), _adaptativa['tol'], 2*_ESCALA_VHS)
+    for lnP in malha.x:
+        yield _linha_sat_press(exp(lnP))
 
+def _isobara_adaptativa( p , T0 ):
 
-"----------------------------------TABELAS-------------------------------------------------------------------------------------------------------------------------"
+    P = p * 1000000. #MPa
+    malha = MA.refina(lambda T: _vhs(PA.estado(T = T+273.15, P = P)), T0,
+                      _adaptativa['tol'], _ESCALA_VHS)
+    return _linhas_isobara(p, list(malha.x))
 
+def _isobara_vapor_adaptativa(p):
 
-"""Essa funo gera a tabela das propriedades termodinmicas
-   da gua saturada em funo da temperatura"""
+    if p < 22.08:
+        T0 = PA.saturacao(P = 1000000.0*p).Tsat - 273.15 + 0.01
+    else:
+        T0 = 375.
+    return _isobara_adaptativa(p, linspace(T0, 1300., 9))
 
-def tab_ag_sat_temp():
-    
-    print '\t\t\t\t\t\t Tabela 1 - Agua Saturada em funcao da temperatura. \n'
-    print 'Temp.     Pressao|   Volume Especifico (m3/kg)    |      Energia Interna (kJ/kg)      |         Entalpia (kJ/kg)          |        Entropia (kJ/kg.K)' 
-    print '(Celsius)  (kPa) | Liquido sat.        Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat'
-    print '-' * 155
-    
-    #Construo das temperaturas de entrada
+def _isobara_liq_compr_adaptativa(p):
 
-    lista_T = range(5,371,5) #Lista homognea range(5,370,5)
+    if p < 22.08:
+        T1 = min(PA.saturacao(P = 1000000.0*p).Tsat - 273.15 - 0.01, 380.)
+    else:
+        T1 = 380.
+    return _isobara_adaptativa(p, linspace(0., T1, 5))
 
-    #Inserindo valores no dados pelo range()
+def linhas_vapor_adaptativa( processos = 1 ):
 
-    lista_T.insert(0,0.01)   #Temperatura do ponto triplo
-    lista_T.append(374.13)   #Temperatura quase crtica para no
-                             #dar indefinio no mdulo LK
+    for isobara in _mapa(_isobara_vapor_adaptativa, _ISOBARAS_VAPOR, processos):
+        for linha in isobara:
+            yield linha
 
+def linhas_liq_compr_adaptativa( processos = 1 ):
 
-    for T in lista_T : #Criando a tabela . . . ufa!
+    for isobara in _mapa(_isobara_liq_compr_adaptativa, _ISOBARAS_LIQ_COMPR, processos):
+        for linha in isobara:
+            yield linha
 
-        
 
-        # Propriedades do vapor saturado
-        Vv = v(T = T+273.15, Fase_sat='vap')
-        Uv = u(T = T+273.15, Fase_sat='vap')
-        Hv = h(T = T+273.15, Fase_sat='vap')
-        Sv = s(T = T+273.15, Fase_sat='vap')
 
-        # Propriedades do lquido saturado
-        Vl = v(T = T+273.15, Fase_sat='liq')
-        Ul = u(T = T+273.15, Fase_sat='liq')
-        Hl = h(T = T+273.15, Fase_sat='liq')
-        Sl = s(T = T+273.15, Fase_sat='liq')
-        
-        # Propriedades para evaporao
-        Ulv = Uv - Ul
-        Hlv = Hv - Hl
-        Slv = Sv - Sl
 
-        if T == 0.01:
+"--------------------------------------------------------------------------------------------------------------------------------------------------------------"
 
-            #Presso de saturao em kPa
-            Psat = LK.H_S(Tr = (T+273.15)/Tc, w=w, x=.5 ).prop['Pr']*Pc / 1000
+"""Leiaute em texto das tabelas, o mesmo impresso desde a primeira verso
+   do programa."""
 
-            print '%.2f\t%.5f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %(T,Psat,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)
+_CAB_SAT_TEMP = ('Temp.     Pressao|   Volume Especifico (m3/kg)    |      Energia Interna (kJ/kg)      |         Entalpia (kJ/kg)          |        Entropia (kJ/kg.K)',
+                 '(Celsius)  (%s) | Liquido sat.        Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat',
+                 '-' * 155)
 
-        if T == 374.13:
+_CAB_SAT_PRESS = ('Pressao   Temp.  |   Volume Especifico (m3/kg)    |      Energia Interna (kJ/kg)      |         Entalpia (kJ/kg)          |        Entropia (kJ/kg.K)',
+                  '(%s)   (celsius)| Liquido sat.        Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat',
+                  '-' * 155)
 
-            #Presso de saturao em MPa
-            Psat = LK.H_S(Tr = (T+273.15)/Tc, w=w, x=.5 ).prop['Pr']*Pc / 1000000
+_CAB_ISOBARA = ('<<PRESSAO>> = %.2f MPa || Temperatura(Celsius) | Volume Especifico (m3/kg) |  Energia Interna (kJ/kg) |  Entalpia (kJ/kg) | Entropia (kJ/kg.K)',
+                '-' * 141)
 
-            print '%.2f\t%.5f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %(T,Psat,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)
+def _cabecalho( cab , unidade ):
 
-        if T < 100 and T != 0.01:
- 
-            #Presso de saturao em kPa
-            Psat = LK.H_S(Tr = (T+273.15)/Tc, w=w, x=.5 ).prop['Pr']*Pc / 1000
+    return [cab[0], cab[1] %unidade, cab[2]]
 
-            print '%.0f\t%.5f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %(T,Psat,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)
+def _texto_sat_temp(l):
 
-        if T >= 100 and T != 374.13:
+    linhas = []
+    T = l.T
+    valores = (l.Vl,l.Vv,l.Ul,l.Ulv,l.Uv,l.Hl,l.Hlv,l.Hv,l.Sl,l.Slv,l.Sv)
 
-            #Presso de saturao em MPa
-            Psat = LK.H_S(Tr = (T+273.15)/Tc, w=w, x=.5 ).prop['Pr']*Pc / 1000000
+    if T == 0.01:
 
-            if T == 100 or T == 200:  
+        #Presso de saturao em kPa
+        linhas.append('%.2f\t%.5f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %((T,l.P*1000) + valores))
 
-                print '\n' 
-                print 'Temp.     Pressao|   Volume Especifico (m3/kg)    |      Energia Interna (kJ/kg)      |         Entalpia (kJ/kg)          |        Entropia (kJ/kg.K)' 
-                print '(Celsius)  (MPa) | Liquido sat.        Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat'
-                print '-' * 155
+    if T == 374.13:
 
-            print '%.0f\t%.5f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %(T,Psat,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)    
+        #Presso de saturao em MPa
+        linhas.append('%.2f\t%.5f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %((T,l.P) + valores))
 
-                                       
+    if T < 100 and T != 0.01:
 
+        #Presso de saturao em kPa
+        linhas.append('%.0f\t%.5f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %((T,l.P*1000) + valores))
 
+    if T >= 100 and T != 374.13:
 
+        if T == 100 or T == 200:
 
-"--------------------------------------------------------------------------------------------------------------------------------------------------------------"
+            linhas.append('\n')
+            linhas.extend(_cabecalho(_CAB_SAT_TEMP, 'MPa'))
 
-"""Essa funo gera a tabela das propriedades termodinmicas
-   da gua saturada em funo da presso"""
+        linhas.append('%.0f\t%.5f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %((T,l.P) + valores))
 
-def tab_ag_sat_press():
+    return linhas
 
-    print '\t\t\t\t\t\t Tabela 2 - Agua Saturada em funo da pressao. \n'
-    print 'Pressao   Temp.  |   Volume Especifico (m3/kg)    |      Energia Interna (kJ/kg)      |         Entalpia (kJ/kg)          |        Entropia (kJ/kg.K)' 
-    print '(kPa)   (celsius)| Liquido sat.        Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat'
-    print '-' * 155
+def _texto_sat_press(l):
 
+    linhas = []
+    P = l.P
+    valores = (l.T,l.Vl,l.Vv,l.Ul,l.Ulv,l.Uv,l.Hl,l.Hlv,l.Hv,l.Sl,l.Slv,l.Sv)
 
-    #Construo das presses de entrada
+    if P == 0.0006113:
 
-    lista_P = [(0.5 + x * 0.5)/1000 for x in range(1,15)] #Tudo em MPa
-    lista_P = lista_P + [(5. + x * 5)/1000 for x in range(1,15)] # At 75 kPa
-    lista_P = lista_P + [0.075 + x * 0.025 for x in range(1,13)]#At 0.375 MPa
-    lista_P = lista_P + [0.35 + x * 0.05 for x in range(1,14)]#De 0.40 a 1.0 MPa
-    lista_P = lista_P + [1.10,1.20,1.30,1.4,1.50,1.75,2.0,2.25,2.5,3.0,3.5]
-    lista_P = lista_P + [ x for x in range(4,23)] #De 4 a 22 MPa
-    
-    #Inserindo valores no dados pelos range()
-    lista_P.insert(0,0.0006113) #Presso em MPa no ponto triplo
-    lista_P.append(22.08)    #Presso quase crtica para no
-                             #dar indefinio no mdulo LK
+        P_ = P*1000 #Presso em kPa
 
+        linhas.append('%.4f\t%.2f    \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %((P_,) + valores))
 
-    for P in lista_P : #Criando a segunda tabela . . . yes!
+    if P == 22.08:
 
-        #Temperatura de saturao Tsat = T em K
-        T = LK.H_S(Pr = (1000000.0*P)/Pc, w=w, x=.5 ).prop['Tr']*Tc #T = Tsat em K
+        linhas.append('%.2f\t%.2f   \t%.6f \t %.6f    \t %.2f    %.1f   %.1f   \t%.2f      %.1f      %.1f    \t%.4f    %.4f    %.4f' %((P,) + valores))
 
-        # Propriedades do vapor saturado
-        Vv = v(T = T , Fase_sat='vap')
-        Uv = u(T = T , Fase_sat='vap')
-        Hv = h(T = T , Fase_sat='vap')
-        Sv = s(T = T , Fase_sat='vap')
+    if P < 0.100 and P != 0.0006113:
 
-        # Propriedades do lquido saturado
-        Vl = v(T = T , Fase_sat='liq')
-        Ul = u(T = T , Fase_sat='liq')
-        Hl = h(T = T , Fase_sat='liq')
-        Sl = s(T = T , Fase_sat='liq')
-        
-        # Propriedades para evaporao
-        Ulv = Uv - Ul
-        Hlv = Hv - Hl
-        Slv = Sv - Sl
+        P_= P*1000 #Presso em kPa
 
-        if P == lista_P[0]:
+        linhas.append('%.1f\t%.2f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %((P_,) + valores))
 
-            #Temperatura de saturao em K
-            T = LK.H_S(Pr = (1000000.0 * P)/Pc, w=w, x=.5 ).prop['Tr']*Tc 
-            P_ = P*1000 #Presso em kPa
+    if P >= 0.100 and P != 22.08:
 
-            print '%.4f\t%.2f    \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %(P_,T-273.15,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)
+        if P == 0.100 or P == 1.4:
 
-        if P == 22.08:
+            linhas.append('\n')
+            linhas.extend(_cabecalho(_CAB_SAT_PRESS, 'MPa'))
 
-            #Temperatura de saturao em K
-            T = LK.H_S(Pr = (1000000.0*P)/Pc, w=w, x=.5 ).prop['Tr']*Tc
+        linhas.append('%.3f\t%.2f   \t%.6f \t %.6f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %((P,) + valores))
 
-            print '%.2f\t%.2f   \t%.6f \t %.6f    \t %.2f    %.1f   %.1f   \t%.2f      %.1f      %.1f    \t%.4f    %.4f    %.4f' %(P,T-273.15,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)
+    return linhas
 
-        if P < 0.100 and P != lista_P[0]:
- 
-            #Temperatura de saturao em K
-            T = LK.H_S(Pr = (1000000.0*P)/Pc, w=w, x=.5 ).prop['Tr']*Tc
-            P_= P*1000 #Presso em kPa
+def _texto_isobara(l):
 
-            print '%.1f\t%.2f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %(P_,T-273.15,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)
+    return ['\t\t\t\t%.0f \t\t\t%.6f \t\t\t%.1f \t\t\t%.1f \t\t%.4f' %(l.T, l.V, l.U, l.H, l.S)]
 
-        if P >= 0.100 and P != 22.08:
+#Nas malhas adaptativas T e P no so redondos: mais casas decimais
 
-            #Temperatura de saturao em K
-            T = LK.H_S(Pr = (1000000.0*P)/Pc, w=w, x=.5 ).prop['Tr']*Tc
+def _texto_sat_temp_adaptativa(l):
 
-            if P == 0.100 or P == 1.4:  
+    valores = (l.T,l.P,l.Vl,l.Vv,l.Ul,l.Ulv,l.Uv,l.Hl,l.Hlv,l.Hv,l.Sl,l.Slv,l.Sv)
+    return ['%.3f\t%.6f   \t%.6f \t %.3f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %valores]
 
-                print '\n' 
-                print 'Pressao   Temp.  |   Volume Especifico (m3/kg)    |      Energia Interna (kJ/kg)      |         Entalpia (kJ/kg)          |        Entropia (kJ/kg.K)' 
-                print '(MPa)   (celsius)| Liquido sat.        Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat. | Liquido sat.   Evap.   Vapor sat'
-                print '-' * 155
+def _texto_sat_press_adaptativa(l):
 
-            print '%.3f\t%.2f   \t%.6f \t %.6f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %(P,T-273.15,Vl,Vv,Ul,Ulv,Uv,Hl,Hlv,Hv,Sl,Slv,Sv)                                                       
+    valores = (l.P,l.T,l.Vl,l.Vv,l.Ul,l.Ulv,l.Uv,l.Hl,l.Hlv,l.Hv,l.Sl,l.Slv,l.Sv)
+    return ['%.6f\t%.3f   \t%.6f \t %.6f    \t %.2f   %.1f   %.1f   \t%.2f       %.1f    %.1f    \t%.4f    %.4f    %.4f' %valores]
 
+def _texto_isobara_adaptativa(l):
 
+    return ['\t\t\t\t%.3f \t\t\t%.6f \t\t\t%.1f \t\t\t%.1f \t\t%.4f' %(l.T, l.V, l.U, l.H, l.S)]
 
+_TEXTO = {
+    'sat_temp'  : (['\t\t\t\t\t\t Tabela 1 - Agua Saturada em funcao da temperatura. \n'] +
+                   _cabecalho(_CAB_SAT_TEMP, 'kPa'), _texto_sat_temp),
+    'sat_press' : (['\t\t\t\t\t\t Tabela 2 - Agua Saturada em funo da pressao. \n'] +
+                   _cabecalho(_CAB_SAT_PRESS, 'kPa'), _texto_sat_press),
+    'vapor'     : (['\t\t\t\t\t\t Tabela 3 - Vapor de agua superaquecido. \n'], _texto_isobara),
+    'liq_compr' : (['\t\t\t\t\t\t Tabela 4 - Liquido comprimido. \n'], _texto_isobara),
+    'sat_temp_adaptativa'  : (['\t\t\t\t\t\t Tabela 1A - Agua Saturada em funcao da temperatura (malha adaptativa). \n'] +
+                              _cabecalho(_CAB_SAT_TEMP, 'MPa'), _texto_sat_temp_adaptativa),
+    'sat_press_adaptativa' : (['\t\t\t\t\t\t Tabela 2A - Agua Saturada em funcao da pressao (malha adaptativa). \n'] +
+                              _cabecalho(_CAB_SAT_PRESS, 'MPa'), _texto_sat_press_adaptativa),
+    'vapor_adaptativa'     : (['\t\t\t\t\t\t Tabela 3A - Vapor de agua superaquecido (malha adaptativa). \n'],
+                              _texto_isobara_adaptativa),
+    'liq_compr_adaptativa' : (['\t\t\t\t\t\t Tabela 4A - Liquido comprimido (malha adaptativa). \n'],
+                              _texto_isobara_adaptativa),
+    }
 
-"--------------------------------------------------------------------------------------------------------------------------------------------------------"
+class SaidaTexto(object):
 
-"""Essa funo gera a tabela das propriedades termodinmicas
-   do vapor d'gua superaquecido"""
+    """Escreve as linhas da tabela 'tabela' ('sat_temp', 'sat_press', 'vapor'
+       ou 'liq_compr', ou uma delas com '_adaptativa') no leiaute em texto,
+       em arquivo (por padro a sada padro). Nas tabelas 3 e 4 o cabea-
+       lho de cada isobara  escrito quando a presso muda."""
 
-def tab_vapor():
+    def __init__( self , tabela , arquivo = None ):
 
-    #Construo das presses de entrada
-
-    lista_P = [0.01,0.05] #Tudo em MPa
-    lista_P = lista_P + [x * 0.10 for x in range(1,21)] # At 2.00 MPa
-    lista_P = lista_P + [2.50,3.00,3.50,4.0,4.5,5.0,6.0,7.0,8.0,9.0,10.0]#MPa
-    lista_P = lista_P + [12.5,15.0,17.5,20.0,25.0,30.0,35.0,40.0,50.0,60.0]#MPa
+        self.titulo, self.formata = _TEXTO[tabela]
+        if arquivo is None:
+            arquivo = sys.stdout
+        elif isinstance(arquivo, basestring):
+            arquivo = open(arquivo, 'w')
+        self.arquivo = arquivo
+        self.isobaras = tabela.split('_adaptativa')[0] in ('vapor', 'liq_compr')
+        self.P = None
+        self._escreve(self.titulo)
 
-    print '\t\t\t\t\t\t Tabela 3 - Vapor de agua superaquecido. \n'
+    def _escreve( self , linhas ):
 
-    for p in lista_P:
-        
-        #Temperatura de saturao em K
-        Tsat = LK.H_S(Pr = (1000000.0*p)/Pc, w=w, x=.5 ).prop['Tr']*Tc
+        for linha in linhas:
+            self.arquivo.write(linha + '\n')
+        self.arquivo.flush()
 
-        
-        print '<<PRESSAO>> = %.2f MPa || Temperatura(Celsius) | Volume Especifico (m3/kg) |  Energia Interna (kJ/kg) |  Entalpia (kJ/kg) | Entropia (kJ/kg.K)' %p
-        print '-' * 141
+    def escreve( self , l ):
 
-        for T in [Tsat-273.15]+range(375,1301,25):
+        linhas = []
+        if self.isobaras and l.P != self.P:
+            self.P = l.P
+            linhas.extend([_CAB_ISOBARA[0] %l.P, _CAB_ISOBARA[1]])
+        self._escreve(linhas + self.formata(l))
 
-            #Propriedades do vapor superaquecido
-            S = s(T = T+273.15, P = p * 1000000.) #MPa
-            H = h(T = T+273.15, P = p * 1000000.)
-            V = v(T = T+273.15, P = p * 1000000.)
-            U = u(T = T+273.15, P = p * 1000000.)
+    def fecha( self ):
 
-            print '\t\t\t\t%.0f \t\t\t%.6f \t\t\t%.1f \t\t\t%.1f \t\t%.4f' %(T, V, U, H, S)
+        if self.arquivo is not sys.stdout:
+            self.arquivo.close()
 
-    
 
 
 
+"--------------------------------------------------------------------------------------------------------------------------------------------------------------"
 
+_LINHAS = {'sat_temp' : linhas_sat_temp , 'sat_press' : linhas_sat_press ,
+           'vapor' : linhas_vapor , 'liq_compr' : linhas_liq_compr ,
+           'sat_temp_adaptativa' : linhas_sat_temp_adaptativa ,
+           'sat_press_adaptativa' : linhas_sat_press_adaptativa ,
+           'vapor_adaptativa' : linhas_vapor_adaptativa ,
+           'liq_compr_adaptativa' : linhas_liq_compr_adaptativa}
 
+def gera( tabela , saidas , processos = 1 ):
 
+    """Calcula a tabela 'tabela' e entrega cada linha, assim que ela fica
+       pronta, a todas as sadas da lista 'saidas', fechando-as no final."""
 
+    try:
+        for linha in _LINHAS[tabela](processos):
+            for saida in saidas:
+                saida.escreve(linha)
+    finally:
+        for saida in saidas:
+            saida.fecha()
 
+def saida( tabela , arquivo = None ):
 
+    """Sada de acordo com a extenso do arquivo: .csv, .npy ou texto."""
 
+    if arquivo is not None and arquivo.endswith('.csv'):
+        return SAI.SaidaCSV(arquivo)
+    if arquivo is not None and arquivo.endswith('.npy'):
+        return SAI.SaidaNPY(arquivo)
+    return SaidaTexto(tabela, arquivo)
 
 
-"--------------------------------------------------------------------------------------------------------------------------------------------------------"
-    
-"""Essa funo gera a tabela das propriedades termodinmicas
-   da gua lquida comprimida"""
 
-def tab_liq_compr():
 
+"""Essas funes geram, em texto, as tabelas das propriedades termodinmicas
+   da gua saturada em funo da temperatura e da presso, do vapor d'gua
+   superaquecido e da gua lquida comprimida."""
 
-    #Construo das presses de entrada
+def tab_ag_sat_temp( processos = 1 ):
 
-    lista_P = [5.0,10,15,20,30] #Tudo em MPa
+    gera('sat_temp', [SaidaTexto('sat_temp')], processos)
 
-    print '\t\t\t\t\t\t Tabela 4 - Liquido comprimido. \n'
+def tab_ag_sat_press( processos = 1 ):
 
-    for p in lista_P:
-        
-        #Temperatura de saturao em K
-        Tsat = LK.H_S(Pr = (1000000.0*p)/Pc, w=w, x=.5 ).prop['Tr']*Tc
+    gera('sat_press', [SaidaTexto('sat_press')], processos)
 
-        
-        print '<<PRESSAO>> = %.2f MPa || Temperatura(Celsius) | Volume Especifico (m3/kg) |  Energia Interna (kJ/kg) |  Entalpia (kJ/kg) | Entropia (kJ/kg.K)' %p
-        print '-' * 141
+def tab_vapor( processos = 1 ):
 
-        for T in [Tsat-273.15]+range(0,381,20):
+    gera('vapor', [SaidaTexto('vapor')], processos)
 
-            #Propriedades do vapor superaquecido
-            S = s(T = T+273.15, P = p * 1000000.) #MPa
-            H = h(T = T+273.15, P = p * 1000000.)
-            V = v(T = T+273.15, P = p * 1000000.)
-            U = u(T = T+273.15, P = p * 1000000.)
+def tab_liq_compr( processos = 1 ):
 
-            print '\t\t\t\t%.0f \t\t\t%.6f \t\t\t%.1f \t\t\t%.1f \t\t%.4f' %(T, V, U, H, S)
+    gera('liq_compr', [SaidaTexto('liq_compr')], processos)
 
 
 
@@ -540,27 +532,56 @@ if __name__ == '__main__':
                     3) Vapor Super-aquecido
                     4) Liquido Comprimido
 
-                Obs: a tabela 3 demora uns 10min. pra ser feita!
-            """
-    
-    opc = raw_input()
-
-    if opc == '1':
-        tab_ag_sat_temp()
-
-    if opc == '2':
-        tab_ag_sat_press()
-
-    if opc == '3':
-        tab_vapor()
+                    5 a 8) As mesmas, com malha adaptativa (linhas onde
+                           a interpolao linear erra mais que 0.1%%)
 
-    if opc == '4':
-        tab_liq_compr()
-
-
-
-
-
-
-        
-        
+                Obs: a tabela 3 demora uns 10min. pra ser feita em um s
+                processador; aqui ela  dividida entre os %d disponveis.
+            """ %cpu_count()
+    
+    #Tambm pode ser chamado como: programa opo [arquivo.csv | arquivo.npy | arquivo]
+    #para gravar a tabela em arquivo enquanto ela  calculada. Com --instrumentar
+    #a tabela  feita num s processo e, no final, o resumo das contagens e dos
+    #tempos (instrumentacao.py)  escrito na sada de erros. As solues da
+    #equao de estado ficam gravadas em cache_eos.sqlite e so reaproveitadas
+    #da prxima vez (propriedades_agua.usar_cache); --sem-cache no usa o cache.
+    #--perfil nome escolhe o perfil de preciso ('rascunho', 'engenharia' ou
+    #'referencia'; ver propriedades_agua)
+    uso = ('uso: %s [opo [arquivo]] [--instrumentar] [--sem-cache] [--perfil nome]\n'
+           '     nome: %s\n' %(sys.argv[0], ', '.join(sorted(PA.PERFIS))))
+    argumentos = [a for a in sys.argv[1:] if a not in ('--instrumentar', '--sem-cache')]
+    instrumentar = '--instrumentar' in sys.argv[1:]
+    if '--perfil' in argumentos:
+        i = argumentos.index('--perfil')
+        nome = argumentos[i + 1:i + 2]
+        if not nome or nome[0] not in PA.PERFIS:
+            sys.stderr.write(('--perfil: falta o nome do perfil\n' if not nome else
+                              '--perfil: perfil desconhecido: %s\n' %nome[0]) + uso)
+            sys.exit(2)
+        usar_perfil(nome[0])
+        del argumentos[i:i + 2]
+    if '--sem-cache' not in sys.argv[1:]:
+        usar_cache()
+
+    if argumentos:
+        opc = argumentos[0]
+    else:
+        opc = raw_input()
+
+    arquivo = None
+    if len(argumentos) > 1:
+        arquivo = argumentos[1]
+
+    processos = cpu_count()
+
+    tabelas = {'1' : 'sat_temp', '2' : 'sat_press', '3' : 'vapor', '4' : 'liq_compr',
+               '5' : 'sat_temp_adaptativa', '6' : 'sat_press_adaptativa',
+               '7' : 'vapor_adaptativa', '8' : 'liq_compr_adaptativa'}
+
+    if opc in tabelas and instrumentar:
+        with INS.instrumentado(PA) as reg:
+            gera(tabelas[opc], [saida(tabelas[opc], arquivo)], 1)
+        sys.stderr.write(reg.resumo() + '\n')
+
+    elif opc in tabelas:
+        gera(tabelas[opc], [saida(tabelas[opc], arquivo)], processos)